@@ -9,18 +9,17 @@ bl_info = {
 }
 
 import sys
-import importlib
-
-
-from . import operators, panels
 
 
 if "bpy" in locals():
+    # Add-on reload: forget every submodule instead of reloading them all. Registration imports
+    # the light ones again below, operator modules are imported fresh on first use of their stub.
     prefix = __package__ + "."
-    for name, module in sys.modules.copy().items():
-        if name.startswith(prefix):
-            basename = name.removeprefix(prefix)
-            globals()[basename] = importlib.reload(module)
+    for name in [name for name in sys.modules if name.startswith(prefix)]:
+        del sys.modules[name]
+        globals().pop(name.removeprefix(prefix), None)
+
+from . import operators, panels
 
 import bpy
 
@@ -1,22 +1,47 @@
 import bpy
+import importlib
+import os
 
 
-from . import rig_create, modes, ikfksnap,twist
+from . import modes, lazy, live_refit
 
+# Operators registered as light stubs, their module is only imported on first use.
+# The manifest is generated from the real classes by scripts/build_stubs.py, rerun it after
+# changing an operator's label, description, options or properties.
+from .stubs import lazy_operators
 
-modules = [rig_create, modes, ikfksnap, twist]
+
+# Set FG_RIG_EAGER=1 to import and register every operator module up front (old behaviour)
+EAGER = os.environ.get("FG_RIG_EAGER") == "1"
+
+
+def eager_modules():
+    return [importlib.import_module(name) for name in dict.fromkeys(stub._fg_module for stub in lazy_operators)]
 
 
 def register():
 
-    for module in modules:
-        module.register()
+    modes.register()
+    live_refit.register()
+    if EAGER:
+        for module in eager_modules():
+            module.register()
+        return
+    lazy.reset(lazy_operators)
+    for cls in lazy_operators:
+        bpy.utils.register_class(cls)
 
 
 def unregister():
 
-    for module in modules:
-        module.unregister()
+    modes.unregister()
+    live_refit.unregister()
+    if EAGER:
+        for module in eager_modules():
+            module.unregister()
+        return
+    for cls in reversed(lazy_operators):
+        bpy.utils.unregister_class(cls)
 
 
 if __name__ == "__main__":
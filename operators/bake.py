@@ -0,0 +1,179 @@
+import bpy
+
+from .lazy import lazy_import
+
+np = lazy_import("numpy")
+
+
+# ------------------- deform skeleton --------------#
+def deform_bone_names(armatur):
+    """Root plus every deforming bone (spine, limbs, twist bones...)."""
+    return [b.name for b in armatur.data.bones if b.use_deform or b.name == "root"]
+
+
+def build_deform_copy(context, src):
+    """
+    Duplicates the armature and keeps only root and deform bones.
+
+    Bones whose parent was removed (e.g. twist bones under a non deforming
+    forearm) are reparented to their closest kept ancestor. All constraints,
+    drivers and animation are dropped from the copy.
+    """
+    keep = set(deform_bone_names(src))
+    dst = src.copy()
+    dst.data = src.data.copy()
+    dst.name = src.name + "_deform"
+    dst.data.name = src.data.name + "_deform"
+    dst.animation_data_clear()
+    dst.data.animation_data_clear()
+    for collection in src.users_collection:
+        collection.objects.link(dst)
+
+    bpy.ops.object.mode_set(mode="OBJECT")
+    bpy.ops.object.select_all(action="DESELECT")
+    dst.select_set(True)
+    context.view_layer.objects.active = dst
+    bpy.ops.object.mode_set(mode="EDIT")
+    edit_bones = dst.data.edit_bones
+    kept_parents = {}
+    for bone in edit_bones:
+        if bone.name not in keep:
+            continue
+        parent = bone.parent
+        while parent and parent.name not in keep:
+            parent = parent.parent
+        kept_parents[bone.name] = parent.name if parent else None
+    for bone in list(edit_bones):
+        if bone.name not in keep:
+            edit_bones.remove(bone)
+    for name, parent_name in kept_parents.items():
+        bone = edit_bones[name]
+        if (bone.parent.name if bone.parent else None) != parent_name:
+            bone.use_connect = False
+            bone.parent = edit_bones[parent_name] if parent_name else None
+    bpy.ops.object.mode_set(mode="OBJECT")
+
+    for pose_bone in dst.pose.bones:
+        for con in list(pose_bone.constraints):
+            pose_bone.constraints.remove(con)
+        pose_bone.rotation_mode = "QUATERNION"
+        pose_bone.location = (0, 0, 0)
+        pose_bone.rotation_quaternion = (1, 0, 0, 0)
+        pose_bone.scale = (1, 1, 1)
+    return dst
+
+
+def sample_local_transforms(scene, src, dst, frames):
+    """
+    Plays the full rig and converts its armature-space pose to local
+    (matrix_basis) transforms of the deform copy.
+
+    Returns:
+        tuple: location (b, f, 3), rotation_quaternion (b, f, 4), scale (b, f, 3) arrays.
+    """
+    bones = dst.data.bones
+    names = [b.name for b in bones]
+    parents = [b.parent.name if b.parent else None for b in bones]
+    # Inverse rest matrix relative to the (new) parent
+    rest_inv = [
+        (b.parent.matrix_local.inverted() @ b.matrix_local).inverted() if b.parent else b.matrix_local.inverted() for b in bones
+    ]
+
+    loc = np.empty((len(names), len(frames), 3), dtype=np.float32)
+    rot = np.empty((len(names), len(frames), 4), dtype=np.float32)
+    scl = np.empty((len(names), len(frames), 3), dtype=np.float32)
+    previous = [None] * len(names)
+    frame_current = scene.frame_current
+    for f, frame in enumerate(frames):
+        scene.frame_set(frame)
+        pose = {name: src.pose.bones[name].matrix.copy() for name in names}
+        for j, name in enumerate(names):
+            if parents[j]:
+                basis = rest_inv[j] @ pose[parents[j]].inverted() @ pose[name]
+            else:
+                basis = rest_inv[j] @ pose[name]
+            l, q, s = basis.decompose()
+            if previous[j] is not None:
+                q.make_compatible(previous[j])  # avoid flips between keys
+            previous[j] = q
+            loc[j, f], rot[j, f], scl[j, f] = l, q, s
+    scene.frame_set(frame_current)
+    return names, loc, rot, scl
+
+
+def write_action(name, bone_names, frames, channels):
+    """Creates an action with one F-curve per channel, keys written in bulk with foreach_set."""
+    action = bpy.data.actions.new(name)
+    frames = np.asarray(frames, dtype=np.float32)
+    co = np.empty((len(frames), 2), dtype=np.float32)
+    co[:, 0] = frames
+    for j, bone_name in enumerate(bone_names):
+        for prop, values in channels.items():
+            data_path = f'pose.bones["{bone_name}"].{prop}'
+            for index in range(values.shape[2]):
+                fcurve = action.fcurves.new(data_path, index=index, action_group=bone_name)
+                co[:, 1] = values[j, :, index]
+                fcurve.keyframe_points.add(len(frames))
+                fcurve.keyframe_points.foreach_set("co", co.ravel())
+                fcurve.update()
+    return action
+
+
+class BakeDeformSkeleton(bpy.types.Operator):
+    bl_idname = "fg.bake_deform_skeleton"
+    bl_label = "bake deform skeleton"
+    bl_description = "Build a deform-only copy of the armature (no IK/pole controls, no constraints)\nand bake the full rig animation onto it for export and fast playback.\n"
+    bl_options = {"REGISTER", "UNDO"}
+
+    frame_start: bpy.props.IntProperty(name="Start", default=1)
+    frame_end: bpy.props.IntProperty(name="End", default=250)
+    bind_mesh: bpy.props.BoolProperty(name="Bind Human", default=False, description="Point the human's armature modifier to the baked skeleton")
+
+    def invoke(self, context, event):
+        self.frame_start = context.scene.frame_start
+        self.frame_end = context.scene.frame_end
+        return self.execute(context)
+
+    def execute(self, context):
+        src = context.object if context.object and context.object.type == "ARMATURE" else context.scene.my_armature
+        if not src:
+            self.report({"ERROR"}, "No armature selected")
+            return {"CANCELLED"}
+        if self.frame_end < self.frame_start:
+            self.report({"ERROR"}, "Frame end is before frame start")
+            return {"CANCELLED"}
+        frames = list(range(self.frame_start, self.frame_end + 1))
+
+        dst = build_deform_copy(context, src)
+        names, loc, rot, scl = sample_local_transforms(context.scene, src, dst, frames)
+        action = write_action(dst.name + "_bake", names, frames, {"location": loc, "rotation_quaternion": rot, "scale": scl})
+        dst.animation_data_create().action = action
+
+        human = context.scene.my_object
+        if self.bind_mesh and human:
+            for mod in human.modifiers:
+                if mod.type == "ARMATURE" and mod.object == src:
+                    mod.object = dst
+
+        self.report({"INFO"}, f"Baked {len(names)} deform bones over {len(frames)} frames to {dst.name}")
+        return {"FINISHED"}
+
+
+# ------------------ register -------------------#
+classes = [BakeDeformSkeleton]
+
+
+def register():
+
+    for cls in classes:
+        bpy.utils.register_class(cls)
+
+
+def unregister():
+
+    for cls in reversed(classes):
+        bpy.utils.unregister_class(cls)
+
+
+if __name__ == "__main__":
+    register()
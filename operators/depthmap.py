@@ -0,0 +1,107 @@
+from .lazy import lazy_import
+
+np = lazy_import("numpy")
+
+
+# ------------------- orthographic depth maps --------------#
+# view -> (u axis, v axis, depth axis)
+VIEWS = {"FRONT": (0, 2, 1)}
+CHUNK = 1 << 21  # pixel samples rasterized at once
+
+
+class DepthMap:
+    """
+    Nearest and farthest surface depth of the mesh over an orthographic pixel grid.
+
+    lo / hi: (rows, cols) smallest and largest depth coordinate hit at each pixel (NaN outside
+    the silhouette), rows follow v and columns u, so FRONT has lo = front-most y and hi = back-most y.
+    """
+
+    def __init__(self, view, origin, pixel, lo, hi):
+        self.view = view
+        self.origin = origin  # (u, v) of the corner of pixel (0, 0)
+        self.pixel = pixel
+        self.lo = lo
+        self.hi = hi
+
+    def index(self, u, v):
+        """Pixel (row, col) of a point, None outside the image."""
+        rows, cols = self.lo.shape
+        col = int(np.floor((u - self.origin[0]) / self.pixel))
+        row = int(np.floor((v - self.origin[1]) / self.pixel))
+        return (row, col) if 0 <= row < rows and 0 <= col < cols else None
+
+    def at(self, u, v):
+        """(lo, hi) depth at a point, NaN when it is outside the silhouette or the image."""
+        index = self.index(u, v)
+        if index is None:
+            return np.nan, np.nan
+        return self.lo[index], self.hi[index]
+
+
+def rasterize(co, tris, view="FRONT", resolution=512):
+    """
+    Renders the triangle mesh into a DepthMap with `resolution` pixels along its longest side.
+
+    Every triangle is expanded to the pixel centers of its bounding box, barycentric coordinates
+    keep the covered ones and interpolate their depth, then np.minimum/maximum.at merge them.
+    Samples are processed in chunks so memory stays bounded whatever the triangle sizes.
+    """
+    u_axis, v_axis, d_axis = VIEWS[view]
+    co = np.asarray(co, dtype=np.float64)
+    uv = co[:, [u_axis, v_axis]]
+    lo_uv = uv.min(axis=0)
+    pixel = float((uv.max(axis=0) - lo_uv).max()) / resolution or 1.0
+    shape = np.ceil((uv.max(axis=0) - lo_uv) / pixel).astype(int) + 1
+    cols, rows = int(shape[0]), int(shape[1])
+    lo = np.full(rows * cols, np.inf)
+    hi = np.full(rows * cols, -np.inf)
+
+    # Triangle corners in pixel units, pixel centers sit at integer + 0.5
+    p = (uv[tris] - lo_uv) / pixel
+    depth = co[tris][:, :, d_axis]
+    c0 = np.maximum(np.ceil(p[:, :, 0].min(axis=1) - 0.5), 0).astype(np.int64)
+    c1 = np.minimum(np.floor(p[:, :, 0].max(axis=1) - 0.5), cols - 1).astype(np.int64)
+    r0 = np.maximum(np.ceil(p[:, :, 1].min(axis=1) - 0.5), 0).astype(np.int64)
+    r1 = np.minimum(np.floor(p[:, :, 1].max(axis=1) - 0.5), rows - 1).astype(np.int64)
+    width = np.maximum(c1 - c0 + 1, 0)
+    counts = width * np.maximum(r1 - r0 + 1, 0)
+
+    ends = np.cumsum(counts)
+    start = 0
+    while start < len(tris):
+        stop = int(np.searchsorted(ends, (ends[start - 1] if start else 0) + CHUNK, side="right"))
+        stop = max(stop, start + 1)
+        _rasterize_chunk(slice(start, stop), p, depth, c0, r0, width, counts, cols, lo, hi)
+        start = stop
+
+    lo[np.isinf(lo)] = np.nan
+    hi[np.isinf(hi)] = np.nan
+    return DepthMap(view, lo_uv, pixel, lo.reshape(rows, cols), hi.reshape(rows, cols))
+
+
+def _rasterize_chunk(part, p, depth, c0, r0, width, counts, cols, lo, hi):
+    counts = counts[part]
+    total = int(counts.sum())
+    if not total:
+        return
+    tri = np.repeat(np.arange(part.start, part.start + len(counts)), counts)
+    local = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    w = np.maximum(width[tri], 1)
+    col = c0[tri] + local % w
+    row = r0[tri] + local // w
+
+    a, b, c = p[tri, 0], p[tri, 1], p[tri, 2]
+    x, y = col + 0.5, row + 0.5
+    det = (b[:, 1] - c[:, 1]) * (a[:, 0] - c[:, 0]) + (c[:, 0] - b[:, 0]) * (a[:, 1] - c[:, 1])
+    det = np.where(np.abs(det) > 1e-12, det, np.nan)  # edge-on triangles cover nothing
+    l0 = ((b[:, 1] - c[:, 1]) * (x - c[:, 0]) + (c[:, 0] - b[:, 0]) * (y - c[:, 1])) / det
+    l1 = ((c[:, 1] - a[:, 1]) * (x - c[:, 0]) + (a[:, 0] - c[:, 0]) * (y - c[:, 1])) / det
+    l2 = 1 - l0 - l1
+    inside = (l0 >= -1e-9) & (l1 >= -1e-9) & (l2 >= -1e-9)
+
+    d = depth[tri[inside]]
+    z = l0[inside] * d[:, 0] + l1[inside] * d[:, 1] + l2[inside] * d[:, 2]
+    flat = row[inside] * cols + col[inside]
+    np.minimum.at(lo, flat, z)
+    np.maximum.at(hi, flat, z)
@@ -0,0 +1,118 @@
+from .lazy import lazy_import
+from .slicing import slice_along
+
+np = lazy_import("numpy")
+
+
+# ------------------- finger segmentation --------------#
+FINGERS = ["thumb", "f_index", "f_middle", "f_ring", "f_pinky"]
+PHALANGES = (0.45, 0.3, 0.25)  # share of each finger bone in the finger length, base to tip
+
+
+def hand_submesh(co, tris, origin, direction, reach, radius):
+    """Vertices past the wrist plane within `reach` along the hand and `radius` of its axis, with their faces."""
+    rel = co - origin
+    along = rel @ direction
+    off_axis = np.linalg.norm(rel - along[:, None] * direction, axis=1)
+    inside = (along >= 0) & (along <= reach) & (off_axis <= radius)
+    remap = np.full(len(co), -1, dtype=np.int64)
+    remap[inside] = np.arange(np.count_nonzero(inside))
+    keep = inside[tris].all(axis=1)
+    return co[inside], remap[tris[keep]]
+
+
+def track_loops(sections, gap):
+    """
+    Chains the contour loops of consecutive slices from palm to tips. A loop continues the chain
+    whose last centroid is nearest (within `gap`) when it is that chain's only continuation;
+    when a chain splits (palm into fingers) it ends and every part starts a new chain.
+
+    Returns (list of row arrays, set of the chain indices that ended by splitting).
+    """
+    chains = []
+    split = set()
+    active = []  # chain indices alive on the previous plane
+    for plane in range(len(sections.heights)):
+        rows = sections.at(plane)
+        rows = rows[sections.area[rows] > 0]  # outer contours only
+        alive = []
+        if len(rows) and active:
+            last = sections.centroid[[chains[c][-1] for c in active]]
+            dist = np.linalg.norm(sections.centroid[rows][:, None, :] - last[None, :, :], axis=2)
+            nearest = np.argmin(dist, axis=1)
+            close = dist[np.arange(len(rows)), nearest] <= gap
+            counts = np.bincount(nearest[close], minlength=len(active))
+            split.update(active[c] for c in np.flatnonzero(counts > 1))
+            for row, c, ok in zip(rows, nearest, close):
+                if ok and counts[c] == 1:
+                    chains[active[c]].append(row)
+                    alive.append(active[c])
+                    continue
+                chains.append([row])
+                alive.append(len(chains) - 1)
+        else:
+            for row in rows:
+                chains.append([row])
+                alive.append(len(chains) - 1)
+        active = alive
+    return [np.array(chain) for chain in chains], split
+
+
+def fit_finger_joints(points, tip):
+    """Head, two knuckles and tip of a finger along the polyline of its slice centroids."""
+    path = np.vstack([points, tip])
+    seg = np.linalg.norm(np.diff(path, axis=0), axis=1)
+    arc = np.concatenate([[0], np.cumsum(seg)])
+    marks = np.concatenate([[0], np.cumsum(PHALANGES)]) * arc[-1]
+    return np.stack([np.array([np.interp(m, arc, path[:, k]) for k in range(3)]) for m in marks])
+
+
+def segment_fingers(co, tris, origin, direction, across, tallunit, slices=80):
+    """
+    Finger joints of one hand: {finger name: (4, 3) head, knuckle, knuckle, tip}.
+
+    The hand past the wrist is cut by `slices` planes across its axis, the loops of every plane
+    (connected components of the cut mesh edges) are chained from palm to tips, the chains that
+    split off the palm are the fingers. The thumb is the one separating closest to the wrist,
+    the others are ordered along `across` (unit vector from index to pinky side).
+    """
+    direction = np.asarray(direction, dtype=np.float64)
+    direction /= np.linalg.norm(direction)
+    hand_co, hand_tris = hand_submesh(np.asarray(co, dtype=np.float64), tris, origin, direction, tallunit * 9, tallunit * 5)
+    if not len(hand_tris):
+        return {}
+    along = (hand_co - origin) @ direction
+    reach = float(along.max())
+    offsets = np.linspace(0, reach, slices + 2)[1:-1]
+    sections = slice_along(hand_co, hand_tris, origin, direction, offsets)
+    chains, split = track_loops(sections, tallunit * 0.8)
+
+    # Fingers are the chains running out to a tip: they never split and are not the palm at the wrist
+    candidates = [rows for k, rows in enumerate(chains) if k not in split and sections.plane[rows[0]] > 0 and len(rows) >= 3]
+    candidates.sort(key=lambda rows: -len(rows))
+    candidates = candidates[:5]
+    if len(candidates) < 4:
+        return {}
+
+    finger_rows = {}
+    if len(candidates) == 5:
+        thumb = min(candidates, key=lambda rows: sections.plane[rows[0]])
+        finger_rows["thumb"] = thumb
+        candidates = [rows for rows in candidates if rows is not thumb]
+    candidates.sort(key=lambda rows: float(sections.centroid[rows[0]] @ across))
+    finger_rows.update(zip(FINGERS[1:], candidates))
+
+    joints = {}
+    for name, rows in finger_rows.items():
+        centroids = sections.centroid[rows]
+        # Tip: on the finger axis, level with the farthest vertex within its last contour
+        rel = hand_co - centroids[-1]
+        ahead = rel @ direction
+        off_axis = np.linalg.norm(rel - ahead[:, None] * direction, axis=1)
+        near = (ahead >= 0) & (off_axis <= sections.width[rows[-1]].max() * 0.6)
+        tip = centroids[-1] + direction * (ahead[near].max() if near.any() else 0.0)
+        # The base joint sits inside the palm, a third of the free finger length before the web
+        free = np.linalg.norm(tip - centroids[0])
+        base = centroids[0] - direction * free * (0.15 if name == "thumb" else 0.35)
+        joints[name] = fit_finger_joints(np.vstack([base, centroids]), tip)
+    return joints
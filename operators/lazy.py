@@ -0,0 +1,78 @@
+import bpy
+import importlib
+import importlib.util
+import sys
+
+
+# ------------------- lazy modules --------------#
+def lazy_import(name):
+    """
+    Returns a module whose code only runs on first attribute access.
+    Used for heavy backends (numpy...) so registering the add-on does not pay for them.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(f"No module named {name!r}")
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+# ------------------- lazy operators --------------#
+CALLBACKS = ("execute", "invoke", "modal", "cancel")
+
+
+def _resolve(stub):
+    """Imports the real operator class of a stub and lends its helper methods to the stub."""
+    real = stub.__dict__.get("_fg_real")
+    if real is None:
+        module = importlib.import_module(stub._fg_module)
+        real = getattr(module, stub.__name__)
+        for name, value in vars(real).items():
+            if callable(value) and not name.startswith("__") and name not in CALLBACKS and (name in stub._fg_lent or not hasattr(stub, name)):
+                setattr(stub, name, value)
+                stub._fg_lent.add(name)
+        stub._fg_real = real
+    return real
+
+
+def _forward(callback):
+    def method(self, *args):
+        return getattr(_resolve(type(self)), callback)(self, *args)
+
+    method.__name__ = callback
+    return method
+
+
+def stub_operator(module, class_name, bl_idname, bl_label, bl_description="", bl_options=None, props=None, callbacks=("execute",)):
+    """
+    Builds a light operator class that registers like `module.class_name` but only
+    imports `module` the first time one of its `callbacks` runs.
+
+    The stub carries the UI metadata and properties, the real class the logic.
+    """
+    namespace = {
+        "bl_idname": bl_idname,
+        "bl_label": bl_label,
+        "bl_description": bl_description,
+        "bl_options": bl_options or {"REGISTER", "UNDO"},
+        "__annotations__": dict(props or {}),
+        "_fg_module": module,
+        "_fg_real": None,
+        "_fg_lent": set(),
+    }
+    for callback in callbacks:
+        namespace[callback] = _forward(callback)
+    return type(class_name, (bpy.types.Operator,), namespace)
+
+
+def reset(stubs):
+    """Forget resolved classes, e.g. after the modules were reloaded."""
+    for stub in stubs:
+        stub._fg_real = None
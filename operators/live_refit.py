@@ -0,0 +1,175 @@
+import bpy
+
+from .lazy import lazy_import
+from .mesh_index import chunk_checksums, moved_vertices
+
+np = lazy_import("numpy")
+
+
+# ------------------- live refit --------------#
+# Opt-in (scene.fg_live_refit): edits of the human mesh are noticed by a depsgraph handler,
+# after `scene.fg_live_refit_delay` seconds without new edits the changed vertices are found
+# by comparing per-chunk checksums of the coordinate buffer, and only the regions of the rig
+# closest to them are refitted. The fit updates its cached mesh index and reruns only the landmark
+# searches and probes whose vertex bands hold a moved vertex. rig_create is only imported once a
+# refit actually runs.
+MAX_SAMPLES = 2000  # changed vertices used to pick the regions
+
+_baselines = {}  # human name -> (coords, chunk checksums)
+_pending = {"scene": None}
+_refitting = False
+
+
+def read_coords(obj):
+    if obj.mode == "EDIT":
+        obj.update_from_editmode()
+    mesh = obj.data
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    return co.reshape(-1, 3)
+
+
+def capture(human):
+    """Stores the current coordinates as the reference the next edits are compared against."""
+    co = read_coords(human)
+    _baselines[human.name_full] = (co, chunk_checksums(co))
+
+
+def changed_vertices(human):
+    """Indices of the vertices that moved since the last capture, None when the topology changed."""
+    co = read_coords(human)
+    sums = chunk_checksums(co)
+    base = _baselines.get(human.name_full)
+    _baselines[human.name_full] = (co, sums)
+    if base is None or len(base[0]) != len(co):
+        return None
+    return moved_vertices(*base, co, sums)
+
+
+def touched_regions(human, armatur, indices, regions):
+    """Regions owning the bone closest to each changed vertex (both sides count for the .L fitter)."""
+    from .weights import segment_distances
+
+    bones = armatur.data.bones
+    names, owners = [], []
+    for region, region_names in regions.items():
+        for name in region_names:
+            for side in {name, name.replace(".L", ".R")}:
+                if side in bones:
+                    names.append(side)
+                    owners.append(region)
+    if not names or not len(indices):
+        return set()
+    if len(indices) > MAX_SAMPLES:
+        indices = indices[:: len(indices) // MAX_SAMPLES + 1]
+
+    to_arm = np.array(armatur.matrix_world.inverted() @ human.matrix_world, dtype=np.float32)
+    co = _baselines[human.name_full][0][indices]
+    points = co @ to_arm[:3, :3].T + to_arm[:3, 3]
+    heads = np.array([bones[n].head_local for n in names], dtype=np.float32)
+    tails = np.array([bones[n].tail_local for n in names], dtype=np.float32)
+    nearest = np.argmin(segment_distances(points, heads, tails), axis=1)
+    return {owners[i] for i in np.unique(nearest).tolist()}
+
+
+def view3d_override():
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == "VIEW_3D":
+                return {"window": window, "area": area, "region": next(r for r in area.regions if r.type == "WINDOW")}
+    return {}
+
+
+def refit():
+    """Timer callback, runs once the edits settled down."""
+    global _refitting
+    scene = _pending["scene"]
+    _pending["scene"] = None
+    if not scene or not scene.fg_live_refit:
+        return None
+    human, armatur = scene.my_object, scene.my_armature
+    if not human or not armatur or "spine.003" not in armatur.data.bones:
+        return None
+
+    indices = changed_vertices(human)
+    if indices is not None and not len(indices):
+        return None
+
+    from .rig_create import RigFit
+
+    regions = set(RigFit.REGIONS) if indices is None else touched_regions(human, armatur, indices, RigFit.REGIONS)
+    if not regions:
+        return None
+    print("live refit:", ", ".join(sorted(regions)), "" if indices is None else f"({len(indices)} vertices moved)")
+
+    _refitting = True
+    try:
+        with bpy.context.temp_override(**view3d_override()):
+            context = bpy.context
+            was_editing = human.mode == "EDIT"
+            fit = RigFit(human, armatur, "OBJECT", regions=regions, keep_modifiers=True)
+            try:
+                fit.run(context)
+            except Exception as error:
+                print(f"live refit failed at {fit.stage_name[0]}: {error!r}")
+                fit.rollback(context)
+            bpy.ops.object.select_all(action="DESELECT")
+            human.select_set(True)
+            context.view_layer.objects.active = human
+            if was_editing:
+                bpy.ops.object.mode_set(mode="EDIT")
+        # The refit applies transforms and toggles modes, do not take that for a new edit
+        capture(human)
+    finally:
+        _refitting = False
+    return None
+
+
+@bpy.app.handlers.persistent
+def _live_refit_update(scene, depsgraph):
+    """Restarts the debounce timer whenever the human geometry changes."""
+    if _refitting or not scene.fg_live_refit or not scene.my_object:
+        return
+    if not depsgraph.id_type_updated("MESH") and not depsgraph.id_type_updated("OBJECT"):
+        return
+    human = scene.my_object
+    for update in depsgraph.updates:
+        if update.is_updated_geometry and update.id.original in (human, human.data):
+            _pending["scene"] = scene
+            if bpy.app.timers.is_registered(refit):
+                bpy.app.timers.unregister(refit)
+            bpy.app.timers.register(refit, first_interval=scene.fg_live_refit_delay)
+            return
+
+
+@bpy.app.handlers.persistent
+def _live_refit_reset(*args):
+    _baselines.clear()
+    _pending["scene"] = None
+
+
+def toggle(scene):
+    """Update callback of scene.fg_live_refit."""
+    _baselines.clear()
+    if scene.fg_live_refit and scene.my_object:
+        capture(scene.my_object)
+
+
+# ------------------ register -------------------#
+def register():
+    bpy.app.handlers.depsgraph_update_post.append(_live_refit_update)
+    bpy.app.handlers.load_post.append(_live_refit_reset)
+
+
+def unregister():
+    if bpy.app.timers.is_registered(refit):
+        bpy.app.timers.unregister(refit)
+    if _live_refit_update in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(_live_refit_update)
+    if _live_refit_reset in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(_live_refit_reset)
+    _live_refit_reset()
+
+
+if __name__ == "__main__":
+    register()
@@ -0,0 +1,289 @@
+import os
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .lazy import lazy_import
+
+np = lazy_import("numpy")
+
+
+# ------------------- mesh coordinates --------------#
+SOURCES = ("BASE", "SHAPE_KEYS", "EVALUATED")
+_scratch = {"buffer": None}  # flat float32 buffer foreach_get writes into, grown on demand
+
+
+def _read_into_scratch(vertices_or_data, count):
+    buffer = _scratch["buffer"]
+    if buffer is None or len(buffer) < count * 3:
+        buffer = _scratch["buffer"] = np.empty(count * 3, dtype=np.float32)
+    view = buffer[: count * 3]
+    vertices_or_data.foreach_get("co", view)
+    return view.reshape(-1, 3)
+
+
+def mix_shape_keys(mesh, base):
+    """Adds every unmuted relative shape key to `base` (n, 3) in place (key vertex groups are ignored)."""
+    keys = mesh.shape_keys
+    if not keys or not keys.use_relative:
+        return base
+    count = len(mesh.vertices)
+    for kb in keys.key_blocks:
+        if kb == keys.reference_key or kb.mute or kb.value == 0.0:
+            continue
+        shape = _read_into_scratch(kb.data, count).copy()
+        base += (shape - _read_into_scratch(kb.relative_key.data, count)) * kb.value
+    return base
+
+
+def read_world_coords(obj, source="BASE", depsgraph=None):
+    """
+    Returns the object's vertex coordinates in world space as a (n, 3) float32 array.
+
+    source: BASE (undeformed mesh), SHAPE_KEYS (base with the current shape key mix) or
+    EVALUATED (modifiers and shape keys applied, what Object.ray_cast sees, needs `depsgraph`).
+    Evaluated meshes may have other vertex counts than `obj.data`.
+    """
+    if source == "EVALUATED":
+        mesh = obj.evaluated_get(depsgraph).data
+        co = _read_into_scratch(mesh.vertices, len(mesh.vertices))
+    else:
+        mesh = obj.data
+        co = _read_into_scratch(mesh.vertices, len(mesh.vertices))
+        if source == "SHAPE_KEYS" and mesh.shape_keys:
+            co = mix_shape_keys(mesh, co.copy())
+    matrix = np.array(obj.matrix_world, dtype=np.float32)
+    # The matmul allocates the result, the scratch buffer is free again for the next read
+    return co @ matrix[:3, :3].T + matrix[:3, 3]
+
+
+# ------------------- change detection --------------#
+CHECKSUM_CHUNK = 1024  # vertices per checksum
+
+
+def chunk_checksums(co, chunk=CHECKSUM_CHUNK):
+    buf = np.ascontiguousarray(co, dtype=np.float32).tobytes()
+    step = chunk * 12  # 3 float32 per vertex
+    return [zlib.crc32(buf[i : i + step]) for i in range(0, len(buf), step)]
+
+
+def moved_vertices(old_co, old_sums, co, sums, chunk=CHECKSUM_CHUNK):
+    """Indices of the vertices whose coordinates differ, only chunks with another checksum are compared."""
+    changed = []
+    for k, (old, new) in enumerate(zip(old_sums, sums)):
+        if old != new:
+            part = slice(k * chunk, (k + 1) * chunk)
+            changed.append(np.flatnonzero(np.any(old_co[part] != co[part], axis=1)) + k * chunk)
+    return np.concatenate(changed) if changed else np.empty(0, dtype=np.int64)
+
+
+# ------------------- nearest vertex --------------#
+OFFSETS = [(x, y, z) for x in (0, 1) for y in (0, 1) for z in (0, 1)]
+
+
+class VertexGrid:
+    """
+    Vertices hashed into cubic cells. The nearest vertex of a point is searched in the 2x2x2 cells
+    around it, which is exact whenever it lies within half a cell.
+    """
+
+    def __init__(self, co, size):
+        self.co = co
+        self.lo = co.min(axis=0)
+        extent = co.max(axis=0) - self.lo
+        # Keep the cell table at most a few times the vertex count on thin or sparse meshes
+        self.size = size = max(size, float(np.prod(extent + size) / (8 * len(co))) ** (1 / 3))
+        cell = ((co - self.lo) / size).astype(np.int64)
+        self.dims = cell.max(axis=0) + 1
+        key = self.key(cell)
+        self.order = np.argsort(key, kind="stable")
+        self.indptr = np.concatenate([[0], np.cumsum(np.bincount(key, minlength=int(np.prod(self.dims))))])
+
+    def key(self, cell):
+        return (cell[:, 2] * self.dims[1] + cell[:, 1]) * self.dims[0] + cell[:, 0]
+
+    def nearest(self, points):
+        """Nearest vertex of every point (-1 when the cells around it are empty)."""
+        base = np.floor((points - self.lo) / self.size - 0.5).astype(np.int64)
+        best = np.full(len(points), -1, dtype=np.int64)
+        dist = np.full(len(points), np.inf)
+        for offset in OFFSETS:
+            around = base + offset
+            valid = np.all((around >= 0) & (around < self.dims), axis=1)
+            key = self.key(np.where(valid[:, None], around, 0))
+            start = self.indptr[key]
+            count = np.where(valid, self.indptr[key + 1] - start, 0)
+            if not count.any():
+                continue
+            pt = np.repeat(np.arange(len(points)), count)
+            vertex = self.order[np.repeat(start - np.cumsum(count) + count, count) + np.arange(count.sum())]
+            diff = self.co[vertex] - points[pt]
+            d = np.einsum("ij,ij->i", diff, diff)
+            # Candidates come grouped by point, so the closest per point is one reduceat
+            hit = np.flatnonzero(count)
+            dist[hit] = np.minimum(dist[hit], np.minimum.reduceat(d, np.cumsum(count)[hit] - count[hit]))
+            closest = d <= dist[pt]
+            best[pt[closest]] = vertex[closest]
+        return best
+
+
+# ------------------- band queries --------------#
+class MeshIndex:
+    """
+    Vertex coordinates sorted along each axis, so "all vertices within tol of a
+    height/width/depth" is two binary searches instead of a scan of the mesh.
+
+    Only numpy is used here, building it is safe on a worker thread. With `subset` (vertex indices)
+    only those vertices are indexed, e.g. the body without its accessories.
+    """
+
+    def __init__(self, co, subset=None):
+        self.co = co
+        if subset is None:
+            self.order = [np.argsort(co[:, axis], kind="stable") for axis in range(3)]
+        else:
+            self.order = [subset[np.argsort(co[subset, axis], kind="stable")] for axis in range(3)]
+        self.sorted = [co[order, axis] for axis, order in enumerate(self.order)]
+
+    def band(self, axis, center, tol, inclusive=False):
+        """Indices of vertices with |co[axis] - center| < tol (<= when inclusive)."""
+        values = self.sorted[axis]
+        lo = np.searchsorted(values, center - tol, side="left" if inclusive else "right")
+        hi = np.searchsorted(values, center + tol, side="right" if inclusive else "left")
+        return self.order[axis][lo:hi]
+
+    def above(self, axis, value):
+        """Indices of vertices with co[axis] >= value."""
+        return self.order[axis][np.searchsorted(self.sorted[axis], value, side="left") :]
+
+    def moved(self, co, indices):
+        """
+        Index of `co`, where only the indexed vertices `indices` moved since this one was built:
+        they are taken out of every axis order and merged back in at their new place, no full sort.
+        """
+        index = MeshIndex.__new__(MeshIndex)
+        index.co = co
+        index.order, index.sorted = [], []
+        marked = np.zeros(len(co), dtype=bool)
+        marked[indices] = True
+        for axis in range(3):
+            stay = ~marked[self.order[axis]]
+            moved = indices[np.argsort(co[indices, axis], kind="stable")]
+            at = np.searchsorted(self.sorted[axis][stay], co[moved, axis], side="right")
+            order = np.insert(self.order[axis][stay], at, moved)
+            index.order.append(order)
+            index.sorted.append(co[order, axis])
+        return index
+
+    def select(self, indices, mask):
+        """Keeps the indices where the boolean per-vertex `mask` is set."""
+        return indices[mask[indices]]
+
+    def argmax(self, indices, axis):
+        return indices[np.argmax(self.co[indices, axis])]
+
+    def argmin(self, indices, axis):
+        return indices[np.argmin(self.co[indices, axis])]
+
+
+# ------------------- parallel probes --------------#
+def run_graph(tasks, workers=None):
+    """
+    Runs {name: (fn, deps)} on a thread pool, each task as soon as the tasks it depends on
+    are done, and returns {name: result}. `fn` receives the results of its deps as keyword
+    arguments. numpy releases the GIL in the sorted/searchsorted/arg* calls the probes are
+    made of, so independent probes overlap and the whole graph takes about its longest path.
+    """
+    results = {}
+    pending = dict(tasks)
+    running = {}
+    with ThreadPoolExecutor(max_workers=workers or min(len(tasks), os.cpu_count() or 1) or 1) as pool:
+        while pending or running:
+            for name, (fn, deps) in list(pending.items()):
+                if all(dep in results for dep in deps):
+                    running[pool.submit(fn, **{dep: results[dep] for dep in deps})] = name
+                    del pending[name]
+            if not running:
+                raise ValueError(f"Unresolvable dependencies: {', '.join(pending)}")
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[running.pop(future)] = future.result()
+    return results
+
+
+# ------------------- connectivity --------------#
+def connected_components(count, a, b):
+    """
+    Component label of `count` nodes linked by the edges a[i]-b[i], labels are the smallest node of
+    each component. Vectorized union-find: min-label propagation plus pointer jumping.
+    """
+    labels = np.arange(count)
+    a = np.asarray(a, dtype=np.int64)
+    b = np.asarray(b, dtype=np.int64)
+    while True:
+        low = np.minimum(labels[a], labels[b])
+        before = labels.copy()
+        np.minimum.at(labels, labels[a], low)
+        np.minimum.at(labels, labels[b], low)
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+        if np.array_equal(before, labels):
+            return labels
+
+
+class Components:
+    """
+    Connected mesh parts (body, eyes, teeth, hair cards, props...) with per-part stats.
+
+    labels: (n,) part of every vertex (0 = most vertices), size: vertex count, lo / hi: bounds,
+    volume: enclosed volume from the signed tetrahedra of the faces (an estimate for open parts).
+    """
+
+    def __init__(self, labels, size, lo, hi, volume):
+        self.labels = labels
+        self.size = size
+        self.lo = lo
+        self.hi = hi
+        self.volume = volume
+
+    def __len__(self):
+        return len(self.size)
+
+    def moved(self, co, indices):
+        """Same parts with the bounds of the parts owning the vertices `indices` measured again on `co`."""
+        lo, hi = self.lo.copy(), self.hi.copy()
+        for part in np.unique(self.labels[indices]).tolist():
+            members = co[self.labels == part]
+            lo[part], hi[part] = members.min(axis=0), members.max(axis=0)
+        return Components(self.labels, self.size, lo, hi, self.volume)
+
+    def body(self, share=0.05):
+        """Vertex mask of the parts with at least `share` of the largest part's vertices."""
+        return (self.size >= self.size[0] * share)[self.labels]
+
+    def small(self, share=0.05):
+        return np.flatnonzero(self.size < self.size[0] * share)
+
+
+def mesh_components(co, tris):
+    """Splits the mesh into connected parts along the face edges, largest part first."""
+    co = np.asarray(co, dtype=np.float64)
+    tris = np.asarray(tris, dtype=np.int64)
+    roots = connected_components(len(co), tris.ravel(), tris[:, [1, 2, 0]].ravel())
+    _, labels, size = np.unique(roots, return_inverse=True, return_counts=True)
+    rank = np.empty(len(size), dtype=np.int64)
+    rank[np.argsort(-size, kind="stable")] = np.arange(len(size))
+    labels = rank[labels]
+    size = np.bincount(labels, minlength=len(size))
+
+    lo = np.full((len(size), 3), np.inf)
+    hi = np.full((len(size), 3), -np.inf)
+    for axis in range(3):
+        np.minimum.at(lo[:, axis], labels, co[:, axis])
+        np.maximum.at(hi[:, axis], labels, co[:, axis])
+    a, b, c = co[tris[:, 0]], co[tris[:, 1]], co[tris[:, 2]]
+    signed = (a * np.cross(b, c)).sum(axis=1) / 6
+    volume = np.abs(np.bincount(labels[tris[:, 0]], signed, len(size)))
+    return Components(labels, size, lo, hi, volume)
@@ -0,0 +1,174 @@
+import bpy
+import csv
+import os
+import time
+
+from .twist import find_twist_stacks, setup_twist_stack
+
+
+# ------------------- playback timing --------------#
+def time_playback(scene, frames, repeats=3):
+    """
+    Evaluates the depsgraph for every frame in `frames` and returns the best
+    average time per frame in milliseconds over `repeats` passes.
+    """
+    frame_current = scene.frame_current
+    best = float("inf")
+    scene.frame_set(frames[0])  # warm up caches before timing
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for frame in frames:
+            scene.frame_set(frame)
+        best = min(best, (time.perf_counter() - start) / len(frames))
+    scene.frame_set(frame_current)
+    return best * 1000
+
+
+# ------------------- twist benchmark --------------#
+class TwistBenchmark(bpy.types.Operator):
+    bl_idname = "fg.twist_benchmark"
+    bl_label = "twist benchmark"
+    bl_description = "Play the scene frame range with both twist setups (constraints and drivers)\nand report the evaluation time per frame of each.\n"
+    bl_options = {"REGISTER", "UNDO"}
+
+    repeats: bpy.props.IntProperty(name="Repeats", default=3, min=1, max=20, description="Timing passes per setup, the best one is kept")
+
+    def execute(self, context):
+        obj = context.object
+        scene = context.scene
+        if not obj or obj.type != "ARMATURE":
+            self.report({"ERROR"}, "No armature object selected")
+            return {"CANCELLED"}
+        stacks = find_twist_stacks(obj)
+        if not stacks:
+            self.report({"ERROR"}, "No twist bones on this armature, generate them first")
+            return {"CANCELLED"}
+        if not obj.animation_data or not obj.animation_data.action:
+            self.report({"WARNING"}, "Armature has no action, timings only show the static cost")
+
+        bpy.ops.object.mode_set(mode="POSE")
+        frames = list(range(scene.frame_start, scene.frame_end + 1))
+        results = {}
+        for mode in ("CONSTRAINTS", "DRIVER"):
+            for (kind, source), names in stacks.items():
+                setup_twist_stack(obj, names, source, kind, mode)
+            context.view_layer.update()
+            results[mode] = time_playback(scene, frames, self.repeats)
+
+        # Leave the rig in the setup chosen in the panel
+        for (kind, source), names in stacks.items():
+            setup_twist_stack(obj, names, source, kind, scene.twist_mode)
+
+        bones = sum(len(names) for names in stacks.values())
+        report = ", ".join(f"{mode.lower()}: {ms:.3f} ms/frame ({1000 / max(ms, 1e-6):.0f} fps)" for mode, ms in results.items())
+        print(f"twist benchmark ({bones} twist bones, frames {scene.frame_start}-{scene.frame_end}) -> {report}")
+        self.report({"INFO"}, report)
+        return {"FINISHED"}
+
+
+# ------------------- rig profiler --------------#
+def sample_frames(frame_start, frame_end, max_frames):
+    """Spreads at most `max_frames` frames evenly over the range."""
+    count = frame_end - frame_start + 1
+    step = max(1, -(-count // max_frames))
+    return list(range(frame_start, frame_end + 1, step))
+
+
+def constraint_groups(obj, group_by):
+    """Returns [(bone label, constraint label, [constraints])] to toggle together."""
+    groups = {}
+    for pose_bone in obj.pose.bones:
+        for con in pose_bone.constraints:
+            if con.mute:
+                continue
+            if group_by == "BONE":
+                key = (pose_bone.name, f"{len(pose_bone.constraints)} constraints")
+            elif group_by == "TYPE":
+                key = ("*", con.type)
+            else:
+                key = (pose_bone.name, con.name)
+            groups.setdefault(key, []).append(con)
+    return [(bone, con, cons) for (bone, con), cons in groups.items()]
+
+
+def write_profile_csv(filepath, fps, rows):
+    with open(filepath, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["bone", "constraint", "ms_per_frame"])
+        writer.writerow(["ALL", f"{fps:.1f} fps", ""])
+        for bone, con, ms in rows:
+            writer.writerow([bone, con, f"{ms:.4f}"])
+
+
+class ProfileRig(bpy.types.Operator):
+    bl_idname = "fg.profile_rig"
+    bl_label = "profile rig"
+    bl_description = "Play the scene frame range and measure how much each bone, constraint\nor constraint type costs per frame by muting it.\nResults go to the sidebar and to a CSV file\n"
+    bl_options = {"REGISTER"}
+
+    group_by: bpy.props.EnumProperty(
+        name="Group By",
+        items=[
+            ("BONE", "Bone", "Toggle all constraints of one bone at a time"),
+            ("TYPE", "Type", "Toggle all constraints of one type at a time"),
+            ("CONSTRAINT", "Constraint", "Toggle every constraint on its own"),
+        ],
+        default="BONE",
+    )
+    max_frames: bpy.props.IntProperty(name="Frames", default=24, min=1, max=1000, description="Frames sampled from the scene range for each timing")
+    repeats: bpy.props.IntProperty(name="Repeats", default=1, min=1, max=20, description="Timing passes per group, the best one is kept")
+    filepath: bpy.props.StringProperty(name="CSV", default="//rig_profile.csv", subtype="FILE_PATH")
+
+    def execute(self, context):
+        obj = context.object
+        scene = context.scene
+        if not obj or obj.type != "ARMATURE":
+            self.report({"ERROR"}, "No armature object selected")
+            return {"CANCELLED"}
+
+        frames = sample_frames(scene.frame_start, scene.frame_end, self.max_frames)
+        base_ms = time_playback(scene, frames, self.repeats)
+
+        rows = []
+        for bone, con_name, cons in constraint_groups(obj, self.group_by):
+            for con in cons:
+                con.mute = True
+            muted_ms = time_playback(scene, frames, self.repeats)
+            for con in cons:
+                con.mute = False
+            rows.append((bone, con_name, max(0.0, base_ms - muted_ms)))
+        rows.sort(key=lambda row: row[2], reverse=True)
+
+        fps = 1000 / max(base_ms, 1e-6)
+        scene.fg_profile.clear()
+        scene.fg_profile_fps = fps
+        for bone, con_name, ms in rows:
+            entry = scene.fg_profile.add()
+            entry.bone, entry.constraint, entry.ms = bone, con_name, ms
+
+        filepath = bpy.path.abspath(self.filepath) if bpy.data.filepath else os.path.join(bpy.app.tempdir, os.path.basename(self.filepath))
+        write_profile_csv(filepath, fps, rows)
+
+        print(f"rig profile: {base_ms:.3f} ms/frame, {fps:.1f} fps over {len(frames)} frames, {len(rows)} groups -> {filepath}")
+        self.report({"INFO"}, f"{fps:.1f} fps, costliest: {rows[0][0]} {rows[0][1]} {rows[0][2]:.3f} ms" if rows else f"{fps:.1f} fps, no constraints")
+        return {"FINISHED"}
+
+
+# ------------------ register -------------------#
+classes = [TwistBenchmark, ProfileRig]
+
+
+def register():
+
+    for cls in classes:
+        bpy.utils.register_class(cls)
+
+
+def unregister():
+
+    for cls in reversed(classes):
+        bpy.utils.unregister_class(cls)
+
+
+if __name__ == "__main__":
+    register()
@@ -0,0 +1,233 @@
+import bpy
+import bmesh
+
+from .lazy import lazy_import
+from .mesh_index import VertexGrid
+from .skin_io import top_k, topk_to_csr
+from .slicing import read_triangles
+from .weights import read_coords, read_weights_csr, write_weights_csr
+
+np = lazy_import("numpy")
+
+
+# ------------------- proxy weighting --------------#
+# Bone heat is solved on a decimated copy of the human, then every full resolution vertex takes the
+# barycentric blend of the weights of its closest proxy triangle. Skin weights are smooth, so the
+# proxy loses little, and the cost of the solve depends on the proxy size instead of the scan size.
+CHUNK = 1 << 16  # full resolution vertices transferred at once, bounds the temporary arrays
+INFLUENCES = 8  # strongest bones kept per vertex, weights quantized to 8 bits like .fgsw TOP8
+MIN_WEIGHT = 1e-3
+
+
+def make_proxy(human, keep=None, vertices=0):
+    """
+    Copy of the human that bone heat runs on instead of it: only the `keep` vertices (loose parts left
+    out), no modifiers or old weights, decimated to about `vertices` vertices when given.
+    """
+    mesh = human.data.copy()
+    bm = bmesh.new()
+    bm.from_mesh(mesh)
+    deform = bm.verts.layers.deform.active
+    if deform:
+        bm.verts.layers.deform.remove(deform)
+    if keep is not None:
+        drop = np.ones(len(bm.verts), dtype=bool)
+        drop[keep] = False
+        bm.verts.ensure_lookup_table()
+        bmesh.ops.delete(bm, geom=[bm.verts[i] for i in np.flatnonzero(drop).tolist()], context="VERTS")
+    bm.to_mesh(mesh)  # deleting keeps the order of the remaining vertices, vertex i is keep[i]
+    bm.free()
+
+    proxy = bpy.data.objects.new(human.name + "_proxy", mesh)
+    proxy.matrix_world = human.matrix_world
+    bpy.context.scene.collection.objects.link(proxy)
+    if vertices and len(mesh.vertices) > vertices:
+        modifier = proxy.modifiers.new("proxy", "DECIMATE")
+        modifier.ratio = vertices / len(mesh.vertices)
+        modifier.use_collapse_triangulate = True
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+        proxy.data = bpy.data.meshes.new_from_object(proxy.evaluated_get(depsgraph))
+        proxy.modifiers.remove(modifier)
+        bpy.data.meshes.remove(mesh)
+    return proxy
+
+
+def remove_proxy(proxy):
+    mesh = proxy.data
+    bpy.data.objects.remove(proxy, do_unlink=True)
+    bpy.data.meshes.remove(mesh)
+
+
+def expand_rows(indptr, keep, count):
+    """CSR row pointers of `keep` vertices -> row pointers over all `count` vertices (others empty)."""
+    sizes = np.zeros(count, dtype=np.int64)
+    sizes[keep] = np.diff(indptr)
+    return np.concatenate([[0], np.cumsum(sizes)])
+
+
+def closest_barycentric(p, a, b, c):
+    """Barycentric coordinates (m, 3) of the point of every triangle (a, b, c) closest to p, all (m, 3)."""
+
+    def dot(u, v):
+        return np.einsum("ij,ij->i", u, v)
+
+    def ratio(num, den):
+        return np.divide(num, den, out=np.zeros_like(num), where=den != 0)
+
+    ab, ac = b - a, c - a
+    d1, d2 = dot(ab, p - a), dot(ac, p - a)
+    d3, d4 = dot(ab, p - b), dot(ac, p - b)
+    d5, d6 = dot(ab, p - c), dot(ac, p - c)
+    va, vb, vc = d3 * d6 - d5 * d4, d5 * d2 - d1 * d6, d1 * d4 - d3 * d2
+    total = va + vb + vc
+    v, w = ratio(vb, total), ratio(vc, total)
+    bary = np.stack([1 - v - w, v, w], axis=1)
+
+    # Voronoi regions of the edges and corners, assigned in reverse so the first matching test wins
+    t = ratio(d4 - d3, (d4 - d3) + (d5 - d6))
+    region = (va <= 0) & (d4 - d3 >= 0) & (d5 - d6 >= 0)
+    bary[region] = np.stack([np.zeros_like(t), 1 - t, t], axis=1)[region]
+    t = ratio(d2, d2 - d6)
+    region = (vb <= 0) & (d2 >= 0) & (d6 <= 0)
+    bary[region] = np.stack([1 - t, np.zeros_like(t), t], axis=1)[region]
+    bary[(d6 >= 0) & (d5 <= d6)] = (0, 0, 1)
+    t = ratio(d1, d1 - d3)
+    region = (vc <= 0) & (d1 >= 0) & (d3 <= 0)
+    bary[region] = np.stack([1 - t, t, np.zeros_like(t)], axis=1)[region]
+    bary[(d3 >= 0) & (d4 <= d3)] = (0, 1, 0)
+    bary[(d1 <= 0) & (d2 <= 0)] = (1, 0, 0)
+    return np.clip(bary, 0, 1)
+
+
+def transfer_weights(proxy_co, proxy_tris, proxy_weights, points, chunk=CHUNK):
+    """
+    Interpolates dense proxy weights (p, groups) onto `points` (n, 3) from the closest triangle around
+    the nearest proxy vertex. Returns CSR arrays (indptr, groups, weights) of the points.
+    """
+    proxy_co = np.asarray(proxy_co, dtype=np.float64)
+    proxy_tris = np.asarray(proxy_tris, dtype=np.int64)
+    corners = proxy_tris.ravel()
+    fan = np.argsort(corners, kind="stable") // 3  # triangles around every proxy vertex
+    fan_ptr = np.concatenate([[0], np.cumsum(np.bincount(corners, minlength=len(proxy_co)))])
+    edge = np.linalg.norm(proxy_co[proxy_tris[:, 1]] - proxy_co[proxy_tris[:, 0]], axis=1).mean()
+    grid = VertexGrid(proxy_co, max(float(edge), 1e-9))
+    tree = None
+
+    pieces = []
+    for begin in range(0, len(points), chunk):
+        p = np.asarray(points[begin : begin + chunk], dtype=np.float64)
+        nearest = grid.nearest(p)
+        far = np.flatnonzero(nearest < 0)
+        if len(far):
+            # Points further than a proxy edge from every proxy vertex: nearest one from a KD-tree
+            if tree is None:
+                from mathutils.kdtree import KDTree
+
+                tree = KDTree(len(proxy_co))
+                for i, v in enumerate(proxy_co.tolist()):
+                    tree.insert(v, i)
+                tree.balance()
+            nearest[far] = [tree.find(v)[1] for v in p[far].tolist()]
+
+        start, count = fan_ptr[nearest], fan_ptr[nearest + 1] - fan_ptr[nearest]
+        pt = np.repeat(np.arange(len(p)), count)
+        tri = fan[np.repeat(start - np.cumsum(count) + count, count) + np.arange(count.sum())]
+        a, b, c = (proxy_co[proxy_tris[tri, k]] for k in range(3))
+        bary = closest_barycentric(p[pt], a, b, c)
+        closest = bary[:, :1] * a + bary[:, 1:2] * b + bary[:, 2:] * c
+        diff = closest - p[pt]
+        d = np.einsum("ij,ij->i", diff, diff)
+        order = np.lexsort((d, pt))
+        first = order[np.concatenate([[True], pt[order][1:] != pt[order][:-1]])]
+
+        dense = proxy_weights[nearest]  # kept by points whose nearest vertex has no triangles
+        dense[pt[first]] = sum(bary[first, k, None] * proxy_weights[proxy_tris[tri[first], k]] for k in range(3))
+        rows, groups = np.nonzero(dense > MIN_WEIGHT)
+        pieces.append((rows + begin, groups, dense[rows, groups]))
+
+    rows, groups, weights = (np.concatenate(parts) for parts in zip(*pieces)) if pieces else (np.zeros(0, np.int64),) * 3
+    indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=len(points)))])
+    return indptr, groups.astype(np.uint16), weights.astype(np.float32)
+
+
+def smooth_weights(co, normals, edges, indptr, groups, weights, iterations=1, strength=0.5):
+    """
+    Edge-aware Laplacian smoothing of CSR weights over the mesh edges, in place: neighbours count by
+    inverse edge length times normal agreement, so weights do not bleed across creases such as
+    armpits or between fingers. Each group only updates the vertices it already covers.
+    """
+    rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    both = np.concatenate([edges, edges[:, ::-1]])
+    both = both[np.argsort(both[:, 0], kind="stable")]
+    nbr_ptr = np.concatenate([[0], np.cumsum(np.bincount(both[:, 0], minlength=len(co)))])
+    length = np.linalg.norm(co[both[:, 0]] - co[both[:, 1]], axis=1)
+    agree = np.clip((normals[both[:, 0]] * normals[both[:, 1]]).sum(axis=1), 0, 1)
+    edge_w = (agree**2 / np.maximum(length, 1e-12)).astype(np.float32)
+    total_w = np.bincount(both[:, 0], edge_w, len(co))
+
+    by_group = np.argsort(groups, kind="stable")
+    bounds = np.searchsorted(groups[by_group], np.arange(int(groups.max(initial=0)) + 2))
+    buf = np.zeros(len(co), dtype=np.float32)
+    for g in range(len(bounds) - 1):
+        sel = by_group[bounds[g] : bounds[g + 1]]
+        if not len(sel):
+            continue
+        support = rows[sel]
+        start, count = nbr_ptr[support], nbr_ptr[support + 1] - nbr_ptr[support]
+        pt = np.repeat(np.arange(len(support)), count)
+        pair = np.repeat(start - np.cumsum(count) + count, count) + np.arange(count.sum())
+        nb, w = both[pair, 1], edge_w[pair]
+        movable = total_w[support] > 0
+        buf[support] = weights[sel]
+        for _ in range(iterations):
+            average = np.bincount(pt, w * buf[nb], len(support)) / np.where(movable, total_w[support], 1)
+            buf[support] = np.where(movable, (1 - strength) * buf[support] + strength * average, buf[support])
+        weights[sel] = buf[support]
+        buf[support] = 0
+
+    total = np.bincount(rows, weights, len(indptr) - 1)
+    weights /= np.where(total > 0, total, 1)[rows]
+    return weights
+
+
+def proxy_weights_csr(proxy):
+    names = [group.name for group in proxy.vertex_groups]
+    return names, read_weights_csr(proxy.data)
+
+
+def copy_proxy_weights(human, proxy, keep):
+    """Writes the weights of an undecimated proxy back onto the `keep` vertices of the human, one to one."""
+    names, (indptr, groups, weights) = proxy_weights_csr(proxy)
+    if names:
+        write_weights_csr(human, names, expand_rows(indptr, keep, len(human.data.vertices)), groups, weights)
+        human.data.update()
+    return names
+
+
+def transfer_proxy_weights(human, proxy, iterations=1, keep=None):
+    """
+    Writes the decimated proxy's vertex group weights onto the human (same object space), or onto its
+    `keep` vertices only: barycentric transfer, optional edge-aware smoothing, 8 strongest influences
+    per vertex. Returns the group names written.
+    """
+    names, (indptr, groups, values) = proxy_weights_csr(proxy)
+    if not names:
+        return []
+    proxy_weights = np.zeros((len(indptr) - 1, len(names)), dtype=np.float32)
+    proxy_weights[np.repeat(np.arange(len(indptr) - 1), np.diff(indptr)), groups] = values
+
+    mesh = human.data
+    co = read_coords(mesh)
+    points = co if keep is None else co[keep]
+    indptr, groups, weights = transfer_weights(read_coords(proxy.data), read_triangles(proxy.data), proxy_weights, points)
+    if keep is not None:
+        indptr = expand_rows(indptr, keep, len(co))
+    if iterations:
+        edges = np.empty(len(mesh.edges) * 2, dtype=np.int64)
+        mesh.edges.foreach_get("vertices", edges)
+        normals = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+        mesh.vertices.foreach_get("normal", normals)
+        smooth_weights(co, normals.reshape(-1, 3), edges.reshape(-1, 2), indptr, groups, weights, iterations)
+    write_weights_csr(human, names, *topk_to_csr(*top_k(indptr, groups, weights, INFLUENCES)))
+    mesh.update()
+    return names
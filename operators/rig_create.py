@@ -1,6 +1,23 @@
 import bpy, bmesh
 import mathutils
 import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import zlib
+
+from .lazy import lazy_import
+from .mesh_index import MeshIndex, chunk_checksums, mesh_components, moved_vertices, read_world_coords, run_graph
+from .slicing import read_triangles, slice_mesh, splice_sections
+from .depthmap import rasterize
+from .fingers import FINGERS, segment_fingers
+from .skeleton_prior import ARMPIT, fit_spine_heights, measure_features
+from .weights import read_coords, rigid_part_weights
+from .proxy_weights import copy_proxy_weights, make_proxy, remove_proxy, transfer_proxy_weights
+from .scan_io import pending_scan, scan_human
+from .validate import TriangleGrid, store_report, validate_rig
+
+np = lazy_import("numpy")
 
 #########################################
 ## Helper Functions for Rig Generation ##
@@ -58,11 +75,14 @@ def split_before_last_dot(filename):
 
 
 def create_and_configure_bone(edit_bones, name, deform=True, palette="THEME04", envelope_multiplier=4):
-    """Creates a new bone or gets an existing one, sets basic properties."""
+    """
+    Creates a new bone or gets an existing one, sets basic properties. `deform` only applies to new
+    bones, existing ones keep theirs (twist setups turn it off on the bone they split).
+    """
     bone = edit_bones.get(name)
     if not bone:
         bone = edit_bones.new(name)
-    bone.use_deform = deform
+        bone.use_deform = deform
     bone.color.palette = palette
     # Envelope distance can be set later based on length
     bone.envelope_distance = bone.length / envelope_multiplier if bone.length else 0.1
@@ -127,101 +147,551 @@ def tolerancexy_co(source, target, axis1, axis2, tol, tol2):
     return [v for v in source if abs(v.co[axis1] - target[axis1]) < tol and abs(v.co[axis2] - target[axis2]) < tol2]
 
 
-# ------------------- generate rig level 1 ------------------#
-class GenerateRig(bpy.types.Operator):
-    bl_idname = "fg.generate_rig"
-    bl_label = "Orient rig bones position"
-    bl_description = "Generate rigify bones from only 1 bone or metarig.\n\n*This operator will apply the scale and rotation of the armature and the object \nbefore generating the rig bones position.\n"
-    bl_options = {"REGISTER", "UNDO"}
+# ------------------- rig fitting pipeline ------------------#
+# Mesh index and landmarks of the last fitted humans, keyed by object name.
+# Reused by region regeneration as long as the mesh coordinates did not change; after an edit
+# that kept the topology, only the searches around the moved vertices run again.
+_fit_cache = {}
 
-    def execute(self, context):
-        print("\n\n\n*******************************     generating rig        *****************************")
-        # --- Initial Checks ---
-        if not context.active_object:
-            bpy.context.view_layer.objects.active = context.scene.my_object
-        initial_mode = context.object.mode
-        bpy.ops.object.mode_set(mode="OBJECT")
+
+class RigFit:
+    """
+    The rig generation split into resumable stages.
+
+    `run` does everything at once (execute, scripts), `step` advances one stage
+    so a modal operator can spread the work over timer ticks. Stages only keep
+    bone names between calls, edit bones are fetched again in every stage.
+
+    Inside the stages every body region has its own fitter, `regions` picks
+    which of them run (all by default), the other bones are left untouched.
+
+    Without a human object, `scan` (name, world-space co, tris) is fitted straight from its arrays:
+    depth-map probes, and numpy ray casts through triangle grids instead of Object.ray_cast.
+    """
+
+    STAGES = [
+        ("mesh", "Reading mesh"),
+        ("index", "Building index"),
+        ("landmarks", "Finding landmarks"),
+        ("probes", "Probing regions"),
+        ("spine", "Fitting spine"),
+        ("arms", "Fitting arms"),
+        ("legs", "Fitting legs"),
+        ("mirror", "Mirroring"),
+        ("apply", "Applying"),
+    ]
+    # Pure numpy stages, safe to run off the main thread
+    THREADED = {"index", "probes"}
+    # Bones placed by each region fitter (.L side, the .R side comes from mirroring)
+    REGIONS = {
+        "SPINE": ["root", "spine", "spine.001", "spine.002", "spine.003", "breast.L"],
+        "HEAD": ["spine.004", "spine.005", "spine.006"],
+        "ARMS": ["shoulder.L", "upper_arm.L", "forearm.L"],
+        "HANDS": ["hand.L"] + [f"{finger}.0{k}.L" for finger in FINGERS for k in (1, 2, 3)] + [f"palm.0{k}.L" for k in (1, 2, 3, 4)],
+        "LEGS": ["thigh.L", "shin.L", "pelvis.L"],
+        "FEET": ["foot.L", "toe.L"],
+    }
+    # Mesh-only results kept in `_fit_cache` between runs
+    CACHED = ("parts", "body", "index", "midx", "left", "maxz_i", "minz_i", "headmid", "maxhandx_i", "uppest_co", "crotch_co", "maxlower_co", "minlower_co", "butty_co", "probes")
+    LANDMARKS = ("uppest_co", "crotch_co", "maxlower_co", "minlower_co", "butty_co")
+
+    def __init__(self, human, armatur, initial_mode, created_armature=False, regions=None, keep_modifiers=False, source=None, scan=None):
+        self.human = human
+        self.scan = scan
+        self.name = human.name_full if human else scan[0]
+        self.armatur = armatur
+        self.initial_mode = initial_mode
+        self.created_armature = created_armature
+        self.regions = set(regions or self.REGIONS)
+        self.keep_modifiers = keep_modifiers
+        self.source = source
+        self.stage = 0
+        self.worker = None
+        self.worker_error = None
+        self.removed_modifiers = []
+        self.snapshot = self.snapshot_bones(armatur)
+        self.human_matrix = human.matrix_world.copy() if human else None
+        self.armature_matrix = armatur.matrix_world.copy()
+
+    # --- stage driving ---
+    @property
+    def done(self):
+        return self.stage >= len(self.STAGES)
+
+    @property
+    def stage_name(self):
+        return self.STAGES[min(self.stage, len(self.STAGES) - 1)]
+
+    def step(self, context):
+        name, _ = self.STAGES[self.stage]
+        if name in self.THREADED:
+            getattr(self, "stage_" + name)()
+        else:
+            getattr(self, "stage_" + name)(context)
+        self.stage += 1
+
+    def run(self, context):
+        while not self.done:
+            self.step(context)
+
+    def validate(self):
+        """Rig checks against the analysed mesh, [(check, bone, ok, detail)]."""
+        self.armatur.update_from_editmode()
+        return validate_rig(self.human, self.armatur, self.co, self.tris, self.tall, self.midx)
+
+    def start_worker(self):
+        """Runs the current numpy-only stage on a thread, the caller polls `worker` and advances `stage`."""
+        self.worker_error = None
+
+        def work():
+            try:
+                getattr(self, "stage_" + self.stage_name[0])()
+            except Exception as error:
+                self.worker_error = error
+
+        self.worker = threading.Thread(target=work, daemon=True)
+        self.worker.start()
+
+    # --- rollback ---
+    @staticmethod
+    def snapshot_bones(armatur):
+        snapshot = {}
+        for bone in armatur.data.bones:
+            snapshot[bone.name] = {
+                "head": bone.head_local.copy(),
+                "tail": bone.tail_local.copy(),
+                "roll": bpy.types.Bone.AxisRollFromMatrix(bone.matrix_local.to_3x3())[1],
+                "parent": bone.parent.name if bone.parent else None,
+                "use_connect": bone.use_connect,
+                "use_deform": bone.use_deform,
+                "envelope_distance": bone.envelope_distance,
+            }
+        return snapshot
+
+    def rollback(self, context):
+        """Puts the human and the armature back as they were before the first stage."""
+        if context.object and context.object.mode != "OBJECT":
+            bpy.ops.object.mode_set(mode="OBJECT")
         bpy.ops.object.select_all(action="DESELECT")
-        print("                     initial_mode ==*", initial_mode + " mode for *" + context.object.name)
 
-        if not hasattr(context.scene, "my_object") or context.scene.my_object is None:
-            self.report({"ERROR"}, "No object set in the scene")
-            return {"CANCELLED"}
-        if not hasattr(context.scene, "my_armature") or not context.scene.my_armature:
-            bpy.ops.object.armature_basic_human_metarig_add()
-            context.scene.my_armature = context.active_object
-        human = context.scene.my_object
-        armatur = context.scene.my_armature
+        human = self.human
+        if human and human.matrix_world != self.human_matrix:
+            human.data.transform(self.human_matrix.inverted() @ human.matrix_world)
+            human.matrix_world = self.human_matrix
+        for name, target in self.removed_modifiers:
+            human.modifiers.new(name, "ARMATURE").object = target
+
+        armatur = self.armatur
+        if self.created_armature:
+            if context.scene.my_armature == armatur:
+                context.scene.my_armature = None
+            bpy.data.objects.remove(armatur)
+            return
+        armatur.matrix_world = self.armature_matrix
+        armatur.select_set(True)
+        context.view_layer.objects.active = armatur
+        bpy.ops.object.mode_set(mode="EDIT")
+        editbones = armatur.data.edit_bones
+        for bone in list(editbones):
+            if bone.name not in self.snapshot:
+                editbones.remove(bone)
+        for name, data in self.snapshot.items():
+            bone = editbones.get(name) or editbones.new(name)
+            bone.head, bone.tail, bone.roll = data["head"], data["tail"], data["roll"]
+            bone.use_deform = data["use_deform"]
+            bone.envelope_distance = data["envelope_distance"]
+        for name, data in self.snapshot.items():
+            bone = editbones[name]
+            bone.parent = editbones[data["parent"]] if data["parent"] else None
+            bone.use_connect = data["use_connect"]
+        armatur.data.pose_position = "POSE"
+        bpy.ops.object.mode_set(mode="OBJECT")
 
+    # --- helpers ---
+    def vec(self, i):
+        return mathutils.Vector(self.co[i])
+
+    def mean(self, indices):
+        return mathutils.Vector(self.co[indices].mean(axis=0))
+
+    def ray_cast(self, origin, direction):
+        """Object.ray_cast of the human along an axis, through a triangle grid of the arrays for a scan."""
+        if self.human:
+            return self.human.ray_cast(origin, direction)
+        axis = max(range(3), key=lambda k: abs(direction[k]))
+        if axis not in self.grids:
+            self.grids[axis] = TriangleGrid(self.co, self.scan[2], axis=axis)
+        hit, location, normal, index = self.grids[axis].ray_cast(origin, direction[axis] > 0)
+        return hit, mathutils.Vector(location), mathutils.Vector(normal), index
+
+    def ensure_edit(self, context):
+        """Stages may be resumed after the user clicked around, make sure we edit the armature."""
+        if context.object != self.armatur or self.armatur.mode != "EDIT":
+            if context.object and context.object.mode != "OBJECT":
+                bpy.ops.object.mode_set(mode="OBJECT")
+            self.armatur.select_set(True)
+            context.view_layer.objects.active = self.armatur
+            bpy.ops.object.mode_set(mode="EDIT")
+        return self.armatur.data.edit_bones
+
+    # --- stages ---
+    def stage_mesh(self, context):
+        if self.human:
+            self.read_human(context)
+        else:
+            # Scan arrays are already in world space, the depth maps stand in for the ray casts
+            _, self.co, self.tris = self.scan
+            self.grids = {}
+            self.backend = "DEPTH", context.scene.fg_depth_resolution
+
+        # Same mesh as last time: reuse its index and landmarks. Same topology with moved vertices:
+        # keep what the moved vertices cannot reach (`previous`), see stage_landmarks and stage_probes
+        self.part_share = context.scene.fg_part_share
+        self.sums = chunk_checksums(self.co)
+        self.signature = (len(self.co), zlib.crc32(self.tris.tobytes()), self.backend, self.part_share)
+        cached = _fit_cache.get(self.name)
+        self.cached, self.previous = False, None
+        if cached and cached["signature"] == self.signature:
+            self.moved = moved_vertices(cached["co"], cached["sums"], self.co, self.sums)
+            self.cached = not len(self.moved)
+            if self.cached:
+                for key in self.CACHED:
+                    setattr(self, key, cached[key])
+            else:
+                self.previous = cached
+                self.moved_points = np.concatenate([cached["co"][self.moved], self.co[self.moved]])
+
+    def read_human(self, context):
+        """Applies the human's transforms, drops its armature modifiers and reads its world-space mesh."""
+        human = self.human
         # --- Prepare Human Object ---
+        bpy.ops.object.mode_set(mode="OBJECT")
+        bpy.ops.object.select_all(action="DESELECT")
         human.select_set(True)
 
         bpy.ops.object.transform_apply(location=True, rotation=True, scale=True)
-          
-        for mod in human.modifiers:
-        # If the modifier is an armature, remove it
-            if mod.type == 'ARMATURE':
+
+        for mod in list(human.modifiers):
+            # If the modifier is an armature, remove it
+            if mod.type == "ARMATURE" and not self.keep_modifiers:
+                self.removed_modifiers.append((mod.name, mod.object))
                 human.modifiers.remove(mod)
                 print(f"Removed armature modifier from object: {human.name}")
 
-    # # Check if the object has a parent and clear it
-    #     if human.parent:
-    #         human.parent = None
-            
-
-        # --- Calculate Human Dimensions and Key Points ---
-        tall = human.dimensions[2]
-        tallunit = human.dimensions[2] / 57
-        width = human.dimensions[0] / 2
+        # Same geometry the ray casts see when the evaluated mesh is used
+        self.source = self.source or context.scene.fg_mesh_source
+        depsgraph = context.evaluated_depsgraph_get()
+        self.co = read_world_coords(human, self.source, depsgraph)
+        self.tris = read_triangles(human.evaluated_get(depsgraph).data if self.source == "EVALUATED" else human.data)
+        self.backend = context.scene.fg_landmark_backend, context.scene.fg_depth_resolution
+
+    def stage_index(self):
+        previous = self.previous
+        if previous:
+            # Same topology: same parts, only the bounds of the parts that moved change
+            self.parts = previous["parts"].moved(self.co, self.moved)
+            self.body = previous["body"]
+        elif not self.cached:
+            # Eyes, teeth, hair cards, props: parts much smaller than the body stay out of every search
+            self.parts = mesh_components(self.co, self.tris)
+            self.body = self.parts.body(self.part_share)
+        # --- Calculate Human Dimensions --- of the body parts only
+        keep = self.parts.size >= self.parts.size[0] * self.part_share
+        lo, hi = self.parts.lo[keep].min(axis=0), self.parts.hi[keep].max(axis=0)
+        self.tall = float(hi[2] - lo[2])
+        self.tallunit = self.tall / 57
+        self.width = float(hi[0] - lo[0]) / 2
+        self.tris = self.tris[self.body[self.tris[:, 0]]]
+        if self.cached:
+            return
+        co = self.co
+        tallunit = self.tallunit
+        if previous:
+            self.index = index = previous["index"].moved(co, self.moved[self.body[self.moved]])
+        else:
+            self.index = index = MeshIndex(co, np.flatnonzero(self.body))
+        self.midx = float(lo[0] + hi[0]) / 2
+        self.left = (co[:, 0] >= self.midx) & self.body
 
-        x_axis = mathutils.Vector((1, 0, 0))
-        y_axis = mathutils.Vector((0, 1, 0))
-        z_axis = mathutils.Vector((0, 0, 1))
+        mid_vers = index.band(0, self.midx, tallunit * 2)
+        self.maxz_i = index.argmax(mid_vers, 2)
+        self.minz_i = index.order[2][0]
+        # Head/Crotch calculations
+        hair = index.above(2, co[self.maxz_i, 2] - tallunit * 2)
+        self.headmid = co[hair].mean(axis=0) if len(hair) else co[self.maxz_i]
+        # Find hand tail = middle finger tip
+        self.maxhandx_i = index.argmax(np.flatnonzero(self.left), 0)
+
+    def stage_landmarks(self, context):
+        if self.cached:
+            return
+        previous = self.previous
+        if previous and not np.array_equal(self.anchors(vars(self)), self.anchors(previous)):
+            self.previous = previous = None  # the body extents or a search start moved, every band with them
+        if previous:
+            for key in self.LANDMARKS:
+                setattr(self, key, previous[key])
+        if not previous or self.touches(self.bands()["landmarks"]):
+            self.fit_landmarks()
+        if previous and not np.array_equal(self.anchors(vars(self), True), self.anchors(previous, True)):
+            self.previous = None
+
+    def stage_probes(self):
+        """Mesh-only searches of every region, independent of each other: run them side by side."""
+        if self.cached:
+            return
+        probes = {
+            "hand_tail": (self.probe_hand_tail, ()),
+            "ankle": (self.probe_ankle, ()),
+            "toe": (self.probe_toe, ()),
+            "knee": (self.probe_knee, ()),
+            "sections": (self.probe_sections, ()),
+            "skeleton": (self.probe_skeleton, ("sections",)),
+        }
+        if self.backend[0] == "DEPTH":
+            probes["front"] = (self.probe_front, ())
+        if not self.a_pose:
+            probes["armpit"] = (self.probe_armpit_t_pose, ("skeleton",))
+        previous = self.previous
+        if previous:
+            # Probes none of the moved vertices can reach, nor any probe they depend on, are kept
+            bands = self.bands()
+            stale = set()
+            for name, (fn, deps) in probes.items():
+                if name == "sections":
+                    changed = len(self.stale_planes())
+                else:
+                    changed = name not in previous["probes"] or self.touches(bands[name]) or any(dep in stale for dep in deps)
+                if changed:
+                    stale.add(name)
+                else:
+                    probes[name] = (lambda value=previous["probes"][name]: value, ())
+            print("probes refitted:", ", ".join(sorted(stale)) or "none", f"({len(self.moved)} vertices moved)")
+        self.probes = run_graph(probes)
+        _fit_cache[self.name] = {key: getattr(self, key) for key in self.CACHED} | {
+            "signature": self.signature,
+            "co": self.co,
+            "sums": self.sums,
+            "tallunit": self.tallunit,
+        }
+
+    # --- partial refits ---
+    def anchors(self, state, landmarks=False):
+        """Landmark positions the bands and probes start from, as one flat array of a fit's attributes."""
+        co = state["co"]
+        values = [co[state[key]] for key in ("maxz_i", "minz_i", "maxhandx_i")] + [state["headmid"], (state["midx"], state["tallunit"])]
+        if landmarks:
+            values += [state[key] for key in self.LANDMARKS]
+        return np.concatenate([np.asarray(value, dtype=np.float64).ravel() for value in values])
+
+    def bands(self):
+        """
+        Boxes ({axis: (lo, hi)}) around the vertices each landmark search and probe reads, None for
+        the whole mesh. Kept loose: a cached result is only reused when no moved vertex is inside.
+        """
+        tallunit, midx, inf = self.tallunit, self.midx, np.inf
+        minz = float(self.co[self.minz_i, 2])
+        crotch = self.crotch_co.z
+        leg = crotch - minz
+        return {
+            "landmarks": [{0: (midx - tallunit, midx + tallunit), 2: (minz + tallunit * 14, crotch + tallunit)}, {2: (crotch - tallunit, crotch + tallunit * 3)}],
+            "hand_tail": [{0: (float(self.co[self.maxhandx_i, 0]) - tallunit * 3, inf), 2: (minz + tallunit * 20, inf)}],
+            "ankle": [{0: (midx, inf), 2: (minz + tallunit * 2.8, minz + tallunit * 4.2)}],
+            "toe": [{0: (midx, inf), 2: (minz, minz + tallunit * 2)}],
+            "knee": [{0: (midx, inf), 2: (minz + leg * 0.55 - tallunit * 0.25, minz + max(leg * 0.6 + tallunit, leg * 0.55 + tallunit * 2.75))}],
+            "skeleton": [],
+            "armpit": [{0: (midx, midx + tallunit * 8)}],
+            "front": None,
+        }
+
+    def touches(self, boxes):
+        """Whether a moved vertex, before or after the move, lies in one of the boxes."""
+        if boxes is None:
+            return True
+        points = self.moved_points
+        for box in boxes:
+            inside = np.ones(len(points), dtype=bool)
+            for axis, (lo, hi) in box.items():
+                inside &= (points[:, axis] >= lo) & (points[:, axis] <= hi)
+            if inside.any():
+                return True
+        return False
+
+    def section_heights(self):
+        bottom, top = self.co[self.minz_i, 2], self.co[self.maxz_i, 2]
+        return np.arange(bottom + self.tallunit * 0.125, top, self.tallunit * 0.25)
+
+    def stale_planes(self):
+        """Section planes crossed by a triangle with a moved vertex, before or after the move."""
+        heights = self.section_heights()
+        moved = np.zeros(len(self.co), dtype=bool)
+        moved[self.moved] = True
+        tris = self.tris[moved[self.tris].any(axis=1)]
+        z = np.concatenate([self.previous["co"][tris, 2], self.co[tris, 2]], axis=1)
+        first = np.searchsorted(heights, z.min(axis=1), side="left")
+        last = np.searchsorted(heights, z.max(axis=1), side="right")
+        cover = np.bincount(first, minlength=len(heights) + 1) - np.bincount(last, minlength=len(heights) + 1)
+        return np.flatnonzero(np.cumsum(cover)[:-1] > 0)
+
+    def stage_spine(self, context):
+        self.prepare_armature(context)
+        print("midx  :", self.midx, "  tallunit:", self.tallunit, "  crotch:", self.crotch_co, "\nuppest: ", self.uppest_co, "    minz: ", self.vec(self.minz_i))
+        print("\nbutt            : ", self.butty_co, "\nhip frnt maxx/-x:", self.maxlower_co, self.minlower_co)
+
+        editbones = self.armatur.data.edit_bones
+        if "SPINE" in self.regions:
+            self.fit_root(editbones)
+            self.fit_spine(editbones)
+        if "HEAD" in self.regions:
+            self.fit_head(editbones)
+        if "SPINE" in self.regions:
+            self.fit_torso_details(editbones)
+
+    def stage_arms(self, context):
+        editbones = self.ensure_edit(context)
+        if "ARMS" in self.regions or "HANDS" in self.regions:
+            print("\n........................----------------------arms---------------------------------........................")
+            self.create_limb_bones(editbones, self.ARM_NAMES, "THEME05", "Arm")
+        if "HANDS" in self.regions:
+            self.fit_hand_tail(editbones)
+        if "ARMS" in self.regions:
+            self.fit_armpit(editbones)
+        if "HANDS" in self.regions:
+            self.fit_hand_head(editbones)
+            self.fit_fingers(editbones)
+        if "ARMS" in self.regions:
+            self.fit_elbow(editbones)
+        # Recalculate arm rolls
+        for region, names in (("ARMS", self.ARM_NAMES[:3]), ("HANDS", self.ARM_NAMES[3:])):
+            if region in self.regions:
+                for arm_name in names:
+                    calculate_and_apply_roll(self.armatur, arm_name, "GLOBAL_NEG_Y")
+
+    def stage_legs(self, context):
+        editbones = self.ensure_edit(context)
+        if "LEGS" in self.regions or "FEET" in self.regions:
+            print("\n........................----------------------legs---------------------------------..........................")
+            self.create_limb_bones(editbones, self.LEG_NAMES, "THEME11", "Leg")
+        if "LEGS" in self.regions:
+            self.fit_thigh(editbones)
+            self.fit_ankle(editbones)
+        if "FEET" in self.regions:
+            self.fit_foot(editbones)
+        if "LEGS" in self.regions:
+            self.fit_knee(editbones)
+
+    def stage_mirror(self, context):
+        armatur = self.armatur
+        # --- Symmetrize ---
+        if armatur.data.use_mirror_x:
+            self.ensure_edit(context)
+            bpy.ops.object.mode_set(mode="OBJECT")
+            armatur.location.x -= self.midx  # Move armature to origin for symmetry
+            bpy.ops.object.transform_apply(location=True, rotation=True, scale=True)
+            print("\n::: ::: symmetrizing ::: :::")
+            bpy.ops.object.mode_set(mode="EDIT")
+            if self.regions == set(self.REGIONS):
+                bpy.ops.armature.select_all(action="SELECT")
+            else:
+                # Only mirror the refitted region, other .R bones stay as they are
+                bpy.ops.armature.select_all(action="DESELECT")
+                editbones = armatur.data.edit_bones
+                for name in self.region_bone_names():
+                    if name in editbones:
+                        editbones[name].select = editbones[name].select_head = editbones[name].select_tail = True
+            bpy.ops.armature.symmetrize(direction="POSITIVE_X")
+            bpy.ops.object.mode_set(mode="OBJECT")
+            armatur.location.x += self.midx  # Move armature back
+            bpy.ops.object.transform_apply(location=True, rotation=True, scale=True)
 
-        masterco = [human.matrix_world @ v.co for v in human.data.vertices]
-        midx = (max(masterco, key=lambda v: v.x).x + min(masterco, key=lambda v: v.x).x) / 2
+    def stage_apply(self, context):
+        self.armatur.data.pose_position = "POSE"
+        bpy.ops.object.mode_set(mode=self.initial_mode)
 
+    # --- shared setup ---
+    def prepare_armature(self, context):
+        armatur = self.armatur
         # Apply armature transforms, then switch to edit mode \\\\\\\\\\\\\\\\
-
+        bpy.ops.object.select_all(action="DESELECT")
         armatur.select_set(True)
-        bpy.context.view_layer.objects.active = armatur
+        context.view_layer.objects.active = armatur
         bpy.ops.object.transform_apply(location=True, rotation=True, scale=True)
-        arm = armatur.data
         # Create missing collections
         assign_custom_rigify_collections(armatur)
         armatur.show_in_front = True
 
         bpy.ops.object.mode_set(mode="EDIT")
         armatur.data.pose_position = "REST"  # Ensure armature is in rest pose
-        editbones = armatur.data.edit_bones
-        bonenames = [bn.name for bn in editbones]  # Refresh bonenames after potentially creating new ones
+        self.bonenames = [bn.name for bn in armatur.data.edit_bones]
 
-        # Derived from human mesh (can be kept outside if no other changes)
-        mid_vers = [v for v in masterco if abs(v.x - midx) < tallunit * 2]
-        leftside_verts = [v for v in human.data.vertices if v.co.x >= midx]
-        # Using local coords here, might need adjustment if masterco is always used.
-
-        maxz_vert_co = max(mid_vers, key=lambda v: v.z)  # maxz is a coord, not a vertex object
-        minz_vert_co = min(masterco, key=lambda v: v.z)
+    def fit_landmarks(self):
+        """Body landmarks every region relies on (mesh only, cached with the index)."""
+        tallunit, midx, index = self.tallunit, self.midx, self.index
+        z_axis = mathutils.Vector((0, 0, 1))
+        maxz_vert_co = self.vec(self.maxz_i)
+        minz_vert_co = self.vec(self.minz_i)
 
-        # Head/Crotch calculations
-        hair_cos = [v.co for v in human.data.vertices if v.co.z >= maxz_vert_co.z - tallunit * 2]
-        headmid_co = sum(hair_cos, mathutils.Vector()) / len(hair_cos) if hair_cos else maxz_vert_co
-        uppest_co = maxz_vert_co * 0.5 + headmid_co * 0.5 + mathutils.Vector((0, 0, tallunit * 0.5))
+        self.uppest_co = uppest_co = maxz_vert_co * 0.5 + mathutils.Vector(self.headmid) * 0.5 + mathutils.Vector((0, 0, tallunit * 0.5))
 
-        hit, crotch_co, nor, idx = human.ray_cast(mathutils.Vector((midx, uppest_co.y, tallunit * 15 + minz_vert_co.z)), z_axis)
-        center_z = crotch_co.z + tallunit * 1.5
+        hit, crotch_co, nor, idx = self.ray_cast(mathutils.Vector((midx, uppest_co.y, tallunit * 15 + minz_vert_co.z)), z_axis)
+        self.crotch_co = crotch_co
         # Crotch position for thigh bone
-        butt_verts = [v for v in human.data.vertices if abs(v.co.z - crotch_co.z - tallunit) < tallunit * 2 and abs(v.co.x - midx) < tallunit * 10]
-        maxlower_co = max(butt_verts, key=lambda v: v.co.x).co
-        minlower_co = min(butt_verts, key=lambda v: v.co.x).co
-        crotch2_co = maxlower_co * 0.5 + minlower_co * 0.5
-        butt_verts = [v for v in butt_verts if v.co.x > midx]
-        butty_co = max(butt_verts, key=lambda v: v.co.y).co
-
-        print("midx  :", midx, "  tallunit:", tallunit, "  crotch:", crotch_co, "\nuppest: ", uppest_co, "    minz: ", minz_vert_co)
-        print("\nbutt            : ", butty_co, "\nhip frnt maxx/-x:", maxlower_co, minlower_co)
-
+        butt = index.band(2, crotch_co.z + tallunit, tallunit * 2)
+        butt = butt[np.abs(self.co[butt, 0] - midx) < tallunit * 10]
+        self.maxlower_co = self.vec(index.argmax(butt, 0))
+        self.minlower_co = self.vec(index.argmin(butt, 0))
+        butt = butt[self.co[butt, 0] > midx]
+        self.butty_co = self.vec(index.argmax(butt, 1))
+
+    def region_bone_names(self):
+        names = [name for region in self.regions for name in self.REGIONS[region]]
+        if "FEET" in self.regions:
+            names += [name for name in self.bonenames if name.startswith("heel.") and name.endswith(".L")]
+        return names
+
+    def spine_bones(self, editbones):
+        return [editbones[name] for name, _, _ in self.SPINE_DATA]
+
+    def create_limb_bones(self, editbones, names, palette, limb):
+        """Creates (or reuses) a .L chain and its .R twin, parented and put in their collections."""
+        armatur = self.armatur
+        bones = []
+        for j, name in enumerate(names):
+            bone = create_and_configure_bone(editbones, name, palette=palette)
+            bones.append(bone)
+            bonemrrr = create_and_configure_bone(editbones, name.replace(".L", ".R"), palette=palette)
+            if j > 0:
+                set_bone_parent_and_connect(bone, bones[j - 1], connect=True)
+            if limb == "Arm" and j == 0:
+                set_bone_parent_and_connect(bone, editbones["spine.003"], connect=False)
+                armatur.data.collections["Torso"].assign(bone)
+                armatur.data.collections["Torso"].assign(bonemrrr)
+            else:
+                armatur.data.collections[f"{limb}.L (IK)"].assign(bone)
+                armatur.data.collections[f"{limb}.R (IK)"].assign(bonemrrr)
+            if limb == "Leg":
+                if j == 0:
+                    bone.parent = editbones["spine"]  # Thigh connects to spine
+                if j < 2:  # Thigh and Shin
+                    calculate_and_apply_roll(armatur, bone.name, "GLOBAL_POS_Y")
+                else:  # Foot and Toe
+                    calculate_and_apply_roll(armatur, bone.name, "GLOBAL_NEG_Z")
+        return bones
+
+    # --- spine & head ---
+    SPINE_DATA = [
+        ("spine", 4, 0),
+        ("spine.001", 3, 0),
+        ("spine.002", 6, -0.3),
+        ("spine.003", 6.5, 0),
+        ("spine.004", 1.5, 1.2),
+        ("spine.005", 2, 0.5),
+        ("spine.006", 5.5, 0.08),
+    ]
+
+    def fit_root(self, editbones):
+        tallunit, midx, crotch_co = self.tallunit, self.midx, self.crotch_co
+        minz_vert_co = self.vec(self.minz_i)
         # add root bone
         if len(editbones) < 2:
             editbones[0].name = "root"
@@ -229,121 +699,133 @@ class GenerateRig(bpy.types.Operator):
         root.head = mathutils.Vector((midx, crotch_co.y, minz_vert_co.z))
         root.tail = mathutils.Vector((midx, crotch_co.y + tallunit * 15, minz_vert_co.z))
         root.roll = 0
-        armatur.data.collections["Root"].assign(root)
-        # Set root as parent for all bones
+        self.armatur.data.collections["Root"].assign(root)
 
+    def fit_spine(self, editbones):
         #########################################
         ## SPINES ##
         #########################################
         print("\n........................----------------------spine------------------------------........................")
-        spine_data = [
-            ("spine", 4, 0),
-            ("spine.001", 3, 0),
-            ("spine.002", 6, -0.3),
-            ("spine.003", 6.5, 0),
-            ("spine.004", 1.5, 1.2),
-            ("spine.005", 2, 0.5),
-            ("spine.006", 5.5, 0.08),
-        ]
-
-        spine_bones = []
-        current_z = center_z
-        for i, (name, length_factor, y_offset_factor) in enumerate(spine_data):
+        self.fit_spine_chain(editbones, 0, 4)
+
+    def fit_head(self, editbones):
+        print("\n........................----------------------head-------------------------------........................")
+        self.fit_spine_chain(editbones, 4, 7)
+
+        # Final spine adjustment
+        spine_bones = self.spine_bones(editbones)
+        spine_bones[-1].tail.z = self.uppest_co.z
+        spine_bones[-1].head.y = self.uppest_co.y * 0.5 + spine_bones[-2].head.y * 0.5  # Use head.y of previous bone
+
+    def fit_spine_chain(self, editbones, start, stop):
+        """Places spine bones start..stop-1 at the solved skeleton heights, centred in the body depth."""
+        armatur = self.armatur
+        tallunit, midx, crotch_co = self.tallunit, self.midx, self.crotch_co
+        maxz_vert_co = self.vec(self.maxz_i)
+        heights = self.probes["skeleton"].spine
+
+        for i in range(start, stop):
+            name, _, y_offset_factor = self.SPINE_DATA[i]
             bone = create_and_configure_bone(editbones, name, palette="THEME04")
-            spine_bones.append(bone)
             armatur.data.collections["Torso"].assign(bone)
             bone.head.x = midx
             bone.tail.x = midx
             bone.roll = 0
 
             if i != 0:
-                set_bone_parent_and_connect(bone, spine_bones[i - 1])
-
-            bone.head.z = current_z
-
-            # Neck and Chin Fix logic (still somewhat verbose due to raycasting and loops)
-            if i == 4:  # Neck fix
-                neck_fix = True
-                while neck_fix:
-                    neck_hit_loc = human.ray_cast(bone.head, x_axis)[1]
-                    if neck_hit_loc and neck_hit_loc.x < tallunit * 2 + midx:
-                        bone.head.z -= tallunit * 0.25
-                        current_z = bone.head.z
-                    else:
-                        neck_fix = False
-            elif i == 5:  # Chin fix
-                chinfix = True
-                while chinfix:
-                    chin_ray_loc = human.ray_cast(bone.head, -y_axis)[1]
-                    # Ensure chin_ray_loc.y is close to 0 or desired plane
-                    if chin_ray_loc.y != 0:  # This while loop is problematic, it'll run infinitely if chin_ray_loc.y never becomes 0 exactly.
-                        # Better to use a small tolerance or adjust the ray_cast start point.
-                        # For now, let's simplify this and assume ray_cast works without iteration.
-                        # Original: while chin[1].y != 0: chin[1].y -= 0.001; chin = human.ray_cast(chin[1], -y_axis)
-                        # This part seems to be trying to find a projection onto a y=0 plane or similar.
-                        # It's highly dependent on mesh topology.
-                        pass  # Skipping this problematic while loop for now for brevity.
-
-                    if chin_ray_loc.y < maxz_vert_co.y - tallunit * 4:
-                        bone.head.z -= tallunit * 0.25
-                        current_z = bone.head.z
-                    else:
-                        chinfix = False
-
-            current_z += length_factor * tallunit
-            bone.tail.z = current_z
+                set_bone_parent_and_connect(bone, editbones[self.SPINE_DATA[i - 1][0]])
+
+            bone.head.z = heights[i]
+            bone.tail.z = heights[i + 1]
             bone.head.y = y_offset_factor * tallunit + maxz_vert_co.y
             bone.tail.y = y_offset_factor * tallunit + maxz_vert_co.y
 
-            # Raycast for y position (still somewhat verbose but inherent to the logic)
-            maxyspine = bone.head.y  # Initialize with current y
-            minyspine = bone.head.y  # Initialize with current y
-
-            # Find max y hit
-            temp_loc = bone.head.copy()
-            while True:
-                hit, loc, nor, idx = human.ray_cast(temp_loc, y_axis)
-                if hit:
-                    maxyspine = loc.y
-                    temp_loc = loc + y_axis * 0.001
-                else:
-                    break
-
-            # Find min y hit
-            temp_loc = bone.head.copy()
-            hit_count = 0
-            while hit_count < 2:  # Limit iterations to prevent infinite loop
-                hit, loc, nor, idx = human.ray_cast(temp_loc, -y_axis)
-                if hit:
-                    minyspine = loc.y
-                    temp_loc = loc + -y_axis * 0.001
-                    hit_count += 1
-                else:
-                    break
+            minyspine, maxyspine = self.body_depth(bone.head)
 
             if i == 0:
-                set_bone_parent_and_connect(bone, root, connect=False)
+                set_bone_parent_and_connect(bone, editbones["root"], connect=False)
                 minyspine = max(2 * crotch_co.y - maxyspine, minyspine)  # Specific logic for spine root
             bone.head.y = maxyspine * 0.55 + minyspine * 0.45
             bone.tail.y = bone.head.y  # Align tail Y with head Y for spine bones
 
             bone.envelope_distance = bone.length / 4
 
-        # Final spine adjustment
-        spine_bones[-1].tail.z = uppest_co.z
-        spine_bones[-1].head.y = uppest_co.y * 0.5 + spine_bones[-2].head.y * 0.5  # Use head.y of previous bone
+    def probe_sections(self):
+        """Horizontal cross-sections of the whole body, every quarter body unit (only the moved planes on a refit)."""
+        heights = self.section_heights()
+        if not self.previous:
+            return slice_mesh(self.co, self.tris, heights)
+        planes = self.stale_planes()
+        return splice_sections(self.previous["probes"]["sections"], planes, slice_mesh(self.co, self.tris, heights[planes]))
+
+    def probe_front(self):
+        """Front orthographic depth map: body depth along y for any (x, z) in one lookup."""
+        return rasterize(self.co, self.tris, "FRONT", self.backend[1])
+
+    def probe_skeleton(self, sections):
+        """Spine joint heights from one least-squares fit of the skeleton prior to the slice features."""
+        features = measure_features(sections, self.midx, self.headmid[1], self.uppest_co.z)
+        # The old fixed layout, only a weak pull where the features are missing
+        init = np.cumsum([self.crotch_co.z + self.tallunit * 1.5] + [self.tallunit * length for _, length, _ in self.SPINE_DATA])
+        skeleton = fit_spine_heights(features, self.crotch_co.z, init)
+        print("skeleton features:", features, " residual:", round(skeleton.residual, 4))
+        return skeleton
+
+    def body_depth(self, point):
+        """Front and back surface y of the body through `point`, from the front depth map or by ray casts."""
+        front = self.probes.get("front")
+        if front is not None:
+            lo, hi = front.at(point.x, point.z)
+            if not np.isnan(lo):
+                return float(lo), float(hi)
+
+        y_axis = mathutils.Vector((0, 1, 0))
+        # Raycast for y position (still somewhat verbose but inherent to the logic)
+        maxyspine = point.y  # Initialize with current y
+        minyspine = point.y  # Initialize with current y
+
+        # Find max y hit
+        temp_loc = point.copy()
+        while True:
+            hit, loc, nor, idx = self.ray_cast(temp_loc, y_axis)
+            if hit:
+                maxyspine = loc.y
+                temp_loc = loc + y_axis * 0.001
+            else:
+                break
+
+        # Find min y hit
+        temp_loc = point.copy()
+        hit_count = 0
+        while hit_count < 2:  # Limit iterations to prevent infinite loop
+            hit, loc, nor, idx = self.ray_cast(temp_loc, -y_axis)
+            if hit:
+                minyspine = loc.y
+                temp_loc = loc + -y_axis * 0.001
+                hit_count += 1
+            else:
+                break
+        return minyspine, maxyspine
+
+    def fit_torso_details(self, editbones):
+        """Belly height, breast bones and a few body checks, once the whole spine is placed."""
+        armatur, index = self.armatur, self.index
+        tallunit = self.tallunit
+        co, left = self.co, self.left
+        x_axis = mathutils.Vector((1, 0, 0))
+        spine_bones = self.spine_bones(editbones)
 
         # Belly/Breast detection and bone placement
         bell_hits = []
         for i in range(10):
-            belly_ray = human.ray_cast(spine_bones[1].head + mathutils.Vector((0, 0, i * tallunit * 0.5)), x_axis)
+            belly_ray = self.ray_cast(spine_bones[1].head + mathutils.Vector((0, 0, i * tallunit * 0.5)), x_axis)
             if belly_ray[0]:
                 bell_hits.append(belly_ray[1])
         if bell_hits:
             bellz_co = min(bell_hits, key=lambda v: v.x)
             spine_bones[2].head.z = bellz_co.z
 
-        if "breast.L" in bonenames:
+        if "breast.L" in self.bonenames:
             breast_l = create_and_configure_bone(editbones, "breast.L", palette="THEME04", deform=True, envelope_multiplier=8)
             breast_r = create_and_configure_bone(editbones, "breast.R", palette="THEME04", deform=True, envelope_multiplier=8)
 
@@ -354,15 +836,11 @@ class GenerateRig(bpy.types.Operator):
             breast_l.roll = 0
 
             # Breast position calculation (remains somewhat complex due to mesh interaction)
-            breast_verts = [
-                v.co
-                for v in leftside_verts
-                if abs(v.co.x - spine_bones[3].head.x - tallunit * 4.5) < tallunit * 1.5
-                and v.co.z > spine_bones[1].tail.z + tallunit * 4
-                and v.co.z < spine_bones[4].tail.z
-            ]
-            if breast_verts:
-                breasty_co = min(breast_verts, key=lambda v: v.y)
+            breast = index.select(index.band(0, spine_bones[3].head.x + tallunit * 4.5, tallunit * 1.5), left)
+            breast = breast[(co[breast, 2] > spine_bones[1].tail.z + tallunit * 4) & (co[breast, 2] < spine_bones[4].tail.z)]
+            breasty_co = None
+            if len(breast):
+                breasty_co = self.vec(index.argmin(breast, 1))
                 breast_l.tail = breasty_co
                 breast_l.head.x = breasty_co.x - tallunit
                 breast_l.head.y = breast_l.tail.y + tallunit * 4
@@ -370,119 +848,84 @@ class GenerateRig(bpy.types.Operator):
 
             calculate_and_apply_roll(armatur, "breast.L", "GLOBAL_POS_Z")
 
-            breastdeep_verts = [
-                v.co
-                for v in leftside_verts
-                if abs(v.co.x - spine_bones[3].head.x) < tallunit * 0.5 and abs(v.co.z - spine_bones[3].head.z) < tallunit * 2
-            ]
-            if breastdeep_verts:
-                breastdeepy_co = min(breastdeep_verts, key=lambda v: v.y)
+            breastdeep = index.select(index.band(0, spine_bones[3].head.x, tallunit * 0.5), left)
+            breastdeep = breastdeep[np.abs(co[breastdeep, 2] - spine_bones[3].head.z) < tallunit * 2]
+            if len(breastdeep) and breasty_co is not None:
+                breastdeepy_co = self.vec(index.argmin(breastdeep, 1))
                 if breastdeepy_co.y - breasty_co.y > tallunit * 0.6:
                     print("\n......breast detected.....\n", breastdeepy_co.y, breasty_co.y, spine_bones[3].head)
             else:
-                print("\n......no breast detected.....\n", breasty_co.y)
+                print("\n......no breast detected.....\n", breasty_co)
 
         # Dick detection (simple check, no bone creation here)
-        dick_verts = [
-            v.co for v in leftside_verts if abs(v.co.x - spine_bones[0].head.x) < tallunit * 2 and abs(v.co.z - spine_bones[0].head.z) < tallunit * 3
-        ]
-        if dick_verts:
-            dick_y_co = min(dick_verts, key=lambda v: v.y)
+        dick = index.select(index.band(0, spine_bones[0].head.x, tallunit * 2), left)
+        dick = dick[np.abs(co[dick, 2] - spine_bones[0].head.z) < tallunit * 3]
+        if len(dick):
+            dick_y_co = self.vec(index.argmin(dick, 1))
             if dick_y_co.y < spine_bones[3].head.y - tallunit * 6:
                 print("\n......dick detected.....\n", dick_y_co.y)
 
-        #########################################
-        ## ARMS ##*******************************
-        ##########################################
-
-        print("\n........................----------------------arms---------------------------------........................")
-        arm_lengths = [5.5, 8.5, 8, 3]
-        arm_names = ["shoulder.L", "upper_arm.L", "forearm.L", "hand.L"]
-        arm_bones = []
-
-        armlocx = midx
-        armlocz_initial = tallunit * 47  # Initial guess for arm z location
-
-        for j, arm_name in enumerate(arm_names):
-            bone = create_and_configure_bone(editbones, arm_name, palette="THEME05")
-
-            arm_bones.append(bone)
+    # --- arms & hands ---
+    ARM_NAMES = ["shoulder.L", "upper_arm.L", "forearm.L", "hand.L"]
 
-            # bone.head.z = armlocz_initial
-            # bone.tail.z = armlocz_initial
-
-            # bone.head.x = armlocx
-            # armlocx += arm_lengths[j] * tallunit
-            # bone.tail.x = armlocx
-
-            bonemirror = bone.name.replace(".L", ".R")
-            bonemrrr = create_and_configure_bone(editbones, bonemirror, palette="THEME05")
-            if j == 0:
-                set_bone_parent_and_connect(bone, spine_bones[3], connect=False)
-                armatur.data.collections["Torso"].assign(bone)
-                armatur.data.collections["Torso"].assign(bonemrrr)
-            else:
-                set_bone_parent_and_connect(bone, arm_bones[j - 1], connect=True)
-                armatur.data.collections["Arm.L (IK)"].assign(bone)
-                armatur.data.collections["Arm.R (IK)"].assign(bonemrrr)
-
-            # bone.roll = 0  # Initial roll, will be recalculated later
-
-        # Find hand tail = middle finger tip
-        maxhandx_vert_co = max(leftside_verts, key=lambda v: v.co.x).co
-        minhandz_verts = [
-            v for v in leftside_verts if abs(v.co.x - maxhandx_vert_co.x) < tallunit * 3 and abs(v.co.z > tallunit * 20 + minz_vert_co.z)
-        ]
-        minhandz_vert_co = min(minhandz_verts, key=lambda v: v.co.z).co
-        arm_bones[3].tail = maxhandx_vert_co * 0.7 + minhandz_vert_co * 0.3  # hand tail
+    @property
+    def a_pose(self):
+        # A-pose vs T-pose detection
+        return self.width < self.tallunit * 24
+
+    def probe_hand_tail(self):
+        tallunit, co, left, index = self.tallunit, self.co, self.left, self.index
+        minz_vert_co = self.vec(self.minz_i)
+        maxhandx_vert_co = self.vec(self.maxhandx_i)
+        minhandz = index.select(index.band(0, maxhandx_vert_co.x, tallunit * 3), left)
+        minhandz = minhandz[co[minhandz, 2] > tallunit * 20 + minz_vert_co.z]
+        minhandz_vert_co = self.vec(index.argmin(minhandz, 2))
         print("hand tail=finger tip:", maxhandx_vert_co, "min z in hand:", minhandz_vert_co)
-        print("hand tail:", arm_bones[3].tail)
+        return maxhandx_vert_co * 0.7 + minhandz_vert_co * 0.3
 
-        # A-pose vs T-pose detection
-        a_pose = width < tallunit * 24
+    def fit_hand_tail(self, editbones):
+        hand = editbones["hand.L"]
+        hand.tail = self.probes["hand_tail"]  # hand tail
+        print("hand tail:", hand.tail)
+
+    def fit_armpit(self, editbones):
+        tallunit, midx, tall = self.tallunit, self.midx, self.tall
+        co, left, index = self.co, self.left, self.index
+        x_axis = mathutils.Vector((1, 0, 0))
+        maxhandx_vert_co = self.vec(self.maxhandx_i)
+        arm_bones = [editbones[name] for name in self.ARM_NAMES]
+        spine_bones = self.spine_bones(editbones)
+        a_pose = self.a_pose
 
         # Armpit detection (complex, remains somewhat verbose due to raycasting)
-        armpit_co = mathutils.Vector((tallunit * 6 + midx, uppest_co.y, tallunit * 47 + minz_vert_co.z))
+        armpit_co = mathutils.Vector((tallunit * 6 + midx, self.uppest_co.y, self.probes["skeleton"].torso(ARMPIT)))
         slider = 0
         if a_pose:
             print(":::a_pose ---> armpit detecting:::")
             # shouder position to find armpit position
             armpit_store = []
+            leftside = np.flatnonzero(left)
+            below_chin = leftside[co[leftside, 2] < spine_bones[5].head.z]
             shoulder_down = False
             while not shoulder_down:
                 slider += tallunit * 0.3
-                armpit_vertices = [v for v in leftside_verts if v.co.x > tallunit * 3.5 + slider + midx and v.co.z < spine_bones[5].head.z]
-                arm_maxz = max(armpit_vertices, key=lambda v: v.co.z)
-                # arm_maxz_copy=arm_maxz.co.copy()
-                armpit_store.append(arm_maxz)
+                armpit_vertices = below_chin[co[below_chin, 0] > tallunit * 3.5 + slider + midx]
+                if not len(armpit_vertices):
+                    break
+                armpit_store.append(self.vec(index.argmax(armpit_vertices, 2)))
 
-                if len(armpit_store) > 1 and abs(armpit_store[-2].co.x - armpit_store[-1].co.x) < tallunit * 0.35:
+                if len(armpit_store) > 1 and abs(armpit_store[-2].x - armpit_store[-1].x) < tallunit * 0.35:
                     armpit_store.pop()
 
-                # armpit_store[-1].select = True
-                if len(armpit_store) > 3 and armpit_store[-3].co.z > armpit_store[-1].co.z + tallunit * 0.7:
-                    armpit_co = armpit_store[-1].co
+                if len(armpit_store) > 3 and armpit_store[-3].z > armpit_store[-1].z + tallunit * 0.7:
+                    armpit_co = armpit_store[-1]
                     shoulder_down = True
-                if armpit_store[-1].co.x > tall * 0.5:
+                if armpit_store[-1].x > tall * 0.5:
                     shoulder_down = True
-                # print(armpit_store[-1].co, len(armpit_store))
 
         else:  # T-pose
             print(":::t_pose ---> armpit detecting:::")
-            slider = 0
-            armpit_store = []
-            shoulder_down = False
-            while not shoulder_down:
-                slider += 1
-                armpit_vertices = [v for v in leftside_verts if abs(v.co.x - tallunit * 8 + slider * tallunit * 0.35 - midx) < tallunit * 0.35]
-                arm_minz = min(armpit_vertices, key=lambda v: v.co.z)
-                armpit_store.append(arm_minz)
-
-                if arm_minz.co.z < tallunit * 35:
-                    armpit_co = max(armpit_store, key=lambda v: v.co.z).co
-                    shoulder_down = True
-
-                # print(armpit_store[-1].co, len(armpit_store))
+            armpit_co = self.probes.get("armpit") or armpit_co
 
         print("armpit: ", armpit_co)
         if armpit_co:
@@ -496,11 +939,8 @@ class GenerateRig(bpy.types.Operator):
 
             # Position shoulder bone relative to armpit
             arm_bones[0].head.x = midx + tallunit
-            # arm_bones[0].tail.z += tallunit * 0.5
-            # arm_bones[0].tail.x -= tallunit * 0.5
             arm_bones[0].head.z = arm_bones[1].head.z + tallunit * 0.5
             arm_bones[0].head.y = arm_bones[1].head.y - tallunit * 2
-            # arm_bones[0].tail.y = arm_bones[1].head.y + tallunit * 0.25
 
         # Arm angle (cos calculation)
         shouldervector = maxhandx_vert_co - arm_bones[0].tail
@@ -511,210 +951,491 @@ class GenerateRig(bpy.types.Operator):
         if spine_bones[3].head.z - arm_bones[0].head.z > -tallunit:
             spine_bones[3].head.z = arm_bones[0].head.z - tallunit * 2
 
-        # Wrist/Hand head finding
-        if a_pose:
-            handhead_verts_co = [
-                v
-                for v in leftside_verts
-                if abs(v.co.x - arm_bones[3].tail.x + tallunit * 12 * width / tall) < tallunit * 3
-                and abs(v.co.z - arm_bones[3].tail.z - tallunit * 0.5 * tall / width) < tallunit * 2
-            ]
-        else:
+    def probe_armpit_t_pose(self, skeleton):
+        tallunit, midx, left, index = self.tallunit, self.midx, self.left, self.index
+        floor = skeleton.spine[2]  # armpits sit above the spine.002 joint
+        slider = 0
+        armpit_store = []
+        while True:
+            slider += 1
+            armpit_vertices = index.select(index.band(0, midx + tallunit * 8 - slider * tallunit * 0.35, tallunit * 0.35), left)
+            if not len(armpit_vertices):
+                return None
+            arm_minz = self.vec(index.argmin(armpit_vertices, 2))
+            armpit_store.append(arm_minz)
+
+            if arm_minz.z < floor:
+                return max(armpit_store, key=lambda v: v.z)
+
+    def fit_fingers(self, editbones):
+        """Finger and palm bones from the hand cross-sections, only for the fingers the metarig has."""
+        hand = editbones["hand.L"]
+        direction = hand.tail - hand.head
+        if direction.length < 1e-6:
+            return
+        joints = segment_fingers(self.co, self.tris, np.array(hand.head), np.array(direction), np.array((0.0, 1.0, 0.0)), self.tallunit)
+        if not joints:
+            print("fingers not separated, finger bones kept")
+            return
+        for k, finger in enumerate(FINGERS):
+            names = [f"{finger}.0{n}.L" for n in (1, 2, 3)]
+            if finger not in joints or not all(name in self.bonenames for name in names):
+                print("finger not fitted:", finger)
+                continue
+            points = [mathutils.Vector(point) for point in joints[finger]]
+            for n, name in enumerate(names):
+                editbones[name].head = points[n]
+                editbones[name].tail = points[n + 1]
+            palm = f"palm.0{k}.L"
+            if k and palm in self.bonenames:
+                editbones[palm].tail = points[0]
+            for name in names:
+                calculate_and_apply_roll(self.armatur, name, "GLOBAL_POS_Z")
+
+    def fit_hand_head(self, editbones):
+        human = self.human
+        tallunit, tall, width = self.tallunit, self.tall, self.width
+        co, left, index = self.co, self.left, self.index
+        x_axis = mathutils.Vector((1, 0, 0))
+        y_axis = mathutils.Vector((0, 1, 0))
+        z_axis = mathutils.Vector((0, 0, 1))
+        maxhandx_vert_co = self.vec(self.maxhandx_i)
+        maxlower_co = self.maxlower_co
+        hand = editbones["hand.L"]
 
-            handhead_verts_co = [
-                v
-                for v in leftside_verts
-                if abs(v.co.x - arm_bones[3].tail.x + tallunit * 14 * width / tall) < tallunit * 3
-                and abs(v.co.z - arm_bones[3].tail.z - tallunit * 0.5 * tall / width) < tallunit * 2
-            ]
+        # Wrist/Hand head finding
+        wrist_offset = 12 if self.a_pose else 14
+        handhead = index.select(index.band(0, hand.tail.x - tallunit * wrist_offset * width / tall, tallunit * 3), left)
+        handhead = handhead[np.abs(co[handhead, 2] - hand.tail.z - tallunit * 0.5 * tall / width) < tallunit * 2]
         if abs(maxhandx_vert_co.x - maxlower_co.x) < tallunit * 3:
-            handhead_verts_co = [v for v in handhead_verts_co if v.co.x > maxlower_co.x - tallunit * 3]
-        for v in handhead_verts_co:
-            v.select = True
-        if handhead_verts_co:
-            hand_avg_co = sum((v.co for v in handhead_verts_co), mathutils.Vector()) / len(handhead_verts_co)
+            handhead = handhead[co[handhead, 0] > maxlower_co.x - tallunit * 3]
+        if len(handhead):
+            mesh = human.data if human else None
+            if mesh and len(mesh.vertices) == len(co):  # evaluated meshes have their own vertex indices
+                selected = np.empty(len(mesh.vertices), dtype=bool)
+                mesh.vertices.foreach_get("select", selected)
+                selected[handhead] = True
+                mesh.vertices.foreach_set("select", selected)
+
+            hand_avg_co = self.mean(handhead)
             print(hand_avg_co)
-            handrayup_res = human.ray_cast(hand_avg_co, z_axis)
-            handraydown_res = human.ray_cast(hand_avg_co, -z_axis)
+            handrayup_res = self.ray_cast(hand_avg_co, z_axis)
+            handraydown_res = self.ray_cast(hand_avg_co, -z_axis)
             if handrayup_res[0] and handraydown_res[0] and abs(handrayup_res[1].z - handraydown_res[1].z) < tallunit * 3:
                 hand_avg_co.z = handrayup_res[1].z * 0.5 + handraydown_res[1].z * 0.5
                 print("hand ray z success")
-            handrayleft_res = human.ray_cast(hand_avg_co, x_axis)
-            handrayright_res = human.ray_cast(hand_avg_co, -x_axis)
+            handrayleft_res = self.ray_cast(hand_avg_co, x_axis)
+            handrayright_res = self.ray_cast(hand_avg_co, -x_axis)
             if handrayleft_res[0] and handrayright_res[0] and abs(handrayleft_res[1].x - handrayright_res[1].x) < tallunit * 3:
                 hand_avg_co.x = handrayleft_res[1].x * 0.5 + handrayright_res[1].x * 0.5
                 print("hand ray x success")
-            hand_rayfront_res = human.ray_cast(hand_avg_co, -y_axis)
-            hand_rayback_res = human.ray_cast(hand_avg_co, y_axis)
+            hand_rayfront_res = self.ray_cast(hand_avg_co, -y_axis)
+            hand_rayback_res = self.ray_cast(hand_avg_co, y_axis)
             if hand_rayfront_res[0] and hand_rayback_res[0]:
-                arm_bones[3].head = hand_rayfront_res[1] * 0.5 + hand_rayback_res[1] * 0.5
+                hand.head = hand_rayfront_res[1] * 0.5 + hand_rayback_res[1] * 0.5
             else:  # Fallback if raycasts fail to provide two points
-                arm_bones[3].head = hand_avg_co
-            if arm_bones[3].head.z < arm_bones[3].tail.z:
-                arm_bones[3].head.z = arm_bones[3].tail.z + tallunit
-            # arm_bones[3].head.y += tallunit * 0.25
-            arm_bones[3].length = tallunit * 3  # Adjust length after head is set
+                hand.head = hand_avg_co
+            if hand.head.z < hand.tail.z:
+                hand.head.z = hand.tail.z + tallunit
+            hand.length = tallunit * 3  # Adjust length after head is set
+
+    def fit_elbow(self, editbones):
+        tallunit, co, left, index = self.tallunit, self.co, self.left, self.index
+        maxhandx_vert_co = self.vec(self.maxhandx_i)
+        arm_bones = [editbones[name] for name in self.ARM_NAMES]
 
         # Elbow position finding
         elbowdown_x = (maxhandx_vert_co.x - arm_bones[0].tail.x) * 0.4 + arm_bones[0].tail.x
 
         midelbow_co = arm_bones[0].tail * 0.45 + arm_bones[3].head * 0.55
-        elbow_verts_co = [v.co for v in leftside_verts if abs(v.co.x - elbowdown_x) < tallunit and abs(v.co.z - midelbow_co.z) < tallunit * 4]
-        if elbow_verts_co:
-            elbowzmax_co = max(elbow_verts_co, key=lambda v: v.z)
-            elbowzmin_co = min(elbow_verts_co, key=lambda v: v.z)
-            elbowz_co = elbowzmax_co * 0.5 + elbowzmin_co * 0.5
-            elbowxmaax_co = max(elbow_verts_co, key=lambda v: v.x)
-            elbowxmin_co = min(elbow_verts_co, key=lambda v: v.x)
-            elbowz_co.x = elbowxmaax_co.x * 0.5 + elbowxmin_co.x * 0.5
+        elbow = index.select(index.band(0, elbowdown_x, tallunit), left)
+        elbow = elbow[np.abs(co[elbow, 2] - midelbow_co.z) < tallunit * 4]
+        if len(elbow):
+            elbowz_co = self.vec(index.argmax(elbow, 2)) * 0.5 + self.vec(index.argmin(elbow, 2)) * 0.5
+            elbowz_co.x = co[elbow, 0].max() * 0.5 + co[elbow, 0].min() * 0.5
             elbowz_co.y += tallunit * 0.5
             arm_bones[1].tail = elbowz_co  # upper_arm.L tail
             elbowy = arm_bones[2].tail.y * 0.5 + arm_bones[0].tail.y * 0.5 + tallunit * 0.15
-            arm_bones[1].tail.y=max(elbowy,elbowz_co.y)
-
-
-        # Recalculate arm rolls
-        for arm_bone in arm_bones:
-            calculate_and_apply_roll(armatur, arm_bone.name, "GLOBAL_NEG_Y")
+            arm_bones[1].tail.y = max(elbowy, elbowz_co.y)
 
-        #########################################
-        ## LEGS ##
-        #########################################
-        print("\n........................----------------------legs---------------------------------..........................")
-        leg_names = ["thigh.L", "shin.L", "foot.L", "toe.L"]
-        leg_bones = []
-
-        ## Create leg bones **********************************************************************************
-
-        for i, leg_name in enumerate(leg_names):
-            bone = create_and_configure_bone(editbones, leg_name, palette="THEME11")
-            bonemirror = bone.name.replace(".L", ".R")
-            bonemrrr = create_and_configure_bone(editbones, bonemirror, palette="THEME11")
-            armatur.data.collections["Leg.L (IK)"].assign(bone)
-            armatur.data.collections["Leg.R (IK)"].assign(bonemrrr)
-            leg_bones.append(bone)
-            if i == 0:
-                bone.parent = spine_bones[0]  # Thigh connects to spine
-            if i > 0:
-                set_bone_parent_and_connect(bone, leg_bones[i - 1], connect=True)
+    # --- legs & feet ---
+    LEG_NAMES = ["thigh.L", "shin.L", "foot.L", "toe.L"]
 
-            if i < 2:  # Thigh and Shin
-                calculate_and_apply_roll(armatur, bone.name, "GLOBAL_POS_Y")
-            else:  # Foot and Toe
-                calculate_and_apply_roll(armatur, bone.name, "GLOBAL_NEG_Z")
+    def fit_thigh(self, editbones):
+        armatur, tallunit, butty_co = self.armatur, self.tallunit, self.butty_co
+        spine_bones = self.spine_bones(editbones)
+        thigh = editbones["thigh.L"]
 
         # Thigh bone head
-        leg_bones[0].head = spine_bones[0].head
-        leg_bones[0].head.x = min(butty_co.x + tallunit * 1.25, tallunit * 3)
-        leg_bones[0].head.z = butty_co.z + tallunit * 0.7
-        print("thigh head      : ", leg_bones[0].head)
+        thigh.head = spine_bones[0].head
+        thigh.head.x = min(butty_co.x + tallunit * 1.25, tallunit * 3)
+        thigh.head.z = butty_co.z + tallunit * 0.7
+        print("thigh head      : ", thigh.head)
         # Pelvis bone
-        if "pelvis.L" in bonenames:
+        if "pelvis.L" in self.bonenames:
             pelvis_l = create_and_configure_bone(editbones, "pelvis.L", palette="THEME14", deform=True, envelope_multiplier=4)
             pelvis_r = create_and_configure_bone(editbones, "pelvis.R", palette="THEME14", deform=True, envelope_multiplier=4)
             pelvis_l.head = spine_bones[0].head
-            pelvis_l.tail = leg_bones[0].head  # Connect to thigh head
+            pelvis_l.tail = thigh.head  # Connect to thigh head
             pelvis_l.tail.z = spine_bones[1].head.z  # Z-alignment with spine.001 head
             pelvis_l.tail.y -= tallunit  # Adjust Y
             armatur.data.collections["Torso"].assign(editbones["pelvis.L"])
             armatur.data.collections["Torso"].assign(editbones["pelvis.R"])
             calculate_and_apply_roll(armatur, "pelvis.L", "GLOBAL_POS_Y")
 
+    def probe_ankle(self):
+        tallunit, midx, co, index = self.tallunit, self.midx, self.co, self.index
+        minz_vert_co = self.vec(self.minz_i)
+
         # Ankle to foot tail
-        ankle_verts = [v for v in masterco if abs(v.z - tallunit * 3.5 - minz_vert_co.z) < tallunit * 0.7 and v.x > midx]
-        if ankle_verts:
-            anklez_co = min(ankle_verts, key=lambda v: v.y)  # Base for ankle height
-            anklez_co.x = max(ankle_verts, key=lambda v: v.x).x * 0.5 + min(ankle_verts, key=lambda v: v.x).x * 0.5
-            anklez_co.z = min(ankle_verts, key=lambda v: v.x).z
-            anklez_co.y = min(ankle_verts, key=lambda v: v.x).y * 0.4 + max(ankle_verts, key=lambda v: v.x).y * 0.6
-
-            leg_bones[1].tail = anklez_co  # Shin.L tail is ankle
+        ankle = index.band(2, tallunit * 3.5 + minz_vert_co.z, tallunit * 0.7)
+        ankle = ankle[co[ankle, 0] > midx]
+        if not len(ankle):
+            return None
+        ankle_minx = self.vec(index.argmin(ankle, 0))
+        ankle_maxx = self.vec(index.argmax(ankle, 0))
+        anklez_co = self.vec(index.argmin(ankle, 1))  # Base for ankle height
+        anklez_co.x = ankle_maxx.x * 0.5 + ankle_minx.x * 0.5
+        anklez_co.z = ankle_minx.z
+        anklez_co.y = ankle_minx.y * 0.4 + ankle_maxx.y * 0.6
+        return anklez_co
+
+    def fit_ankle(self, editbones):
+        anklez_co = self.probes["ankle"]
+        if anklez_co is not None:
+            editbones["shin.L"].tail = anklez_co  # Shin.L tail is ankle
             print("ankle=shin tail : ", anklez_co)
 
-        # Foot and Toe
-        toe_verts = [v for v in masterco if abs(v.z - tallunit - minz_vert_co.z) < tallunit and v.x > midx]
-        if toe_verts:
-            toey_co = min(toe_verts, key=lambda v: v.y)  # Toe tip
-            toverty_verts = [v for v in toe_verts if abs(v.y - toey_co.y) < tallunit * 6]
-            toey2_co = sum(toverty_verts, mathutils.Vector()) / len(toverty_verts) if toverty_verts else toey_co
+    def probe_toe(self):
+        tallunit, midx, co, index = self.tallunit, self.midx, self.co, self.index
+        minz_vert_co = self.vec(self.minz_i)
 
-            leg_bones[2].tail = toey2_co  # foot.L tail = toe head
-
-            foot_vector = toey2_co - leg_bones[2].head
+        # Foot and Toe
+        toe = index.band(2, tallunit + minz_vert_co.z, tallunit)
+        toe = toe[co[toe, 0] > midx]
+        if not len(toe):
+            return None
+        toey_co = self.vec(index.argmin(toe, 1))  # Toe tip
+        toverty = toe[np.abs(co[toe, 1] - toey_co.y) < tallunit * 6]
+        return self.mean(toverty) if len(toverty) else toey_co
+
+    def fit_foot(self, editbones):
+        tallunit = self.tallunit
+        foot, toe_bone = editbones["foot.L"], editbones["toe.L"]
+
+        toey2_co = self.probes["toe"]
+        if toey2_co is not None:
+            foot.tail = toey2_co  # foot.L tail = toe head
+
+            foot_vector = toey2_co - foot.head
             foot_vector.z = 0
-            leg_bones[3].head = leg_bones[2].tail  # toe.L head
-            leg_bones[3].tail = leg_bones[2].tail + foot_vector * 0.35  # toe.L tail
-            print("toe tip position: ", leg_bones[3].tail)
+            toe_bone.head = foot.tail  # toe.L head
+            toe_bone.tail = foot.tail + foot_vector * 0.35  # toe.L tail
+            print("toe tip position: ", toe_bone.tail)
 
         # Heel bone
-        heel_name = next((i for i in bonenames if i.startswith("heel.") and i.endswith(".L")), None)
+        heel_name = next((i for i in self.bonenames if i.startswith("heel.") and i.endswith(".L")), None)
         if heel_name:
             heel_bone = editbones[heel_name]
-            heel_bone.head = editbones["foot.L"].head - mathutils.Vector((0, -tallunit, tallunit * 3))
-            heel_bone.tail = editbones["foot.L"].head - mathutils.Vector((-tallunit * 2, -tallunit, tallunit * 3))
+            heel_bone.head = foot.head - mathutils.Vector((0, -tallunit, tallunit * 3))
+            heel_bone.tail = foot.head - mathutils.Vector((-tallunit * 2, -tallunit, tallunit * 3))
+
+    def probe_knee(self):
+        tallunit, left, index = self.tallunit, self.left, self.index
+        minz_vert_co = self.vec(self.minz_i)
 
         # Knee position \\\\\\\\\\\\\\\\\\\\\\\\\\\\//////////////////////////////////
-        kneeverty_verts = [v for v in leftside_verts if abs(v.co.z - (crotch_co.z - minz_vert_co.z) * 0.6 - minz_vert_co.z) <= tallunit]
+        leg_height = self.crotch_co.z - minz_vert_co.z
+        kneeverty = index.select(index.band(2, leg_height * 0.6 + minz_vert_co.z, tallunit, inclusive=True), left)
 
         knee_ys_candidates = []
-        if kneeverty_verts:
-            knee_ys_candidates.append(max(kneeverty_verts, key=lambda v: v.co.y))  # Initial candidate
+        if len(kneeverty):
+            knee_ys_candidates.append(self.vec(index.argmax(kneeverty, 1)))  # Initial candidate
 
         for i in range(6):
             # Recalculate verts for a slice around the knee height
-            kneeverty_slice_verts = [
-                v
-                for v in leftside_verts
-                if abs(v.co.z - ((crotch_co.z - minz_vert_co.z) * 0.55 + i * tallunit * 0.5 + minz_vert_co.z)) <= tallunit * 0.25
-            ]
-            if kneeverty_slice_verts:
-                kneemaxy_vert = max(kneeverty_slice_verts, key=lambda v: v.co.y)
-
-                if knee_ys_candidates and abs(kneemaxy_vert.co.y - knee_ys_candidates[-1].co.y) > tallunit * 0.5:
+            knee_slice = index.select(index.band(2, leg_height * 0.55 + i * tallunit * 0.5 + minz_vert_co.z, tallunit * 0.25, inclusive=True), left)
+            if len(knee_slice):
+                kneemaxy_co = self.vec(index.argmax(knee_slice, 1))
+
+                if knee_ys_candidates and abs(kneemaxy_co.y - knee_ys_candidates[-1].y) > tallunit * 0.5:
                     pass  # Skip if sudden large jump, likely not part of the same knee contour
                 else:
-                    knee_ys_candidates.append(kneemaxy_vert)
-                # print("kneemaxy_vert: ", kneemaxy_vert.co, "i: ", i, knee_ys_candidates[-1].co)
+                    knee_ys_candidates.append(kneemaxy_co)
 
-        if knee_ys_candidates:
-            leg_bones[1].head = min(knee_ys_candidates, key=lambda v: v.co.y).co
+        return min(knee_ys_candidates, key=lambda v: v.y) if knee_ys_candidates else None
 
-        leg_bones[1].head.y = leg_bones[0].head.y * 0.5 + leg_bones[1].tail.y * 0.5 - tallunit
-        leg_bones[1].head.x = leg_bones[0].head.x * 0.5 + leg_bones[1].tail.x * 0.5  # Align knee x between thigh and shin
+    def fit_knee(self, editbones):
+        tallunit = self.tallunit
+        thigh, shin = editbones["thigh.L"], editbones["shin.L"]
+        if self.probes["knee"] is not None:
+            shin.head = self.probes["knee"]
 
-        # --- Symmetrize ---
-        if armatur.data.use_mirror_x:
-            bpy.ops.object.mode_set(mode="OBJECT")
-            armatur.location.x -= midx  # Move armature to origin for symmetry
-            bpy.ops.object.transform_apply(location=True, rotation=True, scale=True)
-            print("\n::: ::: symmetrizing ::: :::")
-            bpy.ops.object.mode_set(mode="EDIT")
-            bpy.ops.armature.select_all(action="SELECT")
-            bpy.ops.armature.symmetrize(direction="POSITIVE_X")
+        shin.head.y = thigh.head.y * 0.5 + shin.tail.y * 0.5 - tallunit
+        shin.head.x = thigh.head.x * 0.5 + shin.tail.x * 0.5  # Align knee x between thigh and shin
+
+
+# ------------------- generate rig level 1 ------------------#
+class GenerateRig(bpy.types.Operator):
+    bl_idname = "fg.generate_rig"
+    bl_label = "Orient rig bones position"
+    bl_description = "Generate rigify bones from only 1 bone or metarig.\n\n*This operator will apply the scale and rotation of the armature and the object \nbefore generating the rig bones position.\n"
+    bl_options = {"REGISTER", "UNDO"}
+
+    def prepare(self, context):
+        print("\n\n\n*******************************     generating rig        *****************************")
+        # --- Initial Checks ---
+        human = context.scene.my_object
+        # A scan imported without its mesh is fitted from its arrays
+        scan = pending_scan() if human is None else None
+        if human is None and scan is None:
+            self.report({"ERROR"}, "No object set in the scene")
+            return None
+        if not context.active_object and human:
+            bpy.context.view_layer.objects.active = human
+        initial_mode = context.object.mode if context.object else "OBJECT"
+        if context.object:
             bpy.ops.object.mode_set(mode="OBJECT")
-            armatur.location.x += midx  # Move armature back
-            bpy.ops.object.transform_apply(location=True, rotation=True, scale=True)
+            print("                     initial_mode ==*", initial_mode + " mode for *" + context.object.name)
+        bpy.ops.object.select_all(action="DESELECT")
+        created = False
+        if not hasattr(context.scene, "my_armature") or not context.scene.my_armature:
+            bpy.ops.object.armature_basic_human_metarig_add()
+            context.scene.my_armature = context.active_object
+            created = True
+        return RigFit(human, context.scene.my_armature, initial_mode, created, scan=scan)
 
-        armatur.data.pose_position = "POSE"
-        bpy.ops.object.mode_set(mode=initial_mode)
-        # context.view_layer.update()
+    def execute(self, context):
+        fit = self.prepare(context)
+        if not fit:
+            return {"CANCELLED"}
+        fit.run(context)
+        self.report_done(context, fit)
+        return {"FINISHED"}
+
+    def report_done(self, context, fit):
+        if not context.scene.fg_validate:
+            self.report({"INFO"}, f"Rig created for armature: {fit.armatur.name} ...................\n")
+            return
+        failed = store_report(context.scene, fit.validate())
+        if failed:
+            self.report({"WARNING"}, f"Rig created for armature: {fit.armatur.name}, {failed} rig checks failed")
+        else:
+            self.report({"INFO"}, f"Rig created for armature: {fit.armatur.name}, all rig checks passed")
+
+    # --- modal: one stage per timer tick, numpy stages on a worker thread, Esc rolls back ---
+    def invoke(self, context, event):
+        fit = self.prepare(context)
+        if not fit:
+            return {"CANCELLED"}
+        self._fit = fit
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(0.05, window=context.window)
+        wm.progress_begin(0, len(fit.STAGES))
+        wm.modal_handler_add(self)
+        self.show_progress(context)
+        return {"RUNNING_MODAL"}
+
+    def show_progress(self, context):
+        fit = self._fit
+        _, label = fit.stage_name
+        context.window_manager.progress_update(fit.stage)
+        context.workspace.status_text_set(f"Generating rig: {label} ({fit.stage + 1}/{len(fit.STAGES)})    Esc: cancel")
+
+    def finish(self, context):
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+
+    def modal(self, context, event):
+        fit = self._fit
+        if event.type == "ESC":
+            if fit.worker:
+                fit.worker.join()
+            fit.rollback(context)
+            self.finish(context)
+            self.report({"WARNING"}, "Rig generation cancelled")
+            return {"CANCELLED"}
+        if event.type != "TIMER":
+            return {"PASS_THROUGH"}
+
+        if fit.worker:
+            if fit.worker.is_alive():
+                return {"PASS_THROUGH"}
+            fit.worker = None
+            if fit.worker_error:
+                return self.fail(context, fit.worker_error)
+            fit.stage += 1
+        elif fit.stage_name[0] in fit.THREADED:
+            fit.start_worker()
+            return {"PASS_THROUGH"}
+        else:
+            try:
+                fit.step(context)
+            except Exception as error:
+                return self.fail(context, error)
+
+        if fit.done:
+            self.finish(context)
+            self.report_done(context, fit)
+            return {"FINISHED"}
+        self.show_progress(context)
+        return {"PASS_THROUGH"}
+
+    def fail(self, context, error):
+        fit = self._fit
+        print(f"rig generation failed at {fit.stage_name[0]}: {error!r}")
+        fit.rollback(context)
+        self.finish(context)
+        self.report({"ERROR"}, f"Rig generation failed while {fit.stage_name[1].lower()}: {error}")
+        return {"CANCELLED"}
+
+
+# ------------------- regenerate one region ------------------#
+class RegenerateRegion(bpy.types.Operator):
+    bl_idname = "fg.regenerate_region"
+    bl_label = "Refit region"
+    bl_description = "Refit the bones of one body part only, the rest of the rig keeps its position.\nThe mesh index is reused while the human mesh is unchanged\n"
+    bl_options = {"REGISTER", "UNDO"}
 
-        self.report({"INFO"}, f"Rig created for armature: {armatur.name} ...................\n")
+    region: bpy.props.EnumProperty(
+        name="Region",
+        items=[
+            ("SPINE", "Spine", "Root, spine up to the chest, breast"),
+            ("HEAD", "Neck/Head", "Neck and head bones"),
+            ("ARMS", "Arms", "Shoulders, upper arms and forearms"),
+            ("HANDS", "Hands", "Hand bones"),
+            ("LEGS", "Legs", "Thighs, shins and pelvis"),
+            ("FEET", "Feet", "Feet, toes and heels"),
+        ],
+        default="ARMS",
+    )
+
+    def execute(self, context):
+        human, armatur = context.scene.my_object, context.scene.my_armature
+        if not human or not armatur:
+            self.report({"ERROR"}, "Set the human and the armature first")
+            return {"CANCELLED"}
+        if "spine.003" not in armatur.data.bones:
+            self.report({"ERROR"}, "Generate the whole rig once before refitting a region")
+            return {"CANCELLED"}
+        initial_mode = context.object.mode if context.object else "OBJECT"
+        if initial_mode != "OBJECT":
+            bpy.ops.object.mode_set(mode="OBJECT")
+        context.view_layer.objects.active = human
+
+        fit = RigFit(human, armatur, initial_mode, regions={self.region}, keep_modifiers=True)
+        try:
+            fit.run(context)
+        except Exception as error:
+            fit.rollback(context)
+            self.report({"ERROR"}, f"Refitting {self.region.lower()} failed while {fit.stage_name[1].lower()}: {error}")
+            return {"CANCELLED"}
+        self.report({"INFO"}, f"Refitted {self.region.lower()} of {armatur.name}" + (" (cached mesh index)" if fit.cached else ""))
         return {"FINISHED"}
 
 
-# ---
+# ------------------- rig a whole collection ------------------#
+def find_rig(human):
+    """The armature a human is bound or parented to, or the metarig made for it by a previous batch."""
+    for mod in human.modifiers:
+        if mod.type == "ARMATURE" and mod.object:
+            return mod.object
+    if human.parent and human.parent.type == "ARMATURE":
+        return human.parent
+    rig = bpy.data.objects.get(f"{human.name}_metarig")
+    return rig if rig and rig.type == "ARMATURE" else None
 
-### Refactored `GenerateIk` Operator
 
+class BatchRig(bpy.types.Operator):
+    bl_idname = "fg.batch_rig"
+    bl_label = "Rig collection"
+    bl_description = "Generate the rig of every human mesh in the batch collection in one pass.\nEach mesh reuses its armature or gets a new metarig, mesh analysis runs for all of them together\n"
+    bl_options = {"REGISTER", "UNDO"}
 
-import bpy
-import mathutils
-import math
+    parent: bpy.props.BoolProperty(name="Auto Parent", default=False, description="Parent every human to its rig with automatic weights afterwards")
 
-# (get_pole_angle, tolerancex, tolerancex_co, tolerancexy_co functions are assumed to be defined above)
+    def execute(self, context):
+        scene = context.scene
+        collection = scene.fg_batch_collection
+        humans = [obj for obj in collection.all_objects if obj.type == "MESH"] if collection else []
+        if not humans:
+            self.report({"ERROR"}, "No human meshes in the batch collection")
+            return {"CANCELLED"}
+        if context.object and context.object.mode != "OBJECT":
+            bpy.ops.object.mode_set(mode="OBJECT")
+
+        fits = []
+        for human in humans:
+            armatur, created = find_rig(human), False
+            if not armatur:
+                bpy.ops.object.select_all(action="DESELECT")
+                bpy.ops.object.armature_basic_human_metarig_add()
+                armatur = context.active_object
+                armatur.name = f"{human.name}_metarig"
+                created = True
+            context.view_layer.objects.active = human
+            fits.append(RigFit(human, armatur, "OBJECT", created))
+
+        # Stage by stage for every character: numpy stages share one pool, bpy stages run back to back
+        timings = {fit: 0.0 for fit in fits}
+        errors = {}
+
+        def timed_step(fit, context):
+            start = time.perf_counter()
+            try:
+                fit.step(context)
+            except Exception as error:
+                errors[fit] = f"failed while {fit.stage_name[1].lower()}: {error}"
+            timings[fit] += time.perf_counter() - start
+
+        with ThreadPoolExecutor() as pool:
+            for name, _ in RigFit.STAGES:
+                active = [fit for fit in fits if fit not in errors]
+                if name in RigFit.THREADED:
+                    list(pool.map(lambda fit: timed_step(fit, None), active))
+                    # Rollback touches bpy data, so it runs back on the main thread
+                    for fit in active:
+                        if fit in errors:
+                            fit.rollback(context)
+                    continue
+                for fit in active:
+                    timed_step(fit, context)
+                    if fit in errors:
+                        fit.rollback(context)
+
+        if self.parent:
+            my_object, my_armature = scene.my_object, scene.my_armature
+            for fit in fits:
+                if fit in errors:
+                    continue
+                scene.my_object, scene.my_armature = fit.human, fit.armatur
+                start = time.perf_counter()
+                bpy.ops.fg.autoparent()
+                timings[fit] += time.perf_counter() - start
+            scene.my_object, scene.my_armature = my_object, my_armature
+
+        scene.fg_batch_report.clear()
+        for fit in fits:
+            entry = scene.fg_batch_report.add()
+            entry.name = fit.human.name
+            entry.ms = timings[fit] * 1000
+            if fit in errors:
+                entry.status = errors[fit]
+                continue
+            missing = [probe for probe, value in fit.probes.items() if value is None]
+            entry.status = f"{fit.armatur.name}" + (f", not found: {', '.join(missing)}" if missing else "")
+            if scene.fg_validate:
+                failed = [f"{check} {bone}" for check, bone, ok, _ in fit.validate() if not ok]
+                entry.status += f", {len(failed)} issues: {', '.join(failed[:3])}" if failed else ", checks passed"
+            print(f"batch rig {fit.human.name}: {entry.ms:.0f} ms  {entry.status}")
+
+        self.report({"INFO" if not errors else "WARNING"}, f"Rigged {len(fits) - len(errors)}/{len(fits)} humans")
+        return {"FINISHED"}
 
 
+# ------------------- generate ik --------------#
 class GenerateIk(bpy.types.Operator):
     bl_idname = "fg.generate_ik"
     bl_label = "Genx ik"
@@ -810,7 +1531,7 @@ class Autoparent(bpy.types.Operator):
         aktiv = bpy.context.active_object
         bpy.ops.object.mode_set(mode="OBJECT")
         bpy.ops.object.select_all(action="DESELECT")
-        human = context.scene.my_object
+        human = scan_human(context)  # scans imported without a mesh get it here, bone heat needs it
         armatur = context.scene.my_armature
 
         human.select_set(True)
@@ -822,26 +1543,53 @@ class Autoparent(bpy.types.Operator):
         bpy.ops.object.transform_apply(location=True, rotation=True, scale=True)
         bpy.context.object.data.pose_position = "REST"
 
+        # Bone heat runs on a stand-in without the loose parts (they are bound rigidly below), decimated
+        # on dense scans; the weights are then copied or interpolated back onto the human
+        scene = context.scene
+        parts = mesh_components(read_coords(human.data), read_triangles(human.data))
+        small = parts.small(scene.fg_part_share)
+        keep = np.flatnonzero(~np.isin(parts.labels, small)) if len(small) else None
+        body_count = len(keep) if keep is not None else len(human.data.vertices)
+        decimate = scene.fg_proxy_weights and body_count > scene.fg_proxy_vertices * 2
+        proxy = None
+        if keep is not None or decimate:
+            proxy = make_proxy(human, keep, scene.fg_proxy_vertices if decimate else 0)
+            human.select_set(False)
+            proxy.select_set(True)
+        weighted = proxy or human
+
         original_scale = armatur.scale.copy()
-        human_scale = human.scale.copy()
+        human_scale = weighted.scale.copy()
         # --- Apply temporary scale (2x) ---
         armatur.scale = [s * 10 for s in original_scale]
-        human.scale = [s * 10 for s in human_scale]
+        weighted.scale = [s * 10 for s in human_scale]
         # bpy.context.view_layer.update()
 
         bpy.ops.object.parent_set(type="ARMATURE_AUTO")
 
         armatur.scale = original_scale
+        note = ""
+        if proxy:
+            if decimate:
+                transfer_proxy_weights(human, proxy, scene.fg_proxy_smooth, keep)
+                note = f", weights from a {len(proxy.data.vertices)} vertex proxy"
+            else:
+                copy_proxy_weights(human, proxy, keep)
+            remove_proxy(proxy)
+            human.select_set(True)
+            bpy.ops.object.parent_set(type="ARMATURE")
 
         # bpy.context.view_layer.update()
         bpy.context.object.data.pose_position = "POSE"
         bpy.context.view_layer.objects.active = human
         bpy.ops.object.transform_apply(location=True, rotation=True, scale=True)
         bpy.ops.object.mode_set(mode="OBJECT")
+        # Loose parts (eyes, teeth, props) follow their nearest bone rigidly instead of bone heat
+        parts = rigid_part_weights(human, armatur, scene.fg_part_share, parts)
         bpy.ops.object.select_all(action="DESELECT")
         bpy.context.view_layer.objects.active = aktiv
         bpy.ops.object.mode_set(mode=mode)
-        self.report({"INFO"}, f"Lets parent anyway")
+        self.report({"INFO"}, (f"Lets parent anyway, {parts} loose parts bound rigidly" if parts else f"Lets parent anyway") + note)
         return {"FINISHED"}
 
 
@@ -899,7 +1647,7 @@ class Weightpaintauto(bpy.types.Operator):
 
 
 # ------------------ register -------------------#
-classes = [GenerateIk, GenerateRig, Weightpaintauto, Autoparent]
+classes = [GenerateIk, GenerateRig, RegenerateRegion, BatchRig, Weightpaintauto, Autoparent]
 
 
 def register():
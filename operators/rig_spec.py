@@ -0,0 +1,239 @@
+import bpy
+import json
+import os
+
+from .lazy import lazy_import
+
+np = lazy_import("numpy")
+
+
+# ------------------- rig spec --------------#
+# The fitted bone layout of an armature, independent of the mesh it was fitted on.
+# .json is meant for diffs and review, .npz keeps the bone arrays binary and the rest as json meta.
+SPEC_VERSION = 1
+BONE_ARRAYS = ("head", "tail", "roll", "parent", "connect", "deform", "envelope")
+
+
+def collect_spec(armatur):
+    """Reads bones, IK constraints and twist stacks of the armature (object or pose mode)."""
+    from .twist import find_twist_stacks
+
+    bones = armatur.data.bones
+    count = len(bones)
+    head = np.empty(count * 3, dtype=np.float32)
+    tail = np.empty(count * 3, dtype=np.float32)
+    bones.foreach_get("head_local", head)
+    bones.foreach_get("tail_local", tail)
+    names = [bone.name for bone in bones]
+    index = {name: i for i, name in enumerate(names)}
+
+    spec = {
+        "version": SPEC_VERSION,
+        "armature": armatur.name,
+        "bones": {
+            "names": names,
+            "head": head.reshape(-1, 3),
+            "tail": tail.reshape(-1, 3),
+            "roll": np.array([bpy.types.Bone.AxisRollFromMatrix(bone.matrix_local.to_3x3())[1] for bone in bones], dtype=np.float32),
+            "parent": np.array([index[bone.parent.name] if bone.parent else -1 for bone in bones], dtype=np.int32),
+            "connect": np.array([bone.use_connect for bone in bones], dtype=bool),
+            "deform": np.array([bone.use_deform for bone in bones], dtype=bool),
+            "envelope": np.array([bone.envelope_distance for bone in bones], dtype=np.float32),
+            "collections": [[bc.name for bc in bone.collections] for bone in bones],
+        },
+        "ik": [],
+        "twist": [],
+    }
+    drivers = {fc.data_path for fc in armatur.animation_data.drivers} if armatur.animation_data else set()
+    for pose_bone in armatur.pose.bones:
+        for con in pose_bone.constraints:
+            if con.type == "IK":
+                spec["ik"].append(
+                    {
+                        "bone": pose_bone.name,
+                        "name": con.name,
+                        "subtarget": con.subtarget,
+                        "pole_subtarget": con.pole_subtarget,
+                        "pole_angle": con.pole_angle,
+                        "chain_count": con.chain_count,
+                        "use_stretch": con.use_stretch,
+                    }
+                )
+    for (kind, source), twist_names in find_twist_stacks(armatur).items():
+        driven = f'pose.bones["{twist_names[0]}"].rotation_euler' in drivers
+        spec["twist"].append({"kind": kind, "source": source, "bones": twist_names, "mode": "DRIVER" if driven else "CONSTRAINTS"})
+    return spec
+
+
+def write_spec(spec, filepath):
+    bones = spec["bones"]
+    if filepath.endswith(".npz"):
+        meta = {key: value for key, value in spec.items() if key != "bones"}
+        meta["collections"] = bones["collections"]
+        np.savez_compressed(filepath, names=np.array(bones["names"]), meta=np.array(json.dumps(meta)), **{key: bones[key] for key in BONE_ARRAYS})
+        return
+    data = dict(spec, bones={key: value.tolist() if hasattr(value, "tolist") else value for key, value in bones.items()})
+    with open(filepath, "w") as file:
+        json.dump(data, file, indent=1)
+
+
+def read_spec(filepath):
+    if filepath.endswith(".npz"):
+        with np.load(filepath, allow_pickle=False) as data:
+            spec = json.loads(str(data["meta"]))
+            spec["bones"] = {key: data[key] for key in BONE_ARRAYS}
+            spec["bones"]["names"] = data["names"].tolist()
+            spec["bones"]["collections"] = spec.pop("collections")
+    else:
+        with open(filepath) as file:
+            spec = json.load(file)
+    if spec.get("version", 0) > SPEC_VERSION:
+        raise ValueError(f"Rig spec version {spec['version']} is newer than this add-on ({SPEC_VERSION})")
+    return spec
+
+
+def apply_spec(context, armatur, spec, remove_extra=False):
+    """Rebuilds the bone layout, IK constraints and twist stacks of `spec` on `armatur` in one edit pass."""
+    from .twist import setup_twist_stack
+
+    bones = spec["bones"]
+    names = bones["names"]
+    if context.object and context.object.mode != "OBJECT":
+        bpy.ops.object.mode_set(mode="OBJECT")
+    bpy.ops.object.select_all(action="DESELECT")
+    armatur.select_set(True)
+    context.view_layer.objects.active = armatur
+    bpy.ops.object.mode_set(mode="EDIT")
+
+    editbones = armatur.data.edit_bones
+    for name in names:
+        if name not in editbones:
+            editbones.new(name).tail = (0, 0, 1)
+    if remove_extra:
+        keep = set(names)
+        for bone in [bone for bone in editbones if bone.name not in keep]:
+            editbones.remove(bone)
+
+    # Spec rows in edit bone order, bones missing from the spec keep their values
+    order = {bone.name: i for i, bone in enumerate(editbones)}
+    rows = np.array([order[name] for name in names], dtype=np.int64)
+    for key, prop, width, dtype in (("head", "head", 3, np.float32), ("tail", "tail", 3, np.float32), ("roll", "roll", 1, np.float32), ("deform", "use_deform", 1, bool), ("envelope", "envelope_distance", 1, np.float32)):
+        values = np.empty(len(editbones) * width, dtype=dtype)
+        editbones.foreach_get(prop, values)
+        values = values.reshape(-1, width)
+        values[rows] = np.asarray(bones[key], dtype=dtype).reshape(-1, width)
+        editbones.foreach_set(prop, values.ravel())
+
+    collections = armatur.data.collections
+    for name, parent, connect, bone_collections in zip(names, bones["parent"], bones["connect"], bones["collections"]):
+        bone = editbones[name]
+        bone.parent = editbones[names[parent]] if parent >= 0 else None
+        bone.use_connect = bool(connect)
+        for collection_name in bone_collections:
+            (collections.get(collection_name) or collections.new(collection_name)).assign(bone)
+
+    bpy.ops.object.mode_set(mode="POSE")
+    pose_bones = armatur.pose.bones
+    for ik in spec["ik"]:
+        pose_bone = pose_bones[ik["bone"]]
+        con = pose_bone.constraints.get(ik["name"]) or pose_bone.constraints.new(type="IK")
+        con.name = ik["name"]
+        con.target = armatur
+        con.subtarget = ik["subtarget"]
+        con.pole_target = armatur if ik["pole_subtarget"] else None
+        con.pole_subtarget = ik["pole_subtarget"]
+        con.pole_angle = ik["pole_angle"]
+        con.chain_count = ik["chain_count"]
+        con.use_stretch = ik["use_stretch"]
+    for twist in spec["twist"]:
+        setup_twist_stack(armatur, twist["bones"], twist["source"], twist["kind"], twist["mode"])
+    bpy.ops.object.mode_set(mode="OBJECT")
+    return len(names)
+
+
+# ------------------- export / import --------------#
+class ExportRigSpec(bpy.types.Operator):
+    bl_idname = "fg.export_rig_spec"
+    bl_label = "export rig spec"
+    bl_description = "Save the fitted bone layout, IK and twist setup of the armature\n(.json to diff it, .npz for speed) to rebuild the rig later without mesh analysis\n"
+    bl_options = {"REGISTER"}
+
+    filepath: bpy.props.StringProperty(subtype="FILE_PATH")
+    filter_glob: bpy.props.StringProperty(default="*.json;*.npz", options={"HIDDEN"})
+
+    def invoke(self, context, event):
+        if not context.scene.my_armature:
+            self.report({"ERROR"}, "No armature set in the scene")
+            return {"CANCELLED"}
+        if not self.filepath:
+            self.filepath = bpy.path.ensure_ext(bpy.path.abspath(f"//{context.scene.my_armature.name}_rig"), ".json")
+        context.window_manager.fileselect_add(self)
+        return {"RUNNING_MODAL"}
+
+    def execute(self, context):
+        armatur = context.scene.my_armature
+        if not armatur:
+            self.report({"ERROR"}, "No armature set in the scene")
+            return {"CANCELLED"}
+        filepath = bpy.path.abspath(self.filepath)
+        if not filepath.endswith((".json", ".npz")):
+            filepath = bpy.path.ensure_ext(filepath, ".json")
+        mode = armatur.mode
+        if mode == "EDIT":
+            bpy.ops.object.mode_set(mode="OBJECT")  # edit bones are only written back when leaving edit mode
+        spec = collect_spec(armatur)
+        if mode == "EDIT":
+            bpy.ops.object.mode_set(mode=mode)
+        os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+        write_spec(spec, filepath)
+        self.report({"INFO"}, f"Saved {len(spec['bones']['names'])} bones to {filepath}")
+        return {"FINISHED"}
+
+
+class ImportRigSpec(bpy.types.Operator):
+    bl_idname = "fg.import_rig_spec"
+    bl_label = "import rig spec"
+    bl_description = "Rebuild the armature from a saved rig spec (.json or .npz) in one pass,\nno mesh analysis involved\n"
+    bl_options = {"REGISTER", "UNDO"}
+
+    filepath: bpy.props.StringProperty(subtype="FILE_PATH")
+    filter_glob: bpy.props.StringProperty(default="*.json;*.npz", options={"HIDDEN"})
+    remove_extra: bpy.props.BoolProperty(name="Remove Extra Bones", default=False, description="Delete bones of the armature that are not in the spec")
+
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {"RUNNING_MODAL"}
+
+    def execute(self, context):
+        armatur = context.scene.my_armature
+        if not armatur:
+            self.report({"ERROR"}, "No armature set in the scene")
+            return {"CANCELLED"}
+        try:
+            spec = read_spec(bpy.path.abspath(self.filepath))
+        except (OSError, ValueError, KeyError) as error:
+            self.report({"ERROR"}, f"Cannot read rig spec: {error}")
+            return {"CANCELLED"}
+        count = apply_spec(context, armatur, spec, self.remove_extra)
+        self.report({"INFO"}, f"Rebuilt {count} bones on {armatur.name}")
+        return {"FINISHED"}
+
+
+# ------------------ register -------------------#
+classes = [ExportRigSpec, ImportRigSpec]
+
+
+def register():
+
+    for cls in classes:
+        bpy.utils.register_class(cls)
+
+
+def unregister():
+
+    for cls in reversed(classes):
+        bpy.utils.unregister_class(cls)
+
+
+if __name__ == "__main__":
+    register()
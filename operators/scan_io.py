@@ -0,0 +1,359 @@
+import bpy
+import os
+import re
+
+from .lazy import lazy_import
+
+np = lazy_import("numpy")
+
+
+# ------------------- scan loading --------------#
+# Scans are read straight into numpy (n, 3) float32 vertices and (t, 3) int32 triangles,
+# without Blender's importers: binary PLY is memory-mapped, OBJ is streamed in blocks.
+PLY_TYPES = {
+    "char": "i1", "int8": "i1", "uchar": "u1", "uint8": "u1",
+    "short": "i2", "int16": "i2", "ushort": "u2", "uint16": "u2",
+    "int": "i4", "int32": "i4", "uint": "u4", "uint32": "u4",
+    "float": "f4", "float32": "f4", "double": "f8", "float64": "f8",
+}  # fmt: skip
+BLOCK = 1 << 26  # bytes of OBJ text parsed at once
+FACE_WINDOW = 1 << 20  # bytes of variable-size PLY face records scanned at once
+MAX_CORNERS = 64  # larger polygons are read too, one window each
+FACE_CHUNK = 1 << 18  # polygons gathered at once
+
+
+def fan_triangles(polygons):
+    """(f, k) polygon vertex indices -> (f * (k - 2), 3) triangles fanned around the first corner."""
+    k = polygons.shape[1]
+    if k == 3:
+        return polygons
+    fan = np.stack([np.zeros(k - 2, dtype=np.int64), np.arange(1, k - 1), np.arange(2, k)], axis=1)
+    return polygons[:, fan].reshape(-1, 3)
+
+
+def read_ply_header(file):
+    """Returns (format, [(element name, count, [(property name, type or (count type, item type))])], data offset)."""
+    if file.readline().strip() != b"ply":
+        raise ValueError("Not a PLY file")
+    fmt, elements = None, []
+    for line in iter(file.readline, b""):
+        words = line.decode("ascii", "replace").split()
+        if not words or words[0] in ("comment", "obj_info"):
+            continue
+        if words[0] == "format":
+            fmt = words[1]
+        elif words[0] == "element":
+            elements.append((words[1], int(words[2]), []))
+        elif words[0] == "property":
+            kind = (PLY_TYPES[words[2]], PLY_TYPES[words[3]]) if words[1] == "list" else PLY_TYPES[words[1]]
+            elements[-1][2].append((words[-1], kind))
+        elif words[0] == "end_header":
+            return fmt, elements, file.tell()
+    raise ValueError("PLY header has no end_header")
+
+
+def read_ply(filepath):
+    """
+    Vertices and triangles of a binary PLY. Fixed-size elements (vertices, all-triangle faces) are
+    memory-mapped, so the only memory used is the float32/int32 copy handed to the caller.
+    """
+    with open(filepath, "rb") as file:
+        fmt, elements, offset = read_ply_header(file)
+    if fmt not in ("binary_little_endian", "binary_big_endian"):
+        raise ValueError(f"PLY format {fmt} is not supported, save the scan as binary PLY")
+    order = "<" if fmt == "binary_little_endian" else ">"
+
+    co = tris = None
+    for name, count, properties in elements:
+        lists = [kind for _, kind in properties if isinstance(kind, tuple)]
+        if name == "face" and lists:
+            faces, size = _read_ply_faces(filepath, offset, count, properties, order)
+            tris = fan_triangles(faces) if faces.ndim == 2 else faces
+            offset += size
+            continue
+        if lists:
+            raise ValueError(f"PLY element {name} has list properties, cannot skip it")
+        dtype = np.dtype([(prop, order + kind) for prop, kind in properties])
+        if name == "vertex":
+            data = np.memmap(filepath, dtype=dtype, mode="r", offset=offset, shape=(count,))
+            co = np.empty((count, 3), dtype=np.float32)
+            for axis, prop in enumerate("xyz"):
+                co[:, axis] = data[prop]
+            del data
+        offset += dtype.itemsize * count
+    if co is None:
+        raise ValueError("PLY file has no vertex element")
+    return co, (tris if tris is not None else np.zeros((0, 3), dtype=np.int32)).astype(np.int32, copy=False)
+
+
+def _read_ply_faces(filepath, offset, count, properties, order):
+    """Face element -> ((f, k) polygons or (t, 3) triangles, size in bytes)."""
+    scalar = [(prop, order + kind) for prop, kind in properties if not isinstance(kind, tuple)]
+    count_type, index_type = next(kind for _, kind in properties if isinstance(kind, tuple))
+    if scalar or not count:
+        if not count:
+            return np.zeros((0, 3), dtype=np.int32), 0
+        raise ValueError("PLY faces with extra properties are not supported")
+    count_dtype, index_dtype = np.dtype(order + count_type), np.dtype(order + index_type)
+    first = np.memmap(filepath, dtype=count_dtype, mode="r", offset=offset, shape=(1,))
+    k = int(first[0])
+    # Fast path: every face has k corners, the element is a fixed-size record
+    dtype = np.dtype([("n", count_dtype), ("v", index_dtype, (k,))])
+    size = os.path.getsize(filepath) - offset
+    if size >= dtype.itemsize * count:
+        data = np.memmap(filepath, dtype=dtype, mode="r", offset=offset, shape=(count,))
+        if np.all(data["n"] == k):
+            return np.array(data["v"], dtype=np.int32), dtype.itemsize * count
+        del data
+    # Mixed polygon sizes: record offsets from the count fields, then corners gathered per polygon size
+    raw = np.memmap(filepath, dtype=np.uint8, mode="r", offset=offset)
+    starts = _record_starts(raw, count, count_dtype, index_dtype.itemsize)
+    sizes = _read_at(raw, starts, count_dtype)
+    # Triangles stay in file order: polygon i fans into the rows first[i] .. first[i] + fans[i] - 1
+    fans = np.maximum(sizes - 2, 0)
+    first = np.cumsum(fans) - fans
+    tris = np.empty((int(fans.sum()), 3), dtype=np.int32)
+    for k in np.flatnonzero(np.bincount(sizes)).tolist():
+        if k < 3:
+            continue
+        same = np.flatnonzero(sizes == k)
+        for begin in range(0, len(same), FACE_CHUNK):  # bounds the temporary gathers
+            polygons = same[begin : begin + FACE_CHUNK]
+            at = starts[polygons] + count_dtype.itemsize
+            corners = np.stack([_read_at(raw, at + i * index_dtype.itemsize, index_dtype) for i in range(k)], axis=1)
+            tris[(first[polygons, None] + np.arange(k - 2)).ravel()] = fan_triangles(corners)
+    end = int(starts[-1]) + count_dtype.itemsize + int(sizes[-1]) * index_dtype.itemsize
+    return tris, end
+
+
+def _read_at(raw, positions, dtype):
+    """Values of `dtype` stored at the byte `positions` of `raw`, unaligned reads in one gather."""
+    if dtype.itemsize == 1:
+        return raw[positions].view(dtype).astype(np.int64)
+    data = raw[positions[:, None] + np.arange(dtype.itemsize)]
+    return data.view(dtype).ravel().astype(np.int64)
+
+
+def _record_starts(raw, count, count_dtype, step, window=FACE_WINDOW):
+    """
+    Byte offsets of `count` face records (count field + corners) without a Python loop per face.
+    In a window of the file, the byte positions holding a plausible corner count are linked to the
+    record that would follow a record starting there, and the chain from the window's first record
+    is followed by pointer doubling: log(records) vectorized steps per window. A record of another
+    size ends the chain, the next window starts at it.
+    """
+    starts, pos = [], 0
+    while count:
+        size = len(raw) - pos
+        if size > window:
+            size = window
+        values = _read_at(raw[pos:], np.arange(max(size - count_dtype.itemsize + 1, 1)), count_dtype)
+        if values[0] < 0:
+            raise ValueError("PLY face has a negative corner count")
+        candidates = np.flatnonzero((values >= 3) & (values <= MAX_CORNERS))
+        candidates = np.concatenate([[0], candidates[candidates > 0]])  # the window starts on a record
+        ends = candidates + count_dtype.itemsize + values[candidates] * step
+        slot = np.full(size + 1, len(candidates), dtype=np.int64)  # candidate starting at each byte
+        slot[candidates] = np.arange(len(candidates))
+        jump = np.append(slot[np.minimum(ends, size)], len(candidates))
+        chain = np.zeros(1, dtype=np.int64)
+        while len(chain) < count:
+            more = jump[chain]
+            chain = np.concatenate([chain, more[more < len(candidates)]])
+            if more[-1] == len(candidates):
+                break
+            jump = jump[jump]
+        chain = chain[:count]
+        chain = chain[ends[chain] <= size]  # the last record may run past the window
+        if not len(chain):
+            if pos + size >= len(raw):
+                raise ValueError("PLY face element is truncated")
+            window *= 2  # a polygon larger than the window
+            continue
+        starts.append(candidates[chain] + pos)
+        count -= len(chain)
+        pos += int(ends[chain[-1]])
+    return np.concatenate(starts)
+
+
+def read_obj(filepath, block=BLOCK):
+    """
+    Vertices and triangles of an OBJ, parsed block by block. Vertex lines are counted first so the
+    vertex array is allocated once at its final size; texture/normal indices are dropped.
+    """
+    total, previous = 0, b"\n"
+    with open(filepath, "rb") as file:
+        for chunk in iter(lambda: file.read(block), b""):
+            total += (previous[-2:] + chunk).count(b"\nv ")  # the overlap catches "\nv " split by the block end
+            previous = chunk
+    co = np.empty((total, 3), dtype=np.float32)
+    filled = 0
+    faces = []
+    tail = b"\n"
+    with open(filepath, "rb") as file:
+        for chunk in iter(lambda: file.read(block), b""):
+            text = tail + chunk
+            cut = text.rfind(b"\n") + 1
+            text, tail = text[:cut], text[cut:]
+            filled = _parse_obj_block(text, co, filled, faces)
+        filled = _parse_obj_block(tail + b"\n", co, filled, faces)
+    co = co[:filled]
+    tris = np.concatenate(faces) if faces else np.zeros((0, 3), dtype=np.int32)
+    return co, tris
+
+
+def _parse_obj_block(text, co, filled, faces):
+    lines = text.split(b"\n")
+    is_vertex = np.fromiter((line.startswith(b"v ") for line in lines), dtype=bool, count=len(lines))
+    vertices = [lines[i][2:] for i in np.flatnonzero(is_vertex).tolist()]
+    # Vertices read before every line, relative (negative) face indices count back from there
+    before = filled + np.cumsum(is_vertex) - is_vertex
+    if vertices:
+        values = [line.split()[:3] for line in vertices]
+        co[filled : filled + len(values)] = np.array(values, dtype=np.float32)
+        filled += len(values)
+    rows = [i for i, line in enumerate(lines) if line.startswith(b"f ")]
+    polygons = [re.sub(rb"/\S*", b"", lines[i][2:]).split() for i in rows]
+    sizes = np.array([len(corners) for corners in polygons], dtype=np.int64)
+    before = before[rows]
+    # Group by corner count so each size is one array
+    for k in np.unique(sizes).tolist():
+        if k < 3:
+            continue
+        same = np.array([corners for corners in polygons if len(corners) == k], dtype=np.int64)
+        same = np.where(same < 0, same + before[sizes == k, None], same - 1)
+        faces.append(fan_triangles(same).astype(np.int32))
+    return filled
+
+
+READERS = {".ply": read_ply, ".obj": read_obj}
+
+
+def read_scan(filepath):
+    """(vertices, triangles) of a .ply or .obj scan."""
+    reader = READERS.get(os.path.splitext(filepath)[1].lower())
+    if not reader:
+        raise ValueError(f"Unsupported scan format: {filepath}")
+    return reader(filepath)
+
+
+# ------------------- mesh building --------------#
+def mesh_from_arrays(name, co, tris):
+    """Builds a Blender mesh from the arrays with bulk foreach_set calls, no per-vertex Python."""
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(len(co))
+    mesh.vertices.foreach_set("co", np.ascontiguousarray(co, dtype=np.float32).ravel())
+    mesh.loops.add(len(tris) * 3)
+    mesh.loops.foreach_set("vertex_index", np.ascontiguousarray(tris, dtype=np.int32).ravel())
+    mesh.polygons.add(len(tris))
+    mesh.polygons.foreach_set("loop_start", np.arange(0, len(tris) * 3, 3, dtype=np.int32))
+    mesh.update(calc_edges=True)
+    return mesh
+
+
+# Scan imported without its mesh: {"name", "co", "tris"}. The rig is fitted from the arrays, the mesh
+# is only built by the steps that weight or check the human (see scan_human)
+_scans = {}
+
+
+def pending_scan():
+    """(name, co, tris) of the scan imported without its mesh, None when there is none."""
+    return (_scans["name"], _scans["co"], _scans["tris"]) if _scans else None
+
+
+def scan_human(context):
+    """The scene human, built from the pending scan arrays the first time a step needs the mesh."""
+    scene = context.scene
+    if scene.my_object is None and _scans:
+        name, co, tris = pending_scan()
+        _scans.clear()
+        obj = bpy.data.objects.new(name, mesh_from_arrays(name, co, tris))
+        scene.collection.objects.link(obj)
+        scene.my_object = obj
+        print(f"{name}: mesh built ({len(co)} vertices)")
+    return scene.my_object
+
+
+# ------------------- import --------------#
+class ImportScan(bpy.types.Operator):
+    bl_idname = "fg.import_scan"
+    bl_label = "import scan"
+    bl_description = "Load PLY/OBJ scans straight into meshes without Blender's importers\n(memory-mapped binary PLY, streamed OBJ). Several files go into the batch collection\n"
+    bl_options = {"REGISTER", "UNDO"}
+
+    filepath: bpy.props.StringProperty(subtype="FILE_PATH")
+    directory: bpy.props.StringProperty(subtype="DIR_PATH")
+    files: bpy.props.CollectionProperty(type=bpy.types.OperatorFileListElement)
+    filter_glob: bpy.props.StringProperty(default="*.ply;*.obj", options={"HIDDEN"})
+    build_mesh: bpy.props.BoolProperty(
+        name="Build Mesh",
+        default=True,
+        description="Create the Blender mesh now. Off: only the arrays are kept, the rig is generated from them\nand the mesh is built when parenting or validation needs it (never for a rig spec export)",
+    )
+
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {"RUNNING_MODAL"}
+
+    def execute(self, context):
+        paths = [os.path.join(self.directory, file.name) for file in self.files if file.name] or [self.filepath]
+        if not self.build_mesh and len(paths) > 1:
+            self.report({"ERROR"}, "Scans without a mesh are loaded one at a time")
+            return {"CANCELLED"}
+        _scans.clear()
+        scene = context.scene
+        if context.object and context.object.mode != "OBJECT":
+            bpy.ops.object.mode_set(mode="OBJECT")
+        collection = context.collection
+        if len(paths) > 1:
+            collection = scene.fg_batch_collection or bpy.data.collections.new("Scans")
+            if not collection.users:
+                scene.collection.children.link(collection)
+            scene.fg_batch_collection = collection
+
+        objects = []
+        for path in paths:
+            path = bpy.path.abspath(path)
+            try:
+                co, tris = read_scan(path)
+            except (OSError, ValueError) as error:
+                self.report({"ERROR"}, f"Cannot read {os.path.basename(path)}: {error}")
+                return {"CANCELLED"}
+            name = os.path.splitext(os.path.basename(path))[0]
+            print(f"{name}: {len(co)} vertices, {len(tris)} triangles")
+            if not self.build_mesh:
+                _scans.update(name=name, co=co, tris=tris)
+                scene.my_object = None
+                self.report({"INFO"}, f"Loaded {name} without a mesh")
+                return {"FINISHED"}
+            obj = bpy.data.objects.new(name, mesh_from_arrays(name, co, tris))
+            collection.objects.link(obj)
+            objects.append(obj)
+
+        bpy.ops.object.select_all(action="DESELECT")
+        for obj in objects:
+            obj.select_set(True)
+        context.view_layer.objects.active = objects[-1]
+        scene.my_object = objects[-1]
+        self.report({"INFO"}, f"Loaded {len(objects)} scan(s)")
+        return {"FINISHED"}
+
+
+# ------------------ register -------------------#
+classes = [ImportScan]
+
+
+def register():
+
+    for cls in classes:
+        bpy.utils.register_class(cls)
+
+
+def unregister():
+
+    for cls in reversed(classes):
+        bpy.utils.unregister_class(cls)
+
+
+if __name__ == "__main__":
+    register()
@@ -0,0 +1,106 @@
+from .lazy import lazy_import
+from .slicing import narrowest
+
+np = lazy_import("numpy")
+
+
+# ------------------- skeleton prior --------------#
+# Joint heights of the metarig spine chain (spine head ... spine.006 tail) as fractions of the body
+# segment they live in, instead of fixed multiples of height / 57. Children and stylized characters
+# differ mostly in head size, which the separate neck -> top segment absorbs.
+TORSO = (0.0, 0.205, 0.359, 0.667, 1.0)  # spine, .001, .002, .003, .004 heads: pelvis -> neck base
+HEAD = (0.0, 0.167, 0.389, 1.0)  # .004, .005, .006 heads, .006 tail: neck base -> top of the head
+PELVIS = 0.07  # spine head above the crotch, as a share of crotch -> neck base
+ARMPIT = 0.9  # armpit height, as a share of the torso
+# Residual weights: measured features, prior proportions, heuristic initialization
+FEATURES = {"neck_base": (4, 3.0), "neck": (5, 1.0), "chin": (6, 2.0), "top": (7, 5.0)}
+PRIOR_WEIGHT = 1.0
+INIT_WEIGHT = 0.05
+MIN_SEGMENT = 0.02  # shortest spine bone, as a share of the initial chain length
+
+
+class SkeletonFit:
+    """Solved spine joint heights (8,) with the features they were fitted to."""
+
+    def __init__(self, spine, features, residual):
+        self.spine = spine
+        self.features = features
+        self.residual = residual
+
+    def torso(self, fraction):
+        """Height at `fraction` of the way from the spine head to the neck base."""
+        return float(self.spine[0] + (self.spine[4] - self.spine[0]) * fraction)
+
+
+def measure_features(sections, midx, column_y, top_z):
+    """
+    Neck, neck base and chin heights from the horizontal cross-sections of the head column:
+    the neck is its thinnest loop, the neck base is where the loop widens past 1.6 necks on the
+    way down, the chin where the front of the loop moves half a neck depth forward on the way up.
+    """
+    features = {"top": float(top_z)}
+    column = sections.containing((midx, column_y))
+    heights = sections.heights
+    bottom = heights[0] + (top_z - heights[0]) * 0.55  # upper part of the body only
+    upper = np.where((heights > bottom) & (heights < top_z), column, -1)
+    neck_row = narrowest(sections, upper)
+    if neck_row < 0:
+        return features
+    neck_plane = int(sections.plane[neck_row])
+    features["neck"] = float(heights[neck_plane])
+    half_width = sections.hi[neck_row, 0] - midx
+    depth = sections.width[neck_row, 1]
+
+    plane = neck_plane
+    while plane > 0 and column[plane - 1] >= 0 and sections.hi[column[plane - 1], 0] - midx < half_width * 1.6:
+        plane -= 1
+    if plane > 0 and column[plane - 1] >= 0:
+        features["neck_base"] = float(heights[plane])
+
+    front = sections.lo[neck_row, 1]
+    for plane in range(neck_plane + 1, len(heights)):
+        row = column[plane]
+        if row < 0 or heights[plane] >= top_z:
+            break
+        if sections.lo[row, 1] < front - depth * 0.5:
+            features["chin"] = float(heights[plane])
+            break
+    return features
+
+
+def fit_spine_heights(features, crotch_z, init):
+    """
+    One weighted linear least-squares solve for the 8 spine joint heights: measured features pull
+    their joints, the prior proportions tie every joint to its segment ends, the old heuristic layout
+    (`init`) only keeps the system determined when features are missing.
+    """
+    rows, rhs, weights = [], [], []
+
+    def add(coefficients, value, weight):
+        row = np.zeros(8)
+        for joint, c in coefficients:
+            row[joint] += c
+        rows.append(row)
+        rhs.append(value)
+        weights.append(weight)
+
+    for name, (joint, weight) in FEATURES.items():
+        if features.get(name) is not None:
+            add([(joint, 1.0)], features[name], weight)
+    add([(0, 1.0), (4, -PELVIS)], (1 - PELVIS) * crotch_z, FEATURES["neck_base"][1])
+    for joint, fraction in zip(range(1, 4), TORSO[1:4]):
+        add([(joint, 1.0), (0, -(1 - fraction)), (4, -fraction)], 0.0, PRIOR_WEIGHT)
+    for joint, fraction in zip(range(5, 7), HEAD[1:3]):
+        add([(joint, 1.0), (4, -(1 - fraction)), (7, -fraction)], 0.0, PRIOR_WEIGHT)
+    for joint, value in enumerate(init):
+        add([(joint, 1.0)], value, INIT_WEIGHT)
+
+    w = np.sqrt(np.array(weights))
+    a = np.array(rows) * w[:, None]
+    b = np.array(rhs) * w
+    spine, *_ = np.linalg.lstsq(a, b, rcond=None)
+    # Joints never go down the chain, nor meet: Blender deletes zero-length bones when leaving edit mode
+    gap = MIN_SEGMENT * (init[-1] - init[0])
+    for joint in range(1, len(spine)):
+        spine[joint] = max(spine[joint], spine[joint - 1] + gap)
+    return SkeletonFit(spine, features, float(np.linalg.norm(a @ spine - b)))
@@ -0,0 +1,203 @@
+import bpy
+import os
+import struct
+
+from .lazy import lazy_import
+from .weights import read_weights_csr, write_weights_csr
+
+np = lazy_import("numpy")
+
+
+# ------------------- skin weight files --------------#
+# Little endian, every array 8-byte aligned so the file can be memory-mapped as is:
+#   header   "FGSW", version, kind, vertex count, bone count, k, nnz   (<4sIIIIIQ, 32 bytes)
+#   bones    per bone: u16 byte length + utf-8 name
+#   CSR      indptr u64 (n+1), bone indices u16 (nnz), weights f32 (nnz)
+#   TOPK     bone indices u16 (n*k), weights u8 (n*k), a vertex's weights sum to 255
+MAGIC = b"FGSW"
+VERSION = 1
+KIND_CSR, KIND_TOPK = 0, 1
+HEADER = struct.Struct("<4sIIIIIQ")
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def top_k(indptr, groups, weights, k):
+    """Keeps the k largest influences per vertex, renormalized and quantized to uint8 summing to 255."""
+    n = len(indptr) - 1
+    dense = np.zeros((n, k), dtype=np.float32)
+    bones = np.zeros((n, k), dtype=np.uint16)
+    rows = np.repeat(np.arange(n), np.diff(indptr))
+    # Rank of every entry inside its vertex, biggest weight first
+    order = np.lexsort((-weights, rows))
+    rank = np.arange(len(order)) - indptr[rows[order]]
+    keep = order[rank < k]
+    slot = rank[rank < k]
+    dense[rows[keep], slot] = weights[keep]
+    bones[rows[keep], slot] = groups[keep]
+
+    total = dense.sum(axis=1, keepdims=True)
+    scaled = np.divide(dense * 255, total, out=np.zeros_like(dense), where=total > 0)
+    quant = np.floor(scaled).astype(np.int32)
+    # Largest remainder: hand the rounding loss to the biggest fractions so every vertex sums to 255
+    missing = np.where(total[:, 0] > 0, 255 - quant.sum(axis=1), 0)
+    by_fraction = np.argsort(-(scaled - quant), axis=1)
+    for j in range(k):
+        give = missing > j
+        quant[give, by_fraction[give, j]] += 1
+    return bones, quant.astype(np.uint8)
+
+
+def write_skin(filepath, names, indptr, groups, weights, k=0):
+    n = len(indptr) - 1
+    table = b"".join(struct.pack("<H", len(raw)) + raw for raw in (name.encode() for name in names))
+    if k:
+        bones, values = top_k(indptr, groups, weights, k)
+        arrays = [bones, values]
+        header = HEADER.pack(MAGIC, VERSION, KIND_TOPK, n, len(names), k, n * k)
+    else:
+        arrays = [indptr.astype("<u8"), groups.astype("<u2"), weights.astype("<f4")]
+        header = HEADER.pack(MAGIC, VERSION, KIND_CSR, n, len(names), 0, len(weights))
+    with open(filepath, "wb") as file:
+        file.write(header)
+        file.write(table)
+        for array in arrays:
+            file.write(b"\0" * (_align(file.tell()) - file.tell()))
+            file.write(np.ascontiguousarray(array).tobytes())
+
+
+def read_skin(filepath):
+    """
+    Maps a skin weight file without reading it: returns (names, arrays, k) with arrays memory-mapped,
+    (indptr, bone indices, weights) for CSR files and (bone indices (n, k), uint8 weights (n, k)) for top-k.
+    """
+    with open(filepath, "rb") as file:
+        magic, version, kind, n, bone_count, k, nnz = HEADER.unpack(file.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError("Not a skin weight file")
+        if version > VERSION:
+            raise ValueError(f"Skin weight file version {version} is newer than this add-on ({VERSION})")
+        names = []
+        for _ in range(bone_count):
+            (length,) = struct.unpack("<H", file.read(2))
+            names.append(file.read(length).decode())
+        offset = file.tell()
+
+    def mapped(dtype, shape):
+        nonlocal offset
+        offset = _align(offset)
+        array = np.memmap(filepath, dtype=dtype, mode="r", offset=offset, shape=shape) if np.prod(shape) else np.empty(shape, dtype=dtype)
+        offset += int(np.prod(shape)) * np.dtype(dtype).itemsize
+        return array
+
+    if kind == KIND_TOPK:
+        return names, (mapped("<u2", (n, k)), mapped("u1", (n, k))), k
+    return names, (mapped("<u8", (n + 1,)), mapped("<u2", (nnz,)), mapped("<f4", (nnz,))), 0
+
+
+def topk_to_csr(bones, values):
+    keep = values > 0
+    indptr = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum(keep.sum(axis=1), out=indptr[1:])
+    return indptr, bones[keep], values[keep].astype(np.float32) / 255
+
+
+# ------------------- export / import --------------#
+FORMATS = [
+    ("CSR", "All Influences", "Every weight as float32 (CSR). Importing rounds them to 1/4095 steps and drops weights below 1/8190"),
+    ("TOP4", "4 x uint8", "4 strongest influences per vertex, 8-bit weights summing to 255"),
+    ("TOP8", "8 x uint8", "8 strongest influences per vertex, 8-bit weights summing to 255"),
+]
+
+
+class ExportSkinWeights(bpy.types.Operator):
+    bl_idname = "fg.export_skin_weights"
+    bl_label = "export skin weights"
+    bl_description = "Write every vertex group weight of the human to a compact binary file (.fgsw)\nthat engines and tools can memory-map\n"
+    bl_options = {"REGISTER"}
+
+    filepath: bpy.props.StringProperty(subtype="FILE_PATH")
+    filter_glob: bpy.props.StringProperty(default="*.fgsw", options={"HIDDEN"})
+    format: bpy.props.EnumProperty(name="Format", items=FORMATS, default="CSR")
+
+    def invoke(self, context, event):
+        if not self.filepath and context.scene.my_object:
+            self.filepath = bpy.path.abspath(f"//{context.scene.my_object.name}.fgsw")
+        context.window_manager.fileselect_add(self)
+        return {"RUNNING_MODAL"}
+
+    def execute(self, context):
+        human = context.scene.my_object
+        if not human or not human.vertex_groups:
+            self.report({"ERROR"}, "The human has no vertex groups, use Auto Parent first")
+            return {"CANCELLED"}
+        if human.mode == "EDIT":
+            human.update_from_editmode()
+        filepath = bpy.path.ensure_ext(bpy.path.abspath(self.filepath), ".fgsw")
+        os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+        indptr, groups, weights = read_weights_csr(human.data)
+        k = int(self.format[3:]) if self.format != "CSR" else 0
+        write_skin(filepath, [g.name for g in human.vertex_groups], indptr, groups, weights, k)
+        self.report({"INFO"}, f"Saved {len(weights)} weights of {len(indptr) - 1} vertices to {filepath}")
+        return {"FINISHED"}
+
+
+class ImportSkinWeights(bpy.types.Operator):
+    bl_idname = "fg.import_skin_weights"
+    bl_label = "import skin weights"
+    bl_description = "Restore the vertex groups of the human from a skin weight file (.fgsw)\n"
+    bl_options = {"REGISTER", "UNDO"}
+
+    filepath: bpy.props.StringProperty(subtype="FILE_PATH")
+    filter_glob: bpy.props.StringProperty(default="*.fgsw", options={"HIDDEN"})
+    replace: bpy.props.BoolProperty(name="Replace", default=True, description="Clear the groups found in the file before adding its weights")
+
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {"RUNNING_MODAL"}
+
+    def execute(self, context):
+        human = context.scene.my_object
+        if not human:
+            self.report({"ERROR"}, "No object set in the scene")
+            return {"CANCELLED"}
+        try:
+            names, arrays, k = read_skin(bpy.path.abspath(self.filepath))
+        except (OSError, ValueError, struct.error) as error:
+            self.report({"ERROR"}, f"Cannot read skin weights: {error}")
+            return {"CANCELLED"}
+        indptr, groups, weights = topk_to_csr(*arrays) if k else arrays
+        if len(indptr) - 1 != len(human.data.vertices):
+            self.report({"ERROR"}, f"File has {len(indptr) - 1} vertices, {human.name} has {len(human.data.vertices)}")
+            return {"CANCELLED"}
+        mode = human.mode
+        if mode != "OBJECT":
+            bpy.ops.object.mode_set(mode="OBJECT")
+        write_weights_csr(human, names, np.asarray(indptr), np.asarray(groups), np.asarray(weights), self.replace)
+        human.data.update()
+        if mode != "OBJECT":
+            bpy.ops.object.mode_set(mode=mode)
+        self.report({"INFO"}, f"Restored {len(names)} vertex groups on {human.name}")
+        return {"FINISHED"}
+
+
+# ------------------ register -------------------#
+classes = [ExportSkinWeights, ImportSkinWeights]
+
+
+def register():
+
+    for cls in classes:
+        bpy.utils.register_class(cls)
+
+
+def unregister():
+
+    for cls in reversed(classes):
+        bpy.utils.unregister_class(cls)
+
+
+if __name__ == "__main__":
+    register()
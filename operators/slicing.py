@@ -0,0 +1,206 @@
+from .lazy import lazy_import
+from .mesh_index import connected_components
+
+np = lazy_import("numpy")
+
+
+# ------------------- triangles --------------#
+def read_triangles(mesh):
+    """Vertex indices of the mesh loop triangles as a (t, 3) int32 array."""
+    mesh.calc_loop_triangles()
+    tris = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+    mesh.loop_triangles.foreach_get("vertices", tris)
+    return tris.reshape(-1, 3)
+
+
+# Plane coordinates (u, v) for slicing across each axis, right handed with the axis as normal
+PLANE_AXES = {0: (1, 2), 1: (2, 0), 2: (0, 1)}
+
+
+# ------------------- slicing --------------#
+class Sections:
+    """
+    Closed contours of a mesh cut by parallel planes, one row per contour loop.
+
+    plane: index of the cutting plane, height: its position along the axis,
+    area / perimeter / centroid (3D) / lo, hi (bounding extents in plane coordinates u, v).
+    Areas are signed by the face winding: outer surfaces positive, holes negative.
+    """
+
+    def __init__(self, axis, heights, plane, area, perimeter, centroid, lo, hi):
+        self.axis = axis
+        self.heights = heights
+        self.plane = plane
+        self.area = area
+        self.perimeter = perimeter
+        self.centroid = centroid
+        self.lo = lo
+        self.hi = hi
+
+    def __len__(self):
+        return len(self.plane)
+
+    @property
+    def width(self):
+        return self.hi - self.lo
+
+    def loop_counts(self):
+        """Number of loops in every plane (e.g. 1 at the neck, 3 at the waist with arms down)."""
+        return np.bincount(self.plane, minlength=len(self.heights))
+
+    def at(self, plane):
+        """Rows of the loops of one plane."""
+        return np.flatnonzero(self.plane == plane)
+
+    def containing(self, point):
+        """Per plane, the row of the loop whose extents contain `point` (u, v), -1 if none."""
+        u, v = point
+        inside = (self.lo[:, 0] <= u) & (u <= self.hi[:, 0]) & (self.lo[:, 1] <= v) & (v <= self.hi[:, 1])
+        rows = np.full(len(self.heights), -1, dtype=np.int64)
+        # Smallest containing loop wins, so the torso does not swallow an arm next to it
+        for row in np.flatnonzero(inside)[np.argsort(-np.abs(self.area[inside]))]:
+            rows[self.plane[row]] = row
+        return rows
+
+
+def slice_mesh(co, tris, heights, axis=2):
+    """
+    Cuts the triangle mesh with the planes co[axis] == heights in one vectorized pass over the faces.
+
+    Every triangle is paired with the planes between its lowest and highest vertex, the two crossed
+    edges of each pair give one contour segment. Segments meet on shared mesh edges, which links
+    them into loops without sorting points. Area and centroid come from Green's theorem on the
+    directed segments, so the loops never need to be walked in order.
+    """
+    heights = np.asarray(heights, dtype=np.float64)
+    co = np.asarray(co, dtype=np.float64)
+    u_axis, v_axis = PLANE_AXES[axis]
+    order = np.argsort(heights)
+    sorted_heights = heights[order]
+
+    d_all = co[:, axis]
+    tri_d = d_all[tris]
+    first = np.searchsorted(sorted_heights, tri_d.min(axis=1), side="left")
+    last = np.searchsorted(sorted_heights, tri_d.max(axis=1), side="right")
+    spans = last - first
+    tri = np.repeat(np.arange(len(tris)), spans)
+    plane_sorted = np.repeat(first, spans) + (np.arange(len(tri)) - np.repeat(np.cumsum(spans) - spans, spans))
+    if not len(tri):
+        return _empty_sections(axis, heights)
+    h = sorted_heights[plane_sorted]
+
+    # Signed distances, vertices exactly on a plane count as above it
+    corners = tris[tri]
+    d = tri_d[tri] - h[:, None]
+    above = d >= 0
+    edges = np.array([[0, 1], [1, 2], [2, 0]])
+    crosses = above[:, edges[:, 0]] != above[:, edges[:, 1]]
+    keep = crosses.sum(axis=1) == 2
+    corners, d, crosses, tri, plane_sorted = corners[keep], d[keep], crosses[keep], tri[keep], plane_sorted[keep]
+
+    # The two crossed edges of each pair, as (start, end) corner slots
+    which = np.argsort(~crosses, axis=1, kind="stable")[:, :2]
+    slot_a, slot_b = edges[which[:, 0]], edges[which[:, 1]]
+    rows = np.arange(len(tri))[:, None]
+    ends = []
+    keys = []
+    for slots in (slot_a, slot_b):
+        i, j = corners[rows, slots[:, :1]][:, 0], corners[rows, slots[:, 1:]][:, 0]
+        di, dj = d[rows, slots[:, :1]][:, 0], d[rows, slots[:, 1:]][:, 0]
+        t = di / (di - dj)
+        ends.append(co[i] + (co[j] - co[i]) * t[:, None])
+        keys.append((np.minimum(i, j).astype(np.int64) * len(co) + np.maximum(i, j)) * len(heights) + plane_sorted)
+    p, q = ends
+
+    # Direct segments counter-clockwise around the outside: along axis x face normal
+    normal = np.cross(co[corners[:, 1]] - co[corners[:, 0]], co[corners[:, 2]] - co[corners[:, 0]])
+    axis_vec = np.zeros(3)
+    axis_vec[axis] = 1.0
+    flip = ((q - p) * np.cross(axis_vec, normal)).sum(axis=1) < 0
+    p, q = np.where(flip[:, None], q, p), np.where(flip[:, None], p, q)
+
+    # Loops: segment ends shared through mesh edges
+    nodes, inverse = np.unique(np.concatenate(keys), return_inverse=True)
+    count = len(tri)
+    labels = connected_components(len(nodes), inverse[:count], inverse[count:])
+    loop_ids, loop = np.unique(labels[inverse[:count]], return_inverse=True)
+    loops = len(loop_ids)
+
+    pu, pv, qu, qv = p[:, u_axis], p[:, v_axis], q[:, u_axis], q[:, v_axis]
+    cross = pu * qv - qu * pv
+    area = np.bincount(loop, cross, loops) / 2
+    safe = np.where(np.abs(area) > 1e-12, area, 1e-12)
+    cu = np.bincount(loop, (pu + qu) * cross, loops) / (6 * safe)
+    cv = np.bincount(loop, (pv + qv) * cross, loops) / (6 * safe)
+    perimeter = np.bincount(loop, np.linalg.norm(q - p, axis=1), loops)
+
+    lo = np.full((loops, 2), np.inf)
+    hi = np.full((loops, 2), -np.inf)
+    for k, values in enumerate((pu, pv)):
+        np.minimum.at(lo[:, k], loop, values)
+        np.maximum.at(hi[:, k], loop, values)
+
+    plane = np.zeros(loops, dtype=np.int64)
+    plane[loop] = order[plane_sorted]
+    centroid = np.zeros((loops, 3))
+    centroid[:, axis] = heights[plane]
+    centroid[:, u_axis] = cu
+    centroid[:, v_axis] = cv
+    return Sections(axis, heights, plane, area, perimeter, centroid, lo, hi)
+
+
+def splice_sections(sections, planes, update):
+    """`sections` with the loops of `planes` replaced by `update`, sliced at sections.heights[planes] only."""
+    keep = ~np.isin(sections.plane, planes)
+
+    def join(old, new):
+        return np.concatenate([old[keep], new])
+
+    return Sections(
+        sections.axis, sections.heights, join(sections.plane, planes[update.plane]), join(sections.area, update.area),
+        join(sections.perimeter, update.perimeter), join(sections.centroid, update.centroid), join(sections.lo, update.lo), join(sections.hi, update.hi),
+    )
+
+
+def _empty_sections(axis, heights):
+    return Sections(axis, heights, np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0), np.zeros((0, 3)), np.zeros((0, 2)), np.zeros((0, 2)))
+
+
+def slice_along(co, tris, origin, direction, offsets):
+    """
+    Limb-aligned slicing: planes perpendicular to `direction` at `offsets` from `origin`.
+    Returned centroids are back in the input space, extents are in the local plane frame.
+    """
+    direction = np.asarray(direction, dtype=np.float64)
+    direction /= np.linalg.norm(direction)
+    helper = np.array([1.0, 0.0, 0.0]) if abs(direction[0]) < 0.9 else np.array([0.0, 1.0, 0.0])
+    u = np.cross(helper, direction)
+    u /= np.linalg.norm(u)
+    v = np.cross(direction, u)
+    basis = np.stack([u, v, direction])
+    local = (np.asarray(co, dtype=np.float64) - origin) @ basis.T
+    sections = slice_mesh(local, tris, offsets, axis=2)
+    sections.centroid = sections.centroid @ basis + origin
+    return sections
+
+
+# ------------------- profiles --------------#
+def profile(sections, reduce="max"):
+    """Per plane width along u of the loops (largest loop with "max"), NaN where the plane is empty."""
+    widths = np.full(len(sections.heights), np.nan)
+    for plane in range(len(sections.heights)):
+        rows = sections.at(plane)
+        if len(rows):
+            widths[plane] = getattr(np, reduce)(sections.width[rows, 0])
+    return widths
+
+
+def narrowest(sections, rows):
+    """Row (among `rows`, one loop per plane) of the thinnest contour, e.g. the neck on the head column."""
+    rows = rows[rows >= 0]
+    return rows[np.argmin(np.abs(sections.area[rows]))] if len(rows) else -1
+
+
+def widest(sections, rows):
+    rows = rows[rows >= 0]
+    return rows[np.argmax(sections.width[rows, 0])] if len(rows) else -1
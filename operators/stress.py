@@ -0,0 +1,227 @@
+import bpy
+
+from .lazy import lazy_import
+from .slicing import read_triangles
+from .weights import read_coords, read_weights_csr
+
+np = lazy_import("numpy")
+
+
+# ------------------- pose library --------------#
+# pose -> [(bone, rotation axis in rest armature space, degrees)], rotations happen about the bone head.
+# Names without a side are posed on both sides, the .R axis mirrored across x.
+POSES = {
+    "ARM_RAISE": [("upper_arm", (0, -1, 0), 70)],
+    "ARM_FORWARD": [("upper_arm", (0, 0, -1), 80)],
+    "ELBOW_BEND": [("forearm", (0, 0, -1), 120)],
+    "WRIST_BEND": [("hand", (0, -1, 0), 60)],
+    "KNEE_BEND": [("shin", (1, 0, 0), 100)],
+    "SQUAT": [("thigh", (-1, 0, 0), 100), ("shin", (1, 0, 0), 120), ("foot", (-1, 0, 0), 20)],
+    "LEG_SPREAD": [("thigh", (0, 1, 0), 45)],
+    "BEND_FORWARD": [("spine.001", (1, 0, 0), 20), ("spine.002", (1, 0, 0), 20), ("spine.003", (1, 0, 0), 20)],
+    "TWIST": [("spine.001", (0, 0, 1), 15), ("spine.002", (0, 0, 1), 15), ("spine.003", (0, 0, 1), 15)],
+    "HEAD_TURN": [("spine.004", (0, 0, 1), 30), ("spine.005", (0, 0, 1), 30)],
+}
+STRETCH_LIMIT = 0.5  # edge strain counted as fully bad
+COLOR_ATTRIBUTE = "fg_stress"
+
+
+def rotation_about(point, axis, degrees):
+    """4x4 rotation of `degrees` about the line through `point` along `axis`."""
+    axis = np.asarray(axis, dtype=np.float64)
+    axis = axis / np.linalg.norm(axis)
+    angle = np.radians(degrees)
+    k = np.array([[0, -axis[2], axis[1]], [axis[2], 0, -axis[0]], [-axis[1], axis[0], 0]])
+    rotation = np.eye(3) + np.sin(angle) * k + (1 - np.cos(angle)) * k @ k
+    matrix = np.eye(4)
+    matrix[:3, :3] = rotation
+    matrix[:3, 3] = point - rotation @ point
+    return matrix
+
+
+def pose_deltas(names, parents, heads, pose):
+    """
+    Skinning matrices (b, 4, 4) of one pose in rest armature space: every bone carries its parent's
+    delta, then its own rotation about its rest head. `parents` index `names` (-1: root), parents first.
+    """
+    local = {}
+    for base, axis, degrees in pose:
+        if base in names:
+            local[base] = (axis, degrees)
+            continue
+        local[base + ".L"] = (axis, degrees)
+        local[base + ".R"] = ((axis[0], -axis[1], -axis[2]), degrees)
+    deltas = np.tile(np.eye(4), (len(names), 1, 1))
+    for b, name in enumerate(names):
+        if parents[b] >= 0:
+            deltas[b] = deltas[parents[b]]
+        if name in local:
+            deltas[b] = deltas[b] @ rotation_about(heads[b], *local[name])
+    return deltas
+
+
+# ------------------- skinning --------------#
+def linear_blend(co, indptr, bones, weights, deltas):
+    """
+    Linear blend skinning of (n, 3) rest coordinates: per vertex the weight-normalized sum of its
+    bones' 3x4 matrices, summed over the CSR rows with reduceat. Returns (posed (n, 3), blended (n, 3, 3)).
+    Vertices without deforming weights stay in place, like the armature modifier.
+    """
+    flat = deltas[:, :3, :].reshape(len(deltas), 12)
+    rows = np.diff(indptr) > 0
+    contrib = flat[bones] * weights[:, None]
+    blend = np.zeros((len(co), 12))
+    total = np.zeros(len(co))
+    if len(weights):
+        starts = indptr[:-1][rows]
+        blend[rows] = np.add.reduceat(contrib, starts, axis=0)
+        total[rows] = np.add.reduceat(weights, starts)
+    moving = total > 0
+    blend[moving] /= total[moving, None]
+    blend[~moving] = np.eye(4)[:3].ravel()
+    blend = blend.reshape(-1, 3, 4)
+    posed = np.einsum("nij,nj->ni", blend[:, :, :3], co) + blend[:, :, 3]
+    return posed, blend[:, :, :3]
+
+
+def triangle_normals(co, tris):
+    return np.cross(co[tris[:, 1]] - co[tris[:, 0]], co[tris[:, 2]] - co[tris[:, 0]])
+
+
+def deformation_metrics(rest, posed, blended, edges, tris):
+    """
+    Per vertex (stretch, area loss, folded) of one pose: worst edge strain, worst shrink of the incident
+    triangle areas and whether an incident triangle turned against its skinned rest normal
+    (a cheap self-intersection proxy). Also returns the volume ratio of the whole mesh.
+    """
+    count = len(rest)
+    rest_len = np.linalg.norm(rest[edges[:, 0]] - rest[edges[:, 1]], axis=1)
+    posed_len = np.linalg.norm(posed[edges[:, 0]] - posed[edges[:, 1]], axis=1)
+    strain = np.abs(posed_len / np.maximum(rest_len, 1e-12) - 1)
+    stretch = np.zeros(count)
+    np.maximum.at(stretch, edges[:, 0], strain)
+    np.maximum.at(stretch, edges[:, 1], strain)
+
+    rest_n, posed_n = triangle_normals(rest, tris), triangle_normals(posed, tris)
+    rest_area, posed_area = np.linalg.norm(rest_n, axis=1), np.linalg.norm(posed_n, axis=1)
+    shrink = np.clip(1 - posed_area / np.maximum(rest_area, 1e-12), 0, 1)
+    expected = np.einsum("tij,tj->ti", blended[tris[:, 0]], rest_n)
+    flipped = (expected * posed_n).sum(axis=1) < 0
+    area_loss = np.zeros(count)
+    folded = np.zeros(count, dtype=bool)
+    for k in range(3):
+        np.maximum.at(area_loss, tris[:, k], shrink)
+        folded[tris[flipped, k]] = True
+
+    def volume(co):
+        return (co[tris[:, 0]] * np.cross(co[tris[:, 1]], co[tris[:, 2]])).sum() / 6
+
+    rest_volume = volume(rest)
+    ratio = volume(posed) / rest_volume if abs(rest_volume) > 1e-12 else 1.0
+    return stretch, area_loss, folded, ratio
+
+
+def stress_test(human, armatur, poses=None):
+    """
+    Skins the human for every pose of the library in numpy and returns (per vertex badness 0..1,
+    [(pose, mean stretch, mean area loss, folded share, volume ratio)]).
+    """
+    mesh = human.data
+    rest = read_coords(mesh).astype(np.float64)
+    tris = read_triangles(mesh).astype(np.int64)
+    edges = np.empty(len(mesh.edges) * 2, dtype=np.int64)
+    mesh.edges.foreach_get("vertices", edges)
+    edges = edges.reshape(-1, 2)
+
+    # Every bone carries the pose down the hierarchy (parents first), deform bones take the weights
+    bones = sorted(armatur.data.bones, key=lambda bone: len(bone.parent_recursive))
+    names = [bone.name for bone in bones]
+    order = {name: b for b, name in enumerate(names)}
+    parents = [order[bone.parent.name] if bone.parent else -1 for bone in bones]
+    group_bone = np.array([order[g.name] if g.name in order and bones[order[g.name]].use_deform else -1 for g in human.vertex_groups], dtype=np.int64)
+    indptr, groups, weights = read_weights_csr(mesh)
+    rows = np.repeat(np.arange(len(rest)), np.diff(indptr))
+    bone_of = group_bone[groups.astype(np.int64)]
+    keep = (bone_of >= 0) & (weights > 0)
+    rows, bone_of, weights = rows[keep], bone_of[keep], weights[keep].astype(np.float64)
+    indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=len(rest)))])
+
+    # Rest armature space -> mesh space
+    to_mesh = np.array(human.matrix_world.inverted() @ armatur.matrix_world)
+    to_arm = np.linalg.inv(to_mesh)
+    heads = np.array([bone.head_local for bone in bones], dtype=np.float64).reshape(-1, 3)
+
+    badness = np.zeros(len(rest))
+    summary = []
+    for name in poses or POSES:
+        deltas = to_mesh @ pose_deltas(names, parents, heads, POSES[name]) @ to_arm
+        posed, blended = linear_blend(rest, indptr, bone_of, weights, deltas)
+        stretch, area_loss, folded, ratio = deformation_metrics(rest, posed, blended, edges, tris)
+        score = np.maximum(np.minimum(stretch / STRETCH_LIMIT, 1), area_loss)
+        score[folded] = 1.0
+        np.maximum(badness, score, out=badness)
+        summary.append((name, float(stretch.mean()), float(area_loss.mean()), float(folded.mean()), float(ratio)))
+    return badness, summary
+
+
+def write_heatmap(mesh, badness, name=COLOR_ATTRIBUTE):
+    """Green (fine) to red (bad) point color attribute, written in one foreach_set."""
+    attribute = mesh.color_attributes.get(name)
+    if attribute and (attribute.domain != "POINT" or attribute.data_type != "FLOAT_COLOR"):
+        mesh.color_attributes.remove(attribute)
+        attribute = None
+    attribute = attribute or mesh.color_attributes.new(name, "FLOAT_COLOR", "POINT")
+    colors = np.ones((len(badness), 4), dtype=np.float32)
+    colors[:, 0] = np.clip(badness * 2, 0, 1)
+    colors[:, 1] = np.clip(2 - badness * 2, 0, 1)
+    colors[:, 2] = 0
+    attribute.data.foreach_set("color", colors.ravel())
+    mesh.color_attributes.active_color = attribute
+    mesh.update()
+
+
+class StressTest(bpy.types.Operator):
+    bl_idname = "fg.stress_test"
+    bl_label = "weight stress test"
+    bl_description = "Skin the human with its current weights through a library of test poses in numpy\nand paint the worst stretch, area loss and folding per vertex as a color attribute\n"
+    bl_options = {"REGISTER", "UNDO"}
+
+    def execute(self, context):
+        scene = context.scene
+        human, armatur = scene.my_object, scene.my_armature
+        if not human or not armatur or not human.vertex_groups:
+            self.report({"ERROR"}, "Set a weighted human and its armature first")
+            return {"CANCELLED"}
+        if context.object and context.object.mode == "EDIT":
+            bpy.ops.object.mode_set(mode="OBJECT")
+        badness, summary = stress_test(human, armatur)
+        write_heatmap(human.data, badness)
+
+        scene.fg_stress.clear()
+        for name, stretch, area_loss, folded, ratio in summary:
+            entry = scene.fg_stress.add()
+            entry.name = name
+            entry.stretch, entry.area_loss, entry.folded, entry.volume = stretch, area_loss, folded, ratio
+        scene.fg_stress_score = float(100 * (1 - badness.mean()))
+        self.report({"INFO"}, f"Weight score {scene.fg_stress_score:.1f}/100 over {len(summary)} poses")
+        return {"FINISHED"}
+
+
+# ------------------ register -------------------#
+classes = [StressTest]
+
+
+def register():
+
+    for cls in classes:
+        bpy.utils.register_class(cls)
+
+
+def unregister():
+
+    for cls in reversed(classes):
+        bpy.utils.unregister_class(cls)
+
+
+if __name__ == "__main__":
+    register()
@@ -0,0 +1,221 @@
+# Generated by scripts/build_stubs.py from the operator classes, do not edit by hand.
+import bpy
+
+from .lazy import stub_operator
+
+
+lazy_operators = [
+    stub_operator(
+        __package__ + ".rig_create",
+        "GenerateRig",
+        "fg.generate_rig",
+        "Orient rig bones position",
+        "Generate rigify bones from only 1 bone or metarig.\n\n*This operator will apply the scale and rotation of the armature and the object \nbefore generating the rig bones position.\n",
+        callbacks=("execute", "invoke", "modal"),
+    ),
+    stub_operator(
+        __package__ + ".rig_create",
+        "RegenerateRegion",
+        "fg.regenerate_region",
+        "Refit region",
+        "Refit the bones of one body part only, the rest of the rig keeps its position.\nThe mesh index is reused while the human mesh is unchanged\n",
+        props={
+            "region": bpy.props.EnumProperty(name="Region", items=[("SPINE", "Spine", "Root, spine up to the chest, breast"), ("HEAD", "Neck/Head", "Neck and head bones"), ("ARMS", "Arms", "Shoulders, upper arms and forearms"), ("HANDS", "Hands", "Hand bones"), ("LEGS", "Legs", "Thighs, shins and pelvis"), ("FEET", "Feet", "Feet, toes and heels")], default="ARMS"),
+        },
+    ),
+    stub_operator(
+        __package__ + ".rig_create",
+        "BatchRig",
+        "fg.batch_rig",
+        "Rig collection",
+        "Generate the rig of every human mesh in the batch collection in one pass.\nEach mesh reuses its armature or gets a new metarig, mesh analysis runs for all of them together\n",
+        props={
+            "parent": bpy.props.BoolProperty(name="Auto Parent", default=False, description="Parent every human to its rig with automatic weights afterwards"),
+        },
+    ),
+    stub_operator(
+        __package__ + ".rig_create",
+        "GenerateIk",
+        "fg.generate_ik",
+        "Genx ik",
+        "Generate ik bones for hand, foot, and other limbs",
+    ),
+    stub_operator(
+        __package__ + ".rig_create",
+        "Autoparent",
+        "fg.autoparent",
+        "parent them",
+        "Blender's parenting system with automatic weights(CTRL+P).\n\n*This operator will apply the scale and rotation of the armature and the object\nbefore parenting them.\n",
+    ),
+    stub_operator(
+        __package__ + ".rig_create",
+        "Weightpaintauto",
+        "fg.wpaintauto",
+        "auto weight paint",
+    ),
+    stub_operator(
+        __package__ + ".ikfksnap",
+        "IKFKSnap",
+        "fg.ikorfksnap",
+        "IK/FK Snap",
+        "IK or FK Snap",
+    ),
+    stub_operator(
+        __package__ + ".twist",
+        "GenerateTwistUpper",
+        "fg.up_twist_armleg",
+        "Genx twist arm/leg",
+        "*First choose a upperarm or thigh bone\nGenerate twist bones for thigh or upperarm fix\n",
+        props={
+            "use_local_weights": bpy.props.BoolProperty(name="Local Weights", default=True, description="Reweight only the vertices of the parent bone instead of Auto Parent on the whole mesh"),
+        },
+    ),
+    stub_operator(
+        __package__ + ".twist",
+        "GenerateTwistDown",
+        "fg.down_twist_armleg",
+        "Genx arm/leg",
+        "Generate twist bones for hand or foot fix\n*First choose a forearm or shin bone\n",
+        props={
+            "use_local_weights": bpy.props.BoolProperty(name="Local Weights", default=True, description="Reweight only the vertices of the parent bone instead of Auto Parent on the whole mesh"),
+        },
+    ),
+    stub_operator(
+        __package__ + ".weights",
+        "LocalReweight",
+        "fg.local_reweight",
+        "local reweight",
+        "Reweight only the vertices of the active bone between itself and its children.\n\n*The human must already be parented to the armature (Auto Parent)\n",
+    ),
+    stub_operator(
+        __package__ + ".weights",
+        "MirrorWeights",
+        "fg.mirror_weights",
+        "mirror weights",
+        "Copy the weights of one side of the human onto the other through a vertex symmetry map,\nso .L and .R deform the same even on scans that are not exactly symmetric\n",
+        props={
+            "direction": bpy.props.EnumProperty(name="Direction", items=[("LEFT_TO_RIGHT", "Left to Right", "Overwrite the -X side with the +X (.L) side"), ("RIGHT_TO_LEFT", "Right to Left", "Overwrite the +X side with the -X (.R) side")], default="LEFT_TO_RIGHT"),
+            "tolerance": bpy.props.FloatProperty(name="Tolerance", default=0.0, min=0.0, subtype="DISTANCE", description="Max distance to the mirrored vertex, 0 uses a quarter of the body unit"),
+        },
+    ),
+    stub_operator(
+        __package__ + ".profiling",
+        "TwistBenchmark",
+        "fg.twist_benchmark",
+        "twist benchmark",
+        "Play the scene frame range with both twist setups (constraints and drivers)\nand report the evaluation time per frame of each.\n",
+        props={
+            "repeats": bpy.props.IntProperty(name="Repeats", default=3, min=1, max=20, description="Timing passes per setup, the best one is kept"),
+        },
+    ),
+    stub_operator(
+        __package__ + ".profiling",
+        "ProfileRig",
+        "fg.profile_rig",
+        "profile rig",
+        "Play the scene frame range and measure how much each bone, constraint\nor constraint type costs per frame by muting it.\nResults go to the sidebar and to a CSV file\n",
+        bl_options={"REGISTER"},
+        props={
+            "group_by": bpy.props.EnumProperty(name="Group By", items=[("BONE", "Bone", "Toggle all constraints of one bone at a time"), ("TYPE", "Type", "Toggle all constraints of one type at a time"), ("CONSTRAINT", "Constraint", "Toggle every constraint on its own")], default="BONE"),
+            "max_frames": bpy.props.IntProperty(name="Frames", default=24, min=1, max=1000, description="Frames sampled from the scene range for each timing"),
+            "repeats": bpy.props.IntProperty(name="Repeats", default=1, min=1, max=20, description="Timing passes per group, the best one is kept"),
+            "filepath": bpy.props.StringProperty(name="CSV", default="//rig_profile.csv", subtype="FILE_PATH"),
+        },
+    ),
+    stub_operator(
+        __package__ + ".rig_spec",
+        "ExportRigSpec",
+        "fg.export_rig_spec",
+        "export rig spec",
+        "Save the fitted bone layout, IK and twist setup of the armature\n(.json to diff it, .npz for speed) to rebuild the rig later without mesh analysis\n",
+        bl_options={"REGISTER"},
+        props={
+            "filepath": bpy.props.StringProperty(subtype="FILE_PATH"),
+            "filter_glob": bpy.props.StringProperty(default="*.json;*.npz", options={"HIDDEN"}),
+        },
+        callbacks=("execute", "invoke"),
+    ),
+    stub_operator(
+        __package__ + ".rig_spec",
+        "ImportRigSpec",
+        "fg.import_rig_spec",
+        "import rig spec",
+        "Rebuild the armature from a saved rig spec (.json or .npz) in one pass,\nno mesh analysis involved\n",
+        props={
+            "filepath": bpy.props.StringProperty(subtype="FILE_PATH"),
+            "filter_glob": bpy.props.StringProperty(default="*.json;*.npz", options={"HIDDEN"}),
+            "remove_extra": bpy.props.BoolProperty(name="Remove Extra Bones", default=False, description="Delete bones of the armature that are not in the spec"),
+        },
+        callbacks=("execute", "invoke"),
+    ),
+    stub_operator(
+        __package__ + ".skin_io",
+        "ExportSkinWeights",
+        "fg.export_skin_weights",
+        "export skin weights",
+        "Write every vertex group weight of the human to a compact binary file (.fgsw)\nthat engines and tools can memory-map\n",
+        bl_options={"REGISTER"},
+        props={
+            "filepath": bpy.props.StringProperty(subtype="FILE_PATH"),
+            "filter_glob": bpy.props.StringProperty(default="*.fgsw", options={"HIDDEN"}),
+            "format": bpy.props.EnumProperty(name="Format", items=[("CSR", "All Influences", "Every weight as float32 (CSR). Importing rounds them to 1/4095 steps and drops weights below 1/8190"), ("TOP4", "4 x uint8", "4 strongest influences per vertex, 8-bit weights summing to 255"), ("TOP8", "8 x uint8", "8 strongest influences per vertex, 8-bit weights summing to 255")], default="CSR"),
+        },
+        callbacks=("execute", "invoke"),
+    ),
+    stub_operator(
+        __package__ + ".skin_io",
+        "ImportSkinWeights",
+        "fg.import_skin_weights",
+        "import skin weights",
+        "Restore the vertex groups of the human from a skin weight file (.fgsw)\n",
+        props={
+            "filepath": bpy.props.StringProperty(subtype="FILE_PATH"),
+            "filter_glob": bpy.props.StringProperty(default="*.fgsw", options={"HIDDEN"}),
+            "replace": bpy.props.BoolProperty(name="Replace", default=True, description="Clear the groups found in the file before adding its weights"),
+        },
+        callbacks=("execute", "invoke"),
+    ),
+    stub_operator(
+        __package__ + ".stress",
+        "StressTest",
+        "fg.stress_test",
+        "weight stress test",
+        "Skin the human with its current weights through a library of test poses in numpy\nand paint the worst stretch, area loss and folding per vertex as a color attribute\n",
+    ),
+    stub_operator(
+        __package__ + ".validate",
+        "ValidateRig",
+        "fg.validate_rig",
+        "validate rig",
+        "Check the rig against the human: joints inside the body and away from its surface,\nbone length ratios and left/right symmetry\n",
+        bl_options={"REGISTER"},
+    ),
+    stub_operator(
+        __package__ + ".scan_io",
+        "ImportScan",
+        "fg.import_scan",
+        "import scan",
+        "Load PLY/OBJ scans straight into meshes without Blender's importers\n(memory-mapped binary PLY, streamed OBJ). Several files go into the batch collection\n",
+        props={
+            "filepath": bpy.props.StringProperty(subtype="FILE_PATH"),
+            "directory": bpy.props.StringProperty(subtype="DIR_PATH"),
+            "files": bpy.props.CollectionProperty(type=bpy.types.OperatorFileListElement),
+            "filter_glob": bpy.props.StringProperty(default="*.ply;*.obj", options={"HIDDEN"}),
+            "build_mesh": bpy.props.BoolProperty(name="Build Mesh", default=True, description="Create the Blender mesh now. Off: only the arrays are kept, the rig is generated from them\nand the mesh is built when parenting or validation needs it (never for a rig spec export)"),
+        },
+        callbacks=("execute", "invoke"),
+    ),
+    stub_operator(
+        __package__ + ".bake",
+        "BakeDeformSkeleton",
+        "fg.bake_deform_skeleton",
+        "bake deform skeleton",
+        "Build a deform-only copy of the armature (no IK/pole controls, no constraints)\nand bake the full rig animation onto it for export and fast playback.\n",
+        props={
+            "frame_start": bpy.props.IntProperty(name="Start", default=1),
+            "frame_end": bpy.props.IntProperty(name="End", default=250),
+            "bind_mesh": bpy.props.BoolProperty(name="Bind Human", default=False, description="Point the human's armature modifier to the baked skeleton"),
+        },
+        callbacks=("execute", "invoke"),
+    ),
+]
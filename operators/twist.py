@@ -1,5 +1,116 @@
 import bpy
 
+from .scan_io import scan_human
+from .weights import reweight_local
+
+
+# ---------------------- twist stacks -------------------------------
+TWIST_INFLUENCES = [0.1, 0.33, 0.66, 1.0]
+TWIST_CONSTRAINTS = {"COPY_ROTATION", "DAMPED_TRACK", "COPY_LOCATION"}
+
+
+def clear_twist_stack(pose_bone):
+    """Removes the twist constraints and the twist driver of a bone."""
+    for con in list(pose_bone.constraints):
+        if con.type in TWIST_CONSTRAINTS:
+            pose_bone.constraints.remove(con)
+    pose_bone.driver_remove("rotation_euler", 1)
+    pose_bone.rotation_euler[1] = 0
+
+
+def setup_twist_constraints(obj, twist_names, source_name, kind):
+    """
+    Classic stack: COPY_LOCATION (upper only) + COPY_ROTATION + DAMPED_TRACK per twist bone.
+
+    Upper twists follow their parent bone `source_name` along the chain,
+    lower twists copy the rotation of the hand or foot bone `source_name`.
+    """
+    for i, name in enumerate(twist_names):
+        pose_bone = obj.pose.bones[name]
+        pose_bone.bone.use_deform = True
+
+        if kind == "UP":
+            copy_loc = pose_bone.constraints.new(type="COPY_LOCATION")
+            copy_loc.name = "Copy Loc " + name[:7]
+            copy_loc.target = obj
+            if i == 0:
+                copy_loc.subtarget = source_name
+                copy_loc.head_tail = 0
+            else:
+                copy_loc.subtarget = twist_names[i - 1]
+                copy_loc.head_tail = 1
+            copy_loc.use_offset = False
+
+        copy_rot = pose_bone.constraints.new(type="COPY_ROTATION")
+        copy_rot.name = "Copy Rot " + name[:7]
+        copy_rot.target = obj
+        copy_rot.subtarget = source_name
+        copy_rot.use_x = copy_rot.use_y = copy_rot.use_z = True
+        copy_rot.influence = TWIST_INFLUENCES[i]
+        copy_rot.target_space = "LOCAL_WITH_PARENT"
+        copy_rot.owner_space = "LOCAL"
+
+        damped_track = pose_bone.constraints.new(type="DAMPED_TRACK")
+        damped_track.name = "Dampd Trck " + name[:7]
+        damped_track.target = obj
+        damped_track.subtarget = source_name
+        damped_track.head_tail = 1 if kind == "UP" else 0
+
+
+def setup_twist_drivers(obj, twist_names, source_name, kind):
+    """
+    Light stack: no constraints, one driver on the Y (twist axis) rotation per twist bone.
+
+    The driver reads only the twist part of `source_name` (swing-twist decomposition).
+    Lower twists take a growing share of the hand twist, upper twists cancel a
+    shrinking share of the parent twist so the bone near the shoulder/hip stays still.
+    """
+    for i, name in enumerate(twist_names):
+        pose_bone = obj.pose.bones[name]
+        pose_bone.bone.use_deform = True
+        pose_bone.rotation_mode = "XYZ"
+        factor = TWIST_INFLUENCES[i] if kind == "DOWN" else TWIST_INFLUENCES[i] - 1.0
+
+        driver = pose_bone.driver_add("rotation_euler", 1).driver
+        driver.type = "SCRIPTED"
+        var = driver.variables.new()
+        var.name = "twist"
+        var.type = "TRANSFORMS"
+        target = var.targets[0]
+        target.id = obj
+        target.bone_target = source_name
+        target.transform_type = "ROT_Y"
+        target.rotation_mode = "SWING_TWIST_Y"
+        target.transform_space = "LOCAL_SPACE"
+        # Plain arithmetic keeps the driver on Blender's fast (non-Python) expression path
+        driver.expression = f"twist * {factor:.3f}"
+
+
+def setup_twist_stack(obj, twist_names, source_name, kind, mode="CONSTRAINTS"):
+    """Rebuilds the twist setup of `twist_names` in the given mode ("CONSTRAINTS" or "DRIVER")."""
+    for i, name in enumerate(twist_names):
+        pose_bone = obj.pose.bones[name]
+        clear_twist_stack(pose_bone)
+        # Remember how the stack was built so it can be rebuilt in another mode
+        pose_bone["fg_twist_source"] = source_name
+        pose_bone["fg_twist_kind"] = kind
+        pose_bone["fg_twist_index"] = i
+
+    if mode == "DRIVER":
+        setup_twist_drivers(obj, twist_names, source_name, kind)
+    else:
+        setup_twist_constraints(obj, twist_names, source_name, kind)
+
+
+def find_twist_stacks(obj):
+    """Returns {(kind, source): [twist bone names in order]} for every twist stack of the armature."""
+    stacks = {}
+    for pose_bone in obj.pose.bones:
+        if "fg_twist_source" in pose_bone:
+            key = (pose_bone["fg_twist_kind"], pose_bone["fg_twist_source"])
+            stacks.setdefault(key, []).append((pose_bone["fg_twist_index"], pose_bone.name))
+    return {key: [name for _, name in sorted(bones)] for key, bones in stacks.items()}
+
 
 # ---------------------- twist bones -------------------------------
 class GenerateTwistUpper(bpy.types.Operator):
@@ -9,6 +120,10 @@ class GenerateTwistUpper(bpy.types.Operator):
     bl_description = "*First choose a upperarm or thigh bone\nGenerate twist bones for thigh or upperarm fix\n"
     bl_options = {"REGISTER", "UNDO"}
 
+    use_local_weights: bpy.props.BoolProperty(
+        name="Local Weights", default=True, description="Reweight only the vertices of the parent bone instead of Auto Parent on the whole mesh"
+    )
+
     def execute(self, context):
         bpy.context.object.pose.use_mirror_x = False
         bpy.context.object.data.pose_position = "REST"
@@ -25,7 +140,6 @@ class GenerateTwistUpper(bpy.types.Operator):
 
         bonenames = [bn.name for bn in edit_bones]
         twist_count = 4
-        influences = [0.1, 0.33, 0.66, 1.0]
         acvector = ac.tail - ac.head
         twist_length = acvector.length / twist_count
         acvector.normalize()
@@ -45,52 +159,15 @@ class GenerateTwistUpper(bpy.types.Operator):
             twistbone.roll = ac.roll
             twistbone.use_deform = True
 
-        # Convert to pose bones
-        twist_bones = [context.object.pose.bones[b.name] for b in twist_bones if b.name in context.object.pose.bones]
+        twist_names = [b.name for b in twist_bones]
+        ac_name = ac.name
         bpy.ops.object.mode_set(mode="POSE")
 
-       
-
-        # Set up constraints for twist bones
-        for i, bone in enumerate(twist_bones):
-            twistpbone = context.object.pose.bones[bone.name]
-            twistpbone.bone.use_deform = True
-            for con in twistpbone.constraints:
-                if con.type == "COPY_ROTATION" or con.type == "DAMPED_TRACK" or con.type == "COPY_LOCATION":
-                    twistpbone.constraints.remove(con)
-
-            # copy location constraint
+        # Set up constraints or drivers for twist bones
+        setup_twist_stack(context.object, twist_names, ac_name, "UP", context.scene.twist_mode)
 
-            cons1 = twistpbone.constraints.new(type="COPY_LOCATION")
-            cons1.name = "Copy Loc " + bone.name[:7]
-            cons1.target = context.object
-            if i == 0:
-                cons1.subtarget = activebone.name
-                cons1.head_tail = 0
-            else:
-                cons1.subtarget = twist_bones[i - 1].name
-                cons1.head_tail = 1
-            cons1.use_offset = False
-
-            # copy rotation constraint
-            cons3 = twistpbone.constraints.new(type="COPY_ROTATION")
-            cons3.name = "Copy Rot " + bone.name[:7]
-            cons3.target = context.object
-            cons3.subtarget = activebone.name
-            cons3.use_x = True
-            cons3.use_y = True
-            cons3.use_z = True
-            cons3.influence = influences[i]
-            cons3.target_space = "LOCAL_WITH_PARENT"
-            cons3.owner_space = "LOCAL"
-
-            # create a damped track constraint for each twist bone
-            cons2 = twistpbone.constraints.new(type="DAMPED_TRACK")
-            cons2.name = "Dampd Trck " + bone.name[:7]
-            cons2.target = context.object
-            cons2.subtarget = activebone.name
-            cons2.head_tail = 1
-        bpy.ops.fg.autoparent()
+        if not self.use_local_weights or not reweight_local(scan_human(context), context.object, ac_name, twist_names):
+            bpy.ops.fg.autoparent()
         bpy.context.object.data.pose_position = "POSE"
         return {"FINISHED"}
 
@@ -101,6 +178,10 @@ class GenerateTwistDown(bpy.types.Operator):
     bl_description = "Generate twist bones for hand or foot fix\n*First choose a forearm or shin bone\n"
     bl_options = {"REGISTER", "UNDO"}
 
+    use_local_weights: bpy.props.BoolProperty(
+        name="Local Weights", default=True, description="Reweight only the vertices of the parent bone instead of Auto Parent on the whole mesh"
+    )
+
     def execute(self, context):
         obj = context.object
         if not obj or obj.type != 'ARMATURE':
@@ -124,10 +205,10 @@ class GenerateTwistDown(bpy.types.Operator):
             self.report({"ERROR"}, "Active bone not found in edit bones")
             return {"CANCELLED"}
         ac.use_deform = False
+        ac_name = ac.name
 
         # Constants for twist bones
         twist_count = 4
-        influences = [0.1, 0.33, 0.66, 1.0]
         ac_vector = (ac.tail - ac.head).normalized()
         twist_length = (ac.tail - ac.head).length / twist_count
 
@@ -144,6 +225,7 @@ class GenerateTwistDown(bpy.types.Operator):
             twist_bone.parent = ac
             twist_bone.roll = ac.roll
             twist_bone.use_deform = True
+        twist_names = [b.name for b in twist_bones]
 
         # Switch to pose mode for constraints
         bpy.ops.object.mode_set(mode="POSE")
@@ -154,36 +236,12 @@ class GenerateTwistDown(bpy.types.Operator):
             self.report({"ERROR"}, "No valid hand bone selected")
             return {"CANCELLED"}
 
-        # Apply constraints to twist bones
-        for i, bone in enumerate(twist_bones):
-            # Sanitize bone name
-            sanitized_name = bone.name.encode('utf-8', errors='ignore').decode('utf-8')
-            pose_bone = obj.pose.bones.get(sanitized_name)
-
-            # Clear existing constraints
-            for constraint in pose_bone.constraints:
-                if constraint.type in {"COPY_ROTATION", "DAMPED_TRACK"}:
-                    pose_bone.constraints.remove(constraint)
-
-            # Add 'copy rotation' constraint
-            copy_rot = pose_bone.constraints.new(type="COPY_ROTATION")
-            copy_rot.name = f"Copy Rot {bone.name[:7]}"
-            copy_rot.target = obj
-            copy_rot.subtarget = hand_bone
-            copy_rot.use_x = copy_rot.use_y = copy_rot.use_z = True
-            copy_rot.target_space = "LOCAL_WITH_PARENT"
-            copy_rot.owner_space = "LOCAL"
-            copy_rot.influence = influences[i]
-
-            # Add 'damped track' constraint
-            damped_track = pose_bone.constraints.new(type="DAMPED_TRACK")
-            damped_track.name = f"Dampd Trck {bone.name[:7]}"
-            damped_track.target = obj
-            damped_track.subtarget = hand_bone
-            damped_track.head_tail = 0
-
-        # Run auto-parenting and update pose position
-        bpy.ops.fg.autoparent()
+        # Apply constraints or drivers to twist bones
+        setup_twist_stack(obj, twist_names, hand_bone, "DOWN", context.scene.twist_mode)
+
+        # Reweight the parent bone's vertices only, full auto-parenting as fallback
+        if not self.use_local_weights or not reweight_local(scan_human(context), obj, ac_name, twist_names):
+            bpy.ops.fg.autoparent()
         obj.data.pose_position = "POSE"
         return {"FINISHED"}
 
@@ -0,0 +1,247 @@
+import bpy
+
+from .lazy import lazy_import
+from .mesh_index import mesh_components, read_world_coords
+from .scan_io import scan_human
+from .slicing import PLANE_AXES, read_triangles
+
+np = lazy_import("numpy")
+
+
+# ------------------- rig validation --------------#
+# (bone, reference bone, expected length ratio) from anthropometric segment tables
+LENGTH_PRIORS = [
+    ("forearm", "upper_arm", 0.8),
+    ("shin", "thigh", 1.0),
+    ("upper_arm", "thigh", 0.75),
+    ("foot", "shin", 0.45),
+]
+RATIO_TOLERANCE = 0.35  # relative deviation from the prior still accepted
+CLEARANCE = 0.004  # share of the body height the main joints keep from the surface
+SYMMETRY = 0.01  # share of the body height .L/.R joints may differ across the midline
+JOINTS = ("upper_arm", "forearm", "hand", "thigh", "shin", "foot", "spine")
+
+
+class TriangleGrid:
+    """
+    Triangles binned by their bounds across `axis` (z by default), so a ray along the axis only meets
+    the triangles of one cell.
+    """
+
+    def __init__(self, co, tris, cells=256, axis=2):
+        self.co = co
+        self.tris = tris
+        self.axis = axis
+        self.uv = list(PLANE_AXES[axis])
+        uv = co[:, self.uv]
+        self.lo = uv.min(axis=0)
+        self.size = max(float((uv.max(axis=0) - self.lo).max()) / cells, 1e-9)
+        self.cells = cells + 1
+        a, b, c = uv[tris[:, 0]], uv[tris[:, 1]], uv[tris[:, 2]]
+        c0 = np.clip(((np.minimum(np.minimum(a, b), c) - self.lo) / self.size).astype(np.int64), 0, cells)
+        c1 = np.clip(((np.maximum(np.maximum(a, b), c) - self.lo) / self.size).astype(np.int64), 0, cells)
+        width = c1[:, 0] - c0[:, 0] + 1
+        counts = width * (c1[:, 1] - c0[:, 1] + 1)
+        tri = np.repeat(np.arange(len(tris)), counts)
+        local = np.arange(len(tri)) - np.repeat(np.cumsum(counts) - counts, counts)
+        cell = (c0[tri, 1] + local // width[tri]) * self.cells + c0[tri, 0] + local % width[tri]
+        order = np.argsort(cell)
+        self.tri = tri[order]
+        self.indptr = np.concatenate([[0], np.cumsum(np.bincount(cell, minlength=self.cells * self.cells))])
+
+    def cell_of(self, points):
+        c = np.clip(((points[:, self.uv] - self.lo) / self.size).astype(np.int64), 0, self.cells - 1)
+        return c[:, 1] * self.cells + c[:, 0]
+
+    def crossings(self, points, tri):
+        """
+        Where the axis lines through `points` cross the triangles `tri` (one per point): (det, depth, inside),
+        det > 0 when the triangle faces +axis.
+        """
+        u, v = self.uv
+        a, b, c = (self.co[self.tris[tri, k]] for k in range(3))
+        p = points
+        det = (b[:, u] - a[:, u]) * (c[:, v] - a[:, v]) - (c[:, u] - a[:, u]) * (b[:, v] - a[:, v])
+        safe = np.where(det != 0, det, 1.0)
+        l1 = ((p[:, u] - a[:, u]) * (c[:, v] - a[:, v]) - (c[:, u] - a[:, u]) * (p[:, v] - a[:, v])) / safe
+        l2 = ((b[:, u] - a[:, u]) * (p[:, v] - a[:, v]) - (p[:, u] - a[:, u]) * (b[:, v] - a[:, v])) / safe
+        l0 = 1 - l1 - l2
+        depth = l0 * a[:, self.axis] + l1 * b[:, self.axis] + l2 * c[:, self.axis]
+        return det, depth, (det != 0) & (l0 >= 0) & (l1 >= 0) & (l2 >= 0)
+
+    def winding_numbers(self, points):
+        """
+        Signed count of surface crossings of a +axis ray from every point: 1 inside a closed outward-facing
+        mesh, 0 outside, 2 inside overlapping shells. All rays are tested in one batch.
+        """
+        points = np.asarray(points, dtype=np.float64)
+        # Tiny irrational offset, so rays never run exactly through shared edges or vertices
+        offset = np.zeros(3)
+        offset[self.uv] = 0.31830988, 0.70710678
+        points = points + offset * self.size * 1e-4
+        cell = self.cell_of(points)
+        starts, counts = self.indptr[cell], self.indptr[cell + 1] - self.indptr[cell]
+        pt = np.repeat(np.arange(len(points)), counts)
+        tri = self.tri[np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())]
+        det, depth, inside = self.crossings(points[pt], tri)
+        hit = inside & (depth > points[pt, self.axis])
+        # Counter-clockwise seen from +axis = normal pointing along it = the ray leaves the volume
+        return np.bincount(pt[hit], np.sign(det[hit]), len(points))
+
+    def ray_cast(self, origin, forward=True):
+        """
+        First triangle met from `origin` along +axis (-axis when not `forward`), the numpy counterpart of
+        Object.ray_cast for meshes that have no object: (hit, location, normal, triangle index).
+        """
+        origin = np.asarray(origin, dtype=np.float64).reshape(1, 3)
+        cell = self.cell_of(origin)[0]
+        tri = self.tri[self.indptr[cell] : self.indptr[cell + 1]]
+        det, depth, inside = self.crossings(np.repeat(origin, len(tri), axis=0), tri)
+        ahead = (depth - origin[0, self.axis]) * (1 if forward else -1)
+        hit = np.flatnonzero(inside & (ahead >= 0))
+        if not len(hit):
+            return False, np.zeros(3), np.zeros(3), -1
+        k = hit[np.argmin(ahead[hit])]
+        location = origin[0].copy()
+        location[self.axis] = depth[k]
+        a, b, c = (self.co[self.tris[tri[k], i]].astype(np.float64) for i in range(3))
+        normal = np.cross(b - a, c - a)
+        return True, location, normal / (np.linalg.norm(normal) or 1.0), int(tri[k])
+
+
+def bone_points(armatur):
+    """
+    World-space test points of the deform bones: (labels "bone:head" etc., points (n, 3)).
+    Leaf tails (finger tips, top of the head, toe tips) and heels lie on the surface by design.
+    """
+    matrix = armatur.matrix_world
+    labels, points = [], []
+    for bone in armatur.data.bones:
+        if not bone.use_deform or bone.name.startswith("heel"):
+            continue
+        head, tail = matrix @ bone.head_local, matrix @ bone.tail_local
+        labels += [f"{bone.name}:head", f"{bone.name}:middle"]
+        points += [head, (head + tail) / 2]
+        if bone.children:
+            labels.append(f"{bone.name}:tail")
+            points.append(tail)
+    return labels, np.array(points, dtype=np.float64).reshape(-1, 3)
+
+
+def validate_rig(human, armatur, co, tris, tall, midx):
+    """
+    Checks the fitted armature against the mesh (world-space `co`, `tris`) and returns
+    [(check, bone, ok, detail)]: joints inside the body, main joints away from the surface,
+    bone length ratios within anatomical priors and left/right symmetry. The clearance checks need the
+    `human` object and are left out without it (a scan fitted from its arrays).
+    """
+    results = []
+    labels, points = bone_points(armatur)
+    if len(points) and len(tris):
+        winding = TriangleGrid(co, tris).winding_numbers(points)
+        outside = {}
+        for label, value in zip(labels, winding):
+            if value < 0.5:
+                name, part = label.split(":")
+                outside.setdefault(name, []).append(part)
+        inside_names = dict.fromkeys(label.split(":")[0] for label in labels)
+        for name in inside_names:
+            parts = outside.get(name)
+            results.append(("inside", name, not parts, f"{', '.join(parts)} outside the mesh" if parts else ""))
+
+    bones = armatur.data.bones
+    to_local = human.matrix_world.inverted() if human else None
+    for bone in bones:
+        if not human or not bone.use_deform or not bone.name.startswith(JOINTS):
+            continue
+        head = armatur.matrix_world @ bone.head_local
+        found, location, _, _ = human.closest_point_on_mesh(to_local @ head)
+        if not found:
+            continue
+        clearance = ((human.matrix_world @ location) - head).length
+        results.append(("clearance", bone.name, clearance >= CLEARANCE * tall, f"{clearance / tall * 100:.2f}% of height from the surface"))
+
+    for name, reference, prior in LENGTH_PRIORS:
+        for side in (".L", ".R"):
+            bone, ref = bones.get(name + side), bones.get(reference + side)
+            if not bone or not ref or ref.length == 0:
+                continue
+            ratio = bone.length / ref.length
+            ok = abs(ratio / prior - 1) <= RATIO_TOLERANCE
+            results.append(("length", bone.name, ok, f"{ratio:.2f} x {ref.name}, expected {prior:.2f}"))
+
+    for bone in bones:
+        if not bone.name.endswith(".L") or bone.name[:-2] + ".R" not in bones:
+            continue
+        other = bones[bone.name[:-2] + ".R"]
+        error = 0.0
+        for left, right in ((bone.head_local, other.head_local), (bone.tail_local, other.tail_local)):
+            left, right = armatur.matrix_world @ left, armatur.matrix_world @ right
+            left.x = 2 * midx - left.x
+            error = max(error, (left - right).length)
+        results.append(("symmetry", bone.name, error <= SYMMETRY * tall, f"{error / tall * 100:.2f}% of height off its .R mirror"))
+    return results
+
+
+def store_report(scene, results):
+    scene.fg_validation.clear()
+    for check, bone, ok, detail in results:
+        entry = scene.fg_validation.add()
+        entry.name = bone
+        entry.check = check
+        entry.ok = ok
+        entry.detail = detail
+    return sum(not ok for _, _, ok, _ in results)
+
+
+def validate_scene_rig(context, human, armatur):
+    """Validates against the mesh the rig was generated from (scene mesh source, loose parts left out)."""
+    scene = context.scene
+    depsgraph = context.evaluated_depsgraph_get()
+    source = scene.fg_mesh_source
+    co = read_world_coords(human, source, depsgraph)
+    tris = read_triangles(human.evaluated_get(depsgraph).data if source == "EVALUATED" else human.data)
+    parts = mesh_components(co, tris)
+    body = parts.body(scene.fg_part_share)
+    tris = tris[body[tris[:, 0]]]
+    lo, hi = co[body].min(axis=0), co[body].max(axis=0)
+    if armatur.mode == "EDIT":
+        armatur.update_from_editmode()
+    return validate_rig(human, armatur, co, tris, float(hi[2] - lo[2]), float(lo[0] + hi[0]) / 2)
+
+
+class ValidateRig(bpy.types.Operator):
+    bl_idname = "fg.validate_rig"
+    bl_label = "validate rig"
+    bl_description = "Check the rig against the human: joints inside the body and away from its surface,\nbone length ratios and left/right symmetry\n"
+    bl_options = {"REGISTER"}
+
+    def execute(self, context):
+        human, armatur = scan_human(context), context.scene.my_armature
+        if not human or not armatur:
+            self.report({"ERROR"}, "Set the human and the armature first")
+            return {"CANCELLED"}
+        results = validate_scene_rig(context, human, armatur)
+        failed = store_report(context.scene, results)
+        self.report({"WARNING" if failed else "INFO"}, f"{failed} of {len(results)} rig checks failed" if failed else f"All {len(results)} rig checks passed")
+        return {"FINISHED"}
+
+
+# ------------------ register -------------------#
+classes = [ValidateRig]
+
+
+def register():
+
+    for cls in classes:
+        bpy.utils.register_class(cls)
+
+
+def unregister():
+
+    for cls in reversed(classes):
+        bpy.utils.unregister_class(cls)
+
+
+if __name__ == "__main__":
+    register()
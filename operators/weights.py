@@ -0,0 +1,351 @@
+import array
+import bpy
+import zlib
+
+from .lazy import lazy_import
+from .mesh_index import VertexGrid, mesh_components
+from .slicing import read_triangles
+
+np = lazy_import("numpy")
+
+
+# ------------------- weight helpers --------------#
+def read_coords(mesh):
+    """Returns the mesh vertex coordinates as a (n, 3) float32 array."""
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    return co.reshape(-1, 3)
+
+
+def segment_distances(points, heads, tails):
+    """Distance of every point (n, 3) to every bone segment (b, 3)->(b, 3), returns (n, b)."""
+    seg = tails - heads
+    seg_len2 = np.maximum((seg * seg).sum(axis=1), 1e-12)
+    rel = points[:, None, :] - heads[None, :, :]
+    t = np.clip((rel * seg[None, :, :]).sum(axis=2) / seg_len2[None, :], 0.0, 1.0)
+    closest = heads[None, :, :] + t[:, :, None] * seg[None, :, :]
+    return np.linalg.norm(points[:, None, :] - closest, axis=2)
+
+
+def read_weights_csr(mesh):
+    """
+    Every vertex group weight of the mesh as CSR arrays (indptr (n+1,), groups (nnz,), weights (nnz,)),
+    vertex i owning groups[indptr[i]:indptr[i + 1]]. MeshVertex.groups has no foreach_get, so this is
+    one Python pass over the vertices and their weights, appending to typed arrays: the cost grows with
+    the weight count and is a few seconds for millions of weights, TOP4/TOP8 files only shrink the file.
+    """
+    groups, weights, ends = array.array("H"), array.array("f"), array.array("q", [0])
+    add_group, add_weight, add_end = groups.append, weights.append, ends.append
+    for v in mesh.vertices:
+        for g in v.groups:
+            add_group(g.group)
+            add_weight(g.weight)
+        add_end(len(groups))
+    return np.frombuffer(ends, dtype=np.int64), np.frombuffer(groups, dtype=np.uint16), np.frombuffer(weights, dtype=np.float32)
+
+
+def write_weights_csr(obj, names, indptr, groups, weights, replace=True, levels=4095):
+    """
+    Restores vertex groups from CSR arrays, `groups` indexing `names`. Weights are rounded to `levels`
+    steps (12 bits by default, far below what deformation shows) and the vertices sharing one step
+    in a group are added in a single call, so a group needs at most `levels` + 1 calls whether the
+    weights come as 8-bit top-k or as unquantized floats. The rounding is lossy: weights below half
+    a step (1/8190 by default) are not written at all.
+    """
+    vertex_groups = obj.vertex_groups
+    rows = np.repeat(np.arange(len(indptr) - 1, dtype=np.int64), np.diff(indptr))
+    by_group = np.argsort(groups, kind="stable")
+    bounds = np.searchsorted(groups[by_group], np.arange(len(names) + 1))
+    for j, name in enumerate(names):
+        group = vertex_groups.get(name)
+        if group and replace:
+            vertex_groups.remove(group)  # cheaper than removing every vertex from it
+            group = None
+        group = group or vertex_groups.new(name=name)
+        entries = by_group[bounds[j] : bounds[j + 1]]
+        if not len(entries):
+            continue
+        steps, inverse = np.unique(np.rint(weights[entries] * levels).astype(np.int32), return_inverse=True)
+        values = steps / levels
+        members = rows[entries]
+        order = np.argsort(inverse, kind="stable")
+        runs = np.searchsorted(inverse[order], np.arange(len(values) + 1))
+        for k, w in enumerate(values.tolist()):
+            if w > 0:
+                group.add(members[order[runs[k] : runs[k + 1]]].tolist(), w, "REPLACE")
+
+
+def rigid_part_weights(human, armatur, share=0.05, parts=None):
+    """
+    Binds every small loose part of the human (eyes, teeth, props...) to its nearest deform bone
+    with weight 1.0, in bulk: one remove call per deform bone group and one add call per bone.
+    Other groups (masks, shape key or corrective groups) keep the part's weights.
+    Returns the number of parts bound.
+    """
+    mesh = human.data
+    if parts is None:
+        parts = mesh_components(read_coords(mesh), read_triangles(mesh))
+    small = parts.small(share)
+    bones = [bone for bone in armatur.data.bones if bone.use_deform]
+    if not len(small) or not bones:
+        return 0
+    to_local = human.matrix_world.inverted() @ armatur.matrix_world
+    heads = np.array([to_local @ bone.head_local for bone in bones])
+    tails = np.array([to_local @ bone.tail_local for bone in bones])
+    centers = (parts.lo[small] + parts.hi[small]) / 2
+    nearest = np.argmin(segment_distances(centers, heads, tails), axis=1)
+
+    members = np.flatnonzero(np.isin(parts.labels, small)).tolist()
+    deform = {bone.name for bone in bones}
+    for group in human.vertex_groups:
+        if group.name in deform:
+            group.remove(members)
+    for k in np.unique(nearest):
+        name = bones[k].name
+        group = human.vertex_groups.get(name) or human.vertex_groups.new(name=name)
+        group.add(np.flatnonzero(np.isin(parts.labels, small[nearest == k])).tolist(), 1.0, "REPLACE")
+    return len(small)
+
+
+def has_armature_modifier(human, armatur):
+    return any(mod.type == "ARMATURE" and mod.object == armatur for mod in human.modifiers)
+
+
+def reweight_local(human, armatur, parent_name, child_names, falloff=2.0):
+    """
+    Redistributes the weights of one bone chain over the bone and its new children.
+
+    Only the vertices already influenced by `parent_name` or one of `child_names` are touched:
+    their combined chain weight is split between the deforming bones of the set by inverse
+    distance to each bone segment, then their deform weights are renormalized. On a rerun the
+    parent group is empty and the existing children (e.g. twist bones) carry that weight.
+    Every other vertex keeps its weights. Reads and writes go through the CSR arrays.
+
+    Returns:
+        int: Number of reweighted vertices, 0 when the mesh was never parented to the armature
+             or no bone of the set has weights (caller should fall back to Auto Parent).
+    """
+    if not human or not has_armature_modifier(human, armatur):
+        return 0
+    bones = armatur.data.bones
+    names = [name for name in [parent_name] + list(child_names) if name in bones and bones[name].use_deform]
+    chain = [human.vertex_groups[name].index for name in [parent_name] + list(child_names) if name in human.vertex_groups]
+    if not names or not chain:
+        return 0
+
+    mesh = human.data
+    indptr, groups, weights = read_weights_csr(mesh)
+    rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    in_chain = np.isin(groups, chain)
+    base = np.bincount(rows[in_chain], weights[in_chain], len(indptr) - 1)
+    indices = np.flatnonzero(base > 0)
+    if not len(indices):
+        return 0
+
+    # Vertex positions in armature space, matching bone head_local/tail_local
+    to_arm = np.array(armatur.matrix_world.inverted() @ human.matrix_world, dtype=np.float32)
+    points = read_coords(mesh)[indices] @ to_arm[:3, :3].T + to_arm[:3, 3]
+    heads = np.array([bones[n].head_local for n in names], dtype=np.float32)
+    tails = np.array([bones[n].tail_local for n in names], dtype=np.float32)
+
+    share = 1.0 / np.maximum(segment_distances(points, heads, tails), 1e-6) ** falloff
+    share /= share.sum(axis=1, keepdims=True)
+    new_weights = share * base[indices, None]
+
+    vertex_groups = human.vertex_groups
+    targets = [(vertex_groups.get(name) or vertex_groups.new(name=name)).index for name in names]
+    all_names = [g.name for g in vertex_groups]
+    deform = np.array([name in bones and bones[name].use_deform for name in all_names])
+
+    # New rows of the touched vertices: their other deform weights plus the new chain weights.
+    # A non deforming parent hands all of its weight over to the children.
+    touched = np.zeros(len(indptr) - 1, dtype=bool)
+    touched[indices] = True
+    other = touched[rows] & deform[groups] & ~in_chain
+    new_rows = np.concatenate([rows[other], np.repeat(indices, len(names))])
+    new_groups = np.concatenate([groups[other], np.tile(targets, len(indices))]).astype(np.uint16)
+    values = np.concatenate([weights[other], new_weights.ravel()])
+    keep = values > 1e-4
+    new_rows, new_groups, values = new_rows[keep], new_groups[keep], values[keep]
+    values /= np.bincount(new_rows, values, len(indptr) - 1)[new_rows]
+    order = np.argsort(new_rows, kind="stable")
+    new_indptr = np.concatenate([[0], np.cumsum(np.bincount(new_rows, minlength=len(indptr) - 1))])
+
+    members = indices.tolist()
+    for group in vertex_groups:
+        if deform[group.index] or group.index in chain:
+            group.remove(members)
+    write_weights_csr(human, all_names, new_indptr, new_groups[order], values[order].astype(np.float32), replace=False)
+    mesh.update()
+    return len(indices)
+
+
+# ------------------- symmetry map --------------#
+_symmetry_maps = {}  # object name -> (coordinates checksum, map)
+CHUNK = 1 << 16  # mirrored vertices looked up at once, bounds the candidate arrays
+
+
+def symmetry_map(human, tolerance=None):
+    """
+    Mirrored vertex of every vertex about the x center plane of the mesh, built once per mesh.
+    The mirrored points are looked up in a VertexGrid with cells of twice the tolerance (or of two
+    mean edges on dense meshes), so a counterpart within that half cell is always found.
+
+    Returns:
+        tuple: (mirror indices (n,), matched mask (n,), midx). A vertex without a counterpart
+               closer than `tolerance` is not matched and maps to itself, callers keep its own
+               data instead (scans are never exactly symmetric).
+    """
+    mesh = human.data
+    co = read_coords(mesh)
+    if tolerance is None:
+        tolerance = human.dimensions[2] / 57 * 0.25
+    key = (zlib.crc32(co.tobytes()), tolerance)
+    cached = _symmetry_maps.get(human.name_full)
+    if cached and cached[0] == key:
+        return cached[1]
+
+    co = co.astype(np.float64)
+    midx = float(co[:, 0].max() + co[:, 0].min()) / 2
+    tris = read_triangles(mesh)
+    edge = np.linalg.norm(co[tris[:, 1]] - co[tris[:, 0]], axis=1).mean() if len(tris) else tolerance
+    grid = VertexGrid(co, max(min(2 * tolerance, 2 * float(edge)), 1e-9))
+
+    mirrored = co.copy()
+    mirrored[:, 0] = 2 * midx - co[:, 0]
+    mirror = np.empty(len(co), dtype=np.int64)
+    for begin in range(0, len(co), CHUNK):
+        mirror[begin : begin + CHUNK] = grid.nearest(mirrored[begin : begin + CHUNK])
+    found = np.flatnonzero(mirror >= 0)
+    matched = np.zeros(len(co), dtype=bool)
+    diff = co[mirror[found]] - mirrored[found]
+    matched[found] = np.einsum("ij,ij->i", diff, diff) <= tolerance * tolerance
+    mirror = np.where(matched, mirror, np.arange(len(co))).astype(np.int32)
+    result = (mirror, matched, midx)
+    _symmetry_maps[human.name_full] = (key, result)
+    return result
+
+
+def mirror_weights(human, direction="LEFT_TO_RIGHT", tolerance=None):
+    """
+    Copies the weights of one side onto the other through the symmetry map, .L groups
+    becoming .R groups. Works on the CSR arrays of the mesh: target rows take the rows of their
+    mirrored vertices with flipped group indices. Unmatched vertices of the target side keep
+    their weights.
+
+    Returns:
+        tuple: (mirrored vertex count, unmatched vertex count)
+    """
+    mesh = human.data
+    mirror, matched, midx = symmetry_map(human, tolerance)
+    co = read_coords(mesh)
+    target = co[:, 0] < midx if direction == "LEFT_TO_RIGHT" else co[:, 0] > midx
+    unmatched = int(np.count_nonzero(target & ~matched))
+    target &= matched
+    if not target.any():
+        return 0, unmatched
+
+    groups = human.vertex_groups
+    for name in [g.name for g in groups]:
+        flipped = bpy.utils.flip_name(name)
+        if flipped not in groups:
+            groups.new(name=flipped)
+    names = [g.name for g in groups]
+    flip = np.array([groups[bpy.utils.flip_name(name)].index for name in names], dtype=np.uint16)
+    indptr, group_ids, weights = read_weights_csr(mesh)
+
+    # Target row v = row mirror[v] of the source side, empty rows elsewhere
+    source = mirror[target]
+    counts = np.zeros(len(co), dtype=np.int64)
+    counts[target] = indptr[source + 1] - indptr[source]
+    new_indptr = np.concatenate([[0], np.cumsum(counts)])
+    count = counts[target]
+    pick = np.repeat(indptr[source] - np.cumsum(count) + count, count) + np.arange(count.sum())
+
+    indices = np.flatnonzero(target).tolist()
+    for group in groups:
+        group.remove(indices)
+    write_weights_csr(human, names, new_indptr, flip[group_ids[pick]], weights[pick], replace=False)
+    mesh.update()
+    return len(indices), unmatched
+
+
+# ------------------- local reweight --------------#
+class LocalReweight(bpy.types.Operator):
+    bl_idname = "fg.local_reweight"
+    bl_label = "local reweight"
+    bl_description = "Reweight only the vertices of the active bone between itself and its children.\n\n*The human must already be parented to the armature (Auto Parent)\n"
+    bl_options = {"REGISTER", "UNDO"}
+
+    def execute(self, context):
+        armatur = context.object
+        bone = context.active_bone
+        if not armatur or armatur.type != "ARMATURE" or not bone:
+            self.report({"ERROR"}, "No active bone selected")
+            return {"CANCELLED"}
+        mode = armatur.mode
+        bone_name = bone.name
+        bpy.ops.object.mode_set(mode="OBJECT")
+        children = [b.name for b in armatur.data.bones[bone_name].children]
+
+        count = reweight_local(context.scene.my_object, armatur, bone_name, children)
+        bpy.ops.object.mode_set(mode=mode)
+        if not count:
+            self.report({"WARNING"}, f"No weights of {bone_name} to redistribute, use Auto Parent first")
+            return {"CANCELLED"}
+        self.report({"INFO"}, f"Reweighted {count} vertices of {bone_name}")
+        return {"FINISHED"}
+
+
+# ------------------- mirror weights --------------#
+class MirrorWeights(bpy.types.Operator):
+    bl_idname = "fg.mirror_weights"
+    bl_label = "mirror weights"
+    bl_description = "Copy the weights of one side of the human onto the other through a vertex symmetry map,\nso .L and .R deform the same even on scans that are not exactly symmetric\n"
+    bl_options = {"REGISTER", "UNDO"}
+
+    direction: bpy.props.EnumProperty(
+        name="Direction",
+        items=[
+            ("LEFT_TO_RIGHT", "Left to Right", "Overwrite the -X side with the +X (.L) side"),
+            ("RIGHT_TO_LEFT", "Right to Left", "Overwrite the +X side with the -X (.R) side"),
+        ],
+        default="LEFT_TO_RIGHT",
+    )
+    tolerance: bpy.props.FloatProperty(
+        name="Tolerance", default=0.0, min=0.0, subtype="DISTANCE", description="Max distance to the mirrored vertex, 0 uses a quarter of the body unit"
+    )
+
+    def execute(self, context):
+        human = context.scene.my_object
+        if not human or not human.vertex_groups:
+            self.report({"ERROR"}, "The human has no vertex groups, use Auto Parent first")
+            return {"CANCELLED"}
+        mode = context.object.mode if context.object else "OBJECT"
+        if mode != "OBJECT":
+            bpy.ops.object.mode_set(mode="OBJECT")
+        count, unmatched = mirror_weights(human, self.direction, self.tolerance or None)
+        if mode != "OBJECT":
+            bpy.ops.object.mode_set(mode=mode)
+        self.report({"INFO"}, f"Mirrored weights of {count} vertices, {unmatched} without counterpart kept")
+        return {"FINISHED"}
+
+
+# ------------------ register -------------------#
+classes = [LocalReweight, MirrorWeights]
+
+
+def register():
+
+    for cls in classes:
+        bpy.utils.register_class(cls)
+
+
+def unregister():
+
+    for cls in reversed(classes):
+        bpy.utils.unregister_class(cls)
+
+
+if __name__ == "__main__":
+    register()
@@ -11,15 +11,113 @@ def visible_armature_poll(self, obj):
 
 
 # 🧠 Bone enum callback
+# Blender needs the returned items kept alive, they also stay cached between redraws
+CHILD_TOLERANCE = 0.01
+_head_hashes = {}  # armature data pointer -> {cell: [(bone name, head)]}
+_bone_items = {}  # (armature data pointer, active bone name) -> enum items
+_NOT_ARMATURE = [("", "Not an armature", "")]
+_NO_BONE = [("", "No bone selected", "")]
+_NO_CHILD = [("", "No child bone found", "")]
+
+
+def _cell(co):
+    return (int(co[0] // CHILD_TOLERANCE), int(co[1] // CHILD_TOLERANCE), int(co[2] // CHILD_TOLERANCE))
+
+
+def _head_hash(armature):
+    """Spatial hash of bone heads, cells as large as the child tolerance."""
+    key = armature.as_pointer()
+    cells = _head_hashes.get(key)
+    if cells is None:
+        cells = {}
+        for bone in armature.bones:
+            cells.setdefault(_cell(bone.head_local), []).append((bone.name, bone.head_local.copy()))
+        _head_hashes[key] = cells
+    return cells
+
+
+def clear_bone_cache(armature=None):
+    if armature is None:
+        _head_hashes.clear()
+        _bone_items.clear()
+        return
+    key = armature.as_pointer()
+    _head_hashes.pop(key, None)
+    for item_key in [k for k in _bone_items if k[0] == key]:
+        del _bone_items[item_key]
+
+
+@bpy.app.handlers.persistent
+def _bone_cache_update(scene, depsgraph):
+    """Drops the cached lookup of armatures whose bones changed."""
+    for update in depsgraph.updates:
+        if isinstance(update.id, bpy.types.Armature):
+            clear_bone_cache(update.id.original)
+
+
+@bpy.app.handlers.persistent
+def _bone_cache_reset(*args):
+    clear_bone_cache()
+
+
+def live_refit_update(self, context):
+    from ..operators.live_refit import toggle
+
+    toggle(self)
+
+
 def get_bone_items(self, context):
     obj = context.object
     if not obj or obj.type != "ARMATURE":
-        return [("", "Not an armature", "")]
+        return _NOT_ARMATURE
     objbone = context.active_pose_bone
     if not objbone or not obj.pose.bones:
-        return [("", "No bone selected", "")]
-    matches = [bone for bone in obj.pose.bones if (bone.bone.head_local - objbone.bone.tail_local).length < 0.01]
-    return [(b.name, b.name, "") for b in matches] or [("", "No child bone found", "")]
+        return _NO_BONE
+    key = (obj.data.as_pointer(), objbone.name)
+    items = _bone_items.get(key)
+    if items is None:
+        tail = objbone.bone.tail_local
+        cells = _head_hash(obj.data)
+        cx, cy, cz = _cell(tail)
+        matches = [
+            name
+            for dx in (-1, 0, 1)
+            for dy in (-1, 0, 1)
+            for dz in (-1, 0, 1)
+            for name, head in cells.get((cx + dx, cy + dy, cz + dz), ())
+            if (head - tail).length < CHILD_TOLERANCE
+        ]
+        items = [(name, name, "") for name in matches] or _NO_CHILD
+        _bone_items[key] = items
+    return items
+
+
+# 📊 Rig profile results (filled by fg.profile_rig)
+class FgProfileEntry(bpy.types.PropertyGroup):
+    bone: bpy.props.StringProperty(name="Bone")
+    constraint: bpy.props.StringProperty(name="Constraint")
+    ms: bpy.props.FloatProperty(name="ms/frame", precision=3)
+
+
+class FgBatchEntry(bpy.types.PropertyGroup):
+    # name: the human
+    ms: bpy.props.FloatProperty(name="ms", precision=0)
+    status: bpy.props.StringProperty(name="Status")
+
+
+class FgStressEntry(bpy.types.PropertyGroup):
+    # name: the test pose
+    stretch: bpy.props.FloatProperty(name="Stretch", precision=3)
+    area_loss: bpy.props.FloatProperty(name="Area Loss", precision=3)
+    folded: bpy.props.FloatProperty(name="Folded", precision=3)
+    volume: bpy.props.FloatProperty(name="Volume", precision=3)
+
+
+class FgCheckEntry(bpy.types.PropertyGroup):
+    # name: the bone
+    check: bpy.props.StringProperty(name="Check")
+    ok: bpy.props.BoolProperty(name="Passed")
+    detail: bpy.props.StringProperty(name="Detail")
 
 
 # 🔧 Base panel class
@@ -48,6 +146,18 @@ class VIEW3D_PT_Selecting(FG_BasePanel, bpy.types.Panel):
         layout.row(align=True).prop(scene, "my_armature")
         layout.separator()
 
+        row = layout.row(align=True)
+        row.operator("fg.import_scan", text="", icon="IMPORT")
+        row.prop(scene, "fg_batch_collection", text="")
+        row.operator("fg.batch_rig", text="Rig All", icon="COMMUNITY").parent = False
+        row.operator("fg.batch_rig", text="", icon="RIGHTARROW_THIN").parent = True
+        col = layout.column(align=True)
+        for entry in scene.fg_batch_report:
+            row = col.row(align=True)
+            row.label(text=entry.name)
+            row.label(text=f"{entry.ms:.0f} ms")
+            row.label(text=entry.status, icon="ERROR" if "failed" in entry.status or "not found" in entry.status or "issues" in entry.status else "CHECKMARK")
+
 
 class VIEW3D_PT_Rig_Orienting(FG_BasePanel, bpy.types.Panel):
     bl_label = "::: Auto Rig & Parent :::"
@@ -63,7 +173,43 @@ class VIEW3D_PT_Rig_Orienting(FG_BasePanel, bpy.types.Panel):
         row.operator("fg.generate_rig", text="Generate RIG", icon="CONSTRAINT_BONE")
         row.scale_x = 0.25
         row.prop(armature.data, "use_mirror_x", text="X", icon="MOD_MIRROR")
-        layout.row(align=True).operator("fg.autoparent", text="Auto Parent", icon="RIGHTARROW_THIN")
+        layout.row(align=True).prop(context.scene, "fg_mesh_source", expand=True)
+        row = layout.row(align=True)
+        row.prop(context.scene, "fg_landmark_backend", expand=True)
+        if context.scene.fg_landmark_backend == "DEPTH":
+            row.prop(context.scene, "fg_depth_resolution", text="")
+        layout.row(align=True).prop(context.scene, "fg_part_share", slider=True)
+        layout.row(align=True).operator_menu_enum("fg.regenerate_region", "region", text="Refit Region", icon="FILE_REFRESH")
+        row = layout.row(align=True)
+        if not context.scene.fg_proxy_weights:
+            row.prop(context.scene, "fg_proxy_weights", icon="MOD_DECIM")
+        else:
+            row.prop(context.scene, "fg_proxy_weights", text="", icon="MOD_DECIM")
+            row.prop(context.scene, "fg_proxy_vertices", text="Proxy")
+            row.prop(context.scene, "fg_proxy_smooth")
+        row = layout.row(align=True)
+        row.operator("fg.autoparent", text="Auto Parent", icon="RIGHTARROW_THIN")
+        row.operator("fg.local_reweight", text="Local", icon="BONE_DATA")
+        row.operator("fg.mirror_weights", text="", icon="MOD_MIRROR")
+        layout.row(align=True).operator("fg.bake_deform_skeleton", text="Bake Deform Skeleton", icon="ARMATURE_DATA")
+        row = layout.row(align=True)
+        row.operator("fg.export_rig_spec", text="Save Rig Spec", icon="EXPORT")
+        row.operator("fg.import_rig_spec", text="Load", icon="IMPORT")
+        row = layout.row(align=True)
+        row.operator("fg.export_skin_weights", text="Save Weights", icon="EXPORT")
+        row.operator("fg.import_skin_weights", text="Load", icon="IMPORT")
+        row = layout.row(align=True)
+        row.operator("fg.validate_rig", text="Validate", icon="CHECKMARK")
+        row.prop(context.scene, "fg_validate", text="After Generate", toggle=True)
+        failed = [entry for entry in context.scene.fg_validation if not entry.ok]
+        if context.scene.fg_validation:
+            col = layout.column(align=True)
+            col.label(text=f"{len(failed)} of {len(context.scene.fg_validation)} checks failed" if failed else "All checks passed", icon="ERROR" if failed else "CHECKMARK")
+            for entry in failed:
+                row = col.row(align=True)
+                row.label(text=entry.check)
+                row.label(text=entry.name)
+                row.label(text=entry.detail)
         layout.separator()
 
 
@@ -105,6 +251,10 @@ class VIEW3D_PT_Twist_Fix(FG_BasePanel, bpy.types.Panel):
             row.prop(bone, "name", text="")
             row.scale_x = 0.5
 
+            row = layout.row(align=True)
+            row.prop(scene, "twist_mode", expand=True)
+            row.operator("fg.twist_benchmark", text="", icon="TIME")
+
 
 class VIEW3D_PT_Smart_Modes(FG_BasePanel, bpy.types.Panel):
     bl_label = ""
@@ -121,6 +271,7 @@ class VIEW3D_PT_Smart_Modes(FG_BasePanel, bpy.types.Panel):
             row.operator("object.mode_set", text="Object Mode").mode = "OBJECT"
         if mode != "EDIT_MESH":
             row.operator("fg.humaneditmode", text="Edit Human")
+        row.prop(context.scene, "fg_live_refit", text="", icon="FILE_REFRESH")
         if mode != "EDIT_ARMATURE":
             row.operator("fg.boneditmode", text="Edit Bones")
         # layout.separator()
@@ -174,6 +325,55 @@ class VIEW3D_PT_Snap_Fix(FG_BasePanel, bpy.types.Panel):
             row.operator("fg.ikorfksnap", text="IK or FK", icon="SNAP_ON")
 
 
+class VIEW3D_PT_Rig_Profile(FG_BasePanel, bpy.types.Panel):
+    bl_label = "::: Rig Profile :::"
+    bl_idname = "VIEW3D_PT_Rig_Profile"
+    bl_options = {"DEFAULT_CLOSED"}
+
+    def draw(self, context):
+        layout = self.layout
+        scene = context.scene
+
+        row = layout.row(align=True)
+        row.operator("fg.profile_rig", text="Profile Rig", icon="TIME")
+        if not scene.fg_profile:
+            return
+        layout.label(text=f"{scene.fg_profile_fps:.1f} fps")
+        col = layout.column(align=True)
+        for entry in scene.fg_profile[:15]:
+            row = col.row(align=True)
+            row.label(text=entry.bone)
+            row.label(text=entry.constraint)
+            row.label(text=f"{entry.ms:.3f} ms")
+
+
+class VIEW3D_PT_Weight_Stress(FG_BasePanel, bpy.types.Panel):
+    bl_label = "::: Weight Stress Test :::"
+    bl_idname = "VIEW3D_PT_Weight_Stress"
+    bl_options = {"DEFAULT_CLOSED"}
+
+    def draw(self, context):
+        layout = self.layout
+        scene = context.scene
+
+        row = layout.row(align=True)
+        row.operator("fg.stress_test", text="Stress Test", icon="MOD_SIMPLEDEFORM")
+        if not scene.fg_stress:
+            return
+        layout.label(text=f"score {scene.fg_stress_score:.1f} / 100")
+        col = layout.column(align=True)
+        row = col.row(align=True)
+        for title in ("pose", "stretch", "area", "folded", "volume"):
+            row.label(text=title)
+        for entry in scene.fg_stress:
+            row = col.row(align=True)
+            row.label(text=entry.name.lower())
+            row.label(text=f"{entry.stretch:.3f}")
+            row.label(text=f"{entry.area_loss:.3f}")
+            row.label(text=f"{entry.folded * 100:.1f}%")
+            row.label(text=f"{entry.volume:.3f}")
+
+
 # 🔧 Register
 classes = [
     VIEW3D_PT_Selecting,
@@ -183,6 +383,8 @@ classes = [
     VIEW3D_PT_Snap_Fix,
     VIEW3D_PT_Smart_Modes,
     VIEW3D_PT_bone_collection_toggle,
+    VIEW3D_PT_Rig_Profile,
+    VIEW3D_PT_Weight_Stress,
 ]
 
 props = {
@@ -190,21 +392,96 @@ props = {
     "my_object": bpy.props.PointerProperty(name="Human", type=bpy.types.Object, poll=visible_mesh_poll),
     "my_armature": bpy.props.PointerProperty(name="Metarig", type=bpy.types.Object, poll=visible_armature_poll),
     "chain_count": bpy.props.IntProperty(name="", default=2, min=1, max=10, description="Chain Bone Count"),
+    "fg_profile": bpy.props.CollectionProperty(type=FgProfileEntry),
+    "fg_profile_fps": bpy.props.FloatProperty(name="FPS", precision=1),
+    "fg_mesh_source": bpy.props.EnumProperty(
+        name="Mesh Source",
+        items=[
+            ("BASE", "Base", "Undeformed mesh vertices"),
+            ("SHAPE_KEYS", "Shape Keys", "Base mesh with the current shape key mix"),
+            ("EVALUATED", "Evaluated", "Mesh with modifiers and shape keys applied, as the ray casts see it"),
+        ],
+        default="BASE",
+        description="Geometry the rig generation analyses",
+    ),
+    "fg_landmark_backend": bpy.props.EnumProperty(
+        name="Landmarks",
+        items=[
+            ("RAYS", "Rays", "Probe body depth with ray casts against the mesh"),
+            ("DEPTH", "Depth Map", "Rasterize the mesh once into a front depth map and look body depth up in it"),
+        ],
+        default="RAYS",
+    ),
+    "fg_depth_resolution": bpy.props.IntProperty(name="Resolution", default=512, min=64, max=4096, description="Pixels along the longest side of the depth map"),
+    "fg_part_share": bpy.props.FloatProperty(
+        name="Loose Parts",
+        default=0.05,
+        min=0.0,
+        max=1.0,
+        subtype="FACTOR",
+        description="Mesh parts with fewer vertices than this share of the body (eyes, teeth, hair cards, props)\nare ignored by the rig fitting and get rigid weights from their nearest bone when parenting",
+    ),
+    "fg_proxy_weights": bpy.props.BoolProperty(
+        name="Proxy Weights",
+        default=False,
+        description="Auto Parent solves bone heat on a decimated copy of dense meshes\nand interpolates the weights back onto every vertex",
+    ),
+    "fg_proxy_vertices": bpy.props.IntProperty(name="Proxy Vertices", default=50000, min=1000, description="Vertex count of the decimated weighting proxy"),
+    "fg_proxy_smooth": bpy.props.IntProperty(
+        name="Smooth", default=1, min=0, max=10, description="Edge-aware smoothing passes over the full mesh after the transfer, 0 keeps the raw interpolation"
+    ),
+    "fg_batch_collection": bpy.props.PointerProperty(name="Batch", type=bpy.types.Collection, description="Collection of human meshes rigged by Rig All"),
+    "fg_batch_report": bpy.props.CollectionProperty(type=FgBatchEntry),
+    "fg_validate": bpy.props.BoolProperty(name="Validate", default=True, description="Check joint placement against the mesh after every rig generation"),
+    "fg_validation": bpy.props.CollectionProperty(type=FgCheckEntry),
+    "fg_stress": bpy.props.CollectionProperty(type=FgStressEntry),
+    "fg_stress_score": bpy.props.FloatProperty(name="Weight Score", precision=1),
+    "fg_live_refit": bpy.props.BoolProperty(
+        name="Live Refit",
+        default=False,
+        update=live_refit_update,
+        description="Refit the rig regions near the vertices you move while editing the human",
+    ),
+    "fg_live_refit_delay": bpy.props.FloatProperty(name="Refit Delay", default=0.5, min=0.1, max=5.0, subtype="TIME", unit="TIME", description="Seconds without edits before refitting"),
+    "twist_mode": bpy.props.EnumProperty(
+        name="Twist Setup",
+        items=[
+            ("CONSTRAINTS", "Constraints", "Copy location/rotation and damped track constraints per twist bone"),
+            ("DRIVER", "Driver", "One swing-twist driver per twist bone, no constraints (cheaper playback)"),
+        ],
+        default="CONSTRAINTS",
+        description="How generated twist bones follow the limb",
+    ),
 }
 
 
 def register():
+    bpy.utils.register_class(FgProfileEntry)
+    bpy.utils.register_class(FgBatchEntry)
+    bpy.utils.register_class(FgCheckEntry)
+    bpy.utils.register_class(FgStressEntry)
     for k, v in props.items():
         setattr(bpy.types.Scene, k, v)
     for cls in classes:
         bpy.utils.register_class(cls)
+    bpy.app.handlers.depsgraph_update_post.append(_bone_cache_update)
+    bpy.app.handlers.load_post.append(_bone_cache_reset)
 
 
 def unregister():
+    if _bone_cache_update in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(_bone_cache_update)
+    if _bone_cache_reset in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(_bone_cache_reset)
+    clear_bone_cache()
     for k in props:
         delattr(bpy.types.Scene, k)
     for cls in reversed(classes):
         bpy.utils.unregister_class(cls)
+    bpy.utils.unregister_class(FgStressEntry)
+    bpy.utils.unregister_class(FgCheckEntry)
+    bpy.utils.unregister_class(FgBatchEntry)
+    bpy.utils.unregister_class(FgProfileEntry)
 
 
 if __name__ == "__main__":
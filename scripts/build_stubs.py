@@ -0,0 +1,152 @@
+"""
+Writes operators/stubs.py, the manifest of the operators registered as lazy stubs, from the
+operator classes themselves: bl_* attributes, properties and the callbacks they define. The
+classes are read with ast, so neither Blender nor the operator modules are needed.
+
+    python scripts/build_stubs.py          # rewrite operators/stubs.py
+    python scripts/build_stubs.py --check  # exit 1 when operators/stubs.py is out of date
+
+Run it after changing the label, description, options or properties of an operator.
+"""
+
+import argparse
+import ast
+import json
+import os
+import sys
+
+OPERATORS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "operators")
+TARGET = os.path.join(OPERATORS, "stubs.py")
+# Modules whose operators are stubbed, in registration order (modes.py is registered as is)
+MODULES = ("rig_create", "ikfksnap", "twist", "weights", "profiling", "rig_spec", "skin_io", "stress", "validate", "scan_io", "bake")
+CALLBACKS = ("execute", "invoke", "modal", "cancel")  # same as lazy.CALLBACKS
+DEFAULT_OPTIONS = {"REGISTER", "UNDO"}
+
+HEADER = '''# Generated by scripts/build_stubs.py from the operator classes, do not edit by hand.
+import bpy
+
+from .lazy import stub_operator
+
+
+lazy_operators = [
+'''
+
+
+class Inline(ast.NodeTransformer):
+    """Replaces module level constants (e.g. enum items) used in property definitions by their value."""
+
+    def __init__(self, constants, where):
+        self.constants = constants
+        self.where = where
+
+    def visit_Name(self, node):
+        if node.id == "bpy":
+            return node
+        if node.id not in self.constants:
+            raise SystemExit(f"{self.where}: {node.id} is not a module level literal, stubs cannot copy it")
+        return ast.parse(repr(self.constants[node.id]), mode="eval").body
+
+
+def source(value):
+    """Python source of a literal, strings in double quotes like the rest of the add-on."""
+    if isinstance(value, str):
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, (list, tuple, set)):
+        items = [source(item) for item in (sorted(value) if isinstance(value, set) else value)]
+        if isinstance(value, tuple):
+            return "(" + ", ".join(items) + ("," if len(items) == 1 else "") + ")"
+        return ("[{}]" if isinstance(value, list) else "{{{}}}").format(", ".join(items))
+    return repr(value)
+
+
+def prop_source(node, constants, where):
+    """Source of a bpy.props call with its literal arguments in double quotes."""
+    node = Inline(constants, where).visit(node)
+    args = []
+    for keyword in node.keywords:
+        try:
+            args.append(f"{keyword.arg}={source(ast.literal_eval(keyword.value))}")
+        except ValueError:
+            args.append(f"{keyword.arg}={ast.unparse(keyword.value)}")  # e.g. type=bpy.types.OperatorFileListElement
+    return f"{ast.unparse(node.func)}({', '.join(args)})"
+
+
+def literal(node, where):
+    try:
+        return ast.literal_eval(node)
+    except ValueError:
+        raise SystemExit(f"{where}: {ast.unparse(node)} is not a literal") from None
+
+
+def operators(module):
+    """(class name, bl_* values, {property: source}, callbacks) of every registered operator of a module."""
+    tree = ast.parse(open(os.path.join(OPERATORS, module + ".py")).read())
+    constants, registered = {}, []
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            if node.targets[0].id == "classes":
+                registered = [name.id for name in node.value.elts]
+                continue
+            try:
+                constants[node.targets[0].id] = ast.literal_eval(node.value)
+            except ValueError:
+                pass
+
+    found = []
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef) or node.name not in registered:
+            continue
+        where = f"{module}.{node.name}"
+        meta, props, callbacks = {}, {}, []
+        for item in node.body:
+            if isinstance(item, ast.Assign) and isinstance(item.targets[0], ast.Name) and item.targets[0].id.startswith("bl_"):
+                meta[item.targets[0].id] = literal(item.value, where)
+            elif isinstance(item, ast.AnnAssign) and isinstance(item.target, ast.Name):
+                props[item.target.id] = prop_source(item.annotation, constants, where)
+            elif isinstance(item, ast.FunctionDef) and item.name in CALLBACKS:
+                callbacks.append(item.name)
+        found.append((node.name, meta, props, [name for name in CALLBACKS if name in callbacks]))
+    return found
+
+
+def render():
+    lines = [HEADER]
+    for module in MODULES:
+        for name, meta, props, callbacks in operators(module):
+            lines.append("    stub_operator(\n")
+            args = [f'__package__ + ".{module}"'] + [source(value) for value in (name, meta["bl_idname"], meta.get("bl_label", ""))]
+            if meta.get("bl_description"):
+                args.append(source(meta["bl_description"]))
+            options = set(meta.get("bl_options", DEFAULT_OPTIONS))
+            if options != DEFAULT_OPTIONS:
+                args.append("bl_options=" + source(options))
+            if props:
+                args.append("props={\n" + "".join(f"            {source(key)}: {value},\n" for key, value in props.items()) + "        }")
+            if callbacks != ["execute"]:
+                args.append("callbacks=" + source(tuple(callbacks)))
+            lines += [f"        {arg},\n" for arg in args]
+            lines.append("    ),\n")
+    lines.append("]\n")
+    return "".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="only compare with operators/stubs.py")
+    args = parser.parse_args()
+    text = render()
+    current = open(TARGET).read() if os.path.exists(TARGET) else None
+    if args.check:
+        if current != text:
+            print("operators/stubs.py is out of date, run scripts/build_stubs.py", file=sys.stderr)
+            return 1
+        return 0
+    if current != text:
+        with open(TARGET, "w") as file:
+            file.write(text)
+        print("wrote", TARGET)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+"""
+Keeps a pool of warm headless Blender workers (scripts/rig_worker.py) rigging jobs from a
+filesystem queue, so a job skips Blender launch and add-on loading.
+
+Usage (plain Python, Blender on PATH or passed with --blender):
+    python scripts/rig_daemon.py serve --queue /tmp/rigq --workers 4 --addon auto_rigify_human
+    python scripts/rig_daemon.py submit --queue /tmp/rigq --mesh scan.ply --output rig.blend --wait
+    python scripts/rig_daemon.py status --queue /tmp/rigq
+
+The daemon restarts workers that exit, and kills and restarts workers whose heartbeat stops or
+whose job runs past its time limit; the job is then reported as failed in done/.
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import uuid
+
+WORKER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rig_worker.py")
+STEPS = ("generate", "parent", "ik", "twist", "validate")
+TIMEOUT = 120.0  # default per-job limit, seconds
+STALE = 10.0  # heartbeat age of an idle worker that counts as hung, seconds
+STARTUP = 60.0  # time a new worker gets to load Blender and the add-on
+
+
+def write_json(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as file:
+        json.dump(data, file, indent=1)
+    os.replace(tmp, path)
+
+
+def read_json(path):
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def make_queue(queue):
+    for sub in ("pending", "running", "done", "workers"):
+        os.makedirs(os.path.join(queue, sub), exist_ok=True)
+
+
+# ------------------- pool --------------#
+class Worker:
+    def __init__(self, args, worker_id):
+        self.args = args
+        self.id = str(worker_id)
+        self.process = None
+        self.started = 0.0
+
+    @property
+    def beat_path(self):
+        return os.path.join(self.args.queue, "workers", f"{self.id}.json")
+
+    def start(self):
+        if os.path.exists(self.beat_path):
+            os.remove(self.beat_path)
+        command = [self.args.blender, "-b", "--factory-startup", "--python", WORKER, "--"]
+        command += ["--queue", self.args.queue, "--addon", self.args.addon, "--worker", self.id, "--max-jobs", str(self.args.max_jobs)]
+        self.process = subprocess.Popen(command)
+        self.started = time.time()
+
+    def health(self, now):
+        """None if the worker is fine, otherwise why it has to be restarted."""
+        if self.process.poll() is not None:
+            return f"exited with {self.process.returncode}"
+        beat = read_json(self.beat_path)
+        if beat is None:
+            return "no heartbeat after startup" if now - self.started > STARTUP else None
+        if beat.get("job") and beat.get("job_started"):
+            limit = beat.get("timeout") or self.args.timeout
+            if now - beat["job_started"] > limit:
+                return f"job {beat['job']} over its {limit:.0f} s limit"
+            return None  # a busy worker only beats between jobs
+        if now - beat.get("time", 0) > STALE:
+            return "heartbeat stopped"
+        return None
+
+    def kill(self):
+        if self.process.poll() is None:
+            self.process.kill()
+            self.process.wait()
+
+    def fail_job(self, reason):
+        """Moves the job the worker was running into done/ as failed."""
+        beat = read_json(self.beat_path) or {}
+        name = beat.get("job")
+        if not name:
+            return
+        path = os.path.join(self.args.queue, "running", name)
+        job = read_json(path)
+        if job is None:
+            return
+        job["result"] = {"status": "failed", "error": reason, "worker": self.id}
+        write_json(os.path.join(self.args.queue, "done", name), job)
+        os.remove(path)
+
+
+def serve(args):
+    make_queue(args.queue)
+    stop = os.path.join(args.queue, "stop")
+    if os.path.exists(stop):
+        os.remove(stop)
+    # Jobs left running by a previous daemon go back to the queue
+    for name in os.listdir(os.path.join(args.queue, "running")):
+        os.replace(os.path.join(args.queue, "running", name), os.path.join(args.queue, "pending", name))
+
+    pool = [Worker(args, n) for n in range(args.workers)]
+    for worker in pool:
+        worker.start()
+
+    def shutdown(*_):
+        open(stop, "w").close()
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+    print(f"rig daemon: {args.workers} workers on {args.queue}", flush=True)
+    while not os.path.exists(stop):
+        time.sleep(0.5)
+        now = time.time()
+        for worker in pool:
+            problem = worker.health(now)
+            if problem is None:
+                continue
+            print(f"rig daemon: worker {worker.id} {problem}, restarting", flush=True)
+            worker.kill()
+            worker.fail_job(problem)
+            worker.start()
+
+    # Workers see the stop file and finish their current job first
+    for worker in pool:
+        try:
+            worker.process.wait(timeout=args.timeout)
+        except subprocess.TimeoutExpired:
+            worker.kill()
+    os.remove(stop)
+
+
+# ------------------- client --------------#
+def submit(args):
+    make_queue(args.queue)
+    job = {"mesh": os.path.abspath(args.mesh), "steps": args.steps, "timeout": args.timeout}
+    if args.output:
+        job["output"] = os.path.abspath(args.output)
+    if args.scene:
+        job["scene"] = json.loads(args.scene)
+    name = f"{time.time():.6f}-{uuid.uuid4().hex[:8]}.json"  # sortable, so workers take jobs in order
+    write_json(os.path.join(args.queue, "pending", name), job)
+    print(name)
+    if not args.wait:
+        return 0
+    done = os.path.join(args.queue, "done", name)
+    deadline = time.time() + args.timeout + STARTUP
+    while time.time() < deadline:
+        result = read_json(done)
+        if result is not None:
+            print(json.dumps(result["result"], indent=1))
+            return 0 if result["result"]["status"] == "ok" else 1
+        time.sleep(0.05)
+    print("timed out waiting for the result", file=sys.stderr)
+    return 1
+
+
+def status(args):
+    now = time.time()
+    queue = args.queue
+    counts = {sub: len(os.listdir(os.path.join(queue, sub))) for sub in ("pending", "running", "done")}
+    print("  ".join(f"{sub} {count}" for sub, count in counts.items()))
+    healthy = True
+    for name in sorted(os.listdir(os.path.join(queue, "workers"))):
+        beat = read_json(os.path.join(queue, "workers", name))
+        if not beat:
+            continue
+        age = now - beat.get("time", 0)
+        busy = f"on {beat['job']} for {now - beat['job_started']:.1f} s" if beat.get("job") else "idle"
+        alive = bool(beat.get("job")) or age <= STALE
+        healthy &= alive
+        print(f"worker {beat['worker']:>3}  pid {beat['pid']:>7}  jobs {beat['jobs']:>5}  {busy:32}  beat {age:5.1f} s ago{'' if alive else '  STALE'}")
+    return 0 if healthy else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--queue", default=os.path.join(os.path.expanduser("~"), ".fg_rig_queue"))
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = sub.add_parser("serve", parents=[common], help="run the worker pool")
+    serve_parser.add_argument("--blender", default="blender")
+    serve_parser.add_argument("--addon", default="auto_rigify_human", help="add-on module name as installed")
+    serve_parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    serve_parser.add_argument("--timeout", type=float, default=TIMEOUT, help="job time limit when the job sets none")
+    serve_parser.add_argument("--max-jobs", type=int, default=0, help="recycle a worker after this many jobs (0: never)")
+
+    submit_parser = sub.add_parser("submit", parents=[common], help="queue one mesh")
+    submit_parser.add_argument("--mesh", required=True, help=".ply, .obj, .fbx or .glb")
+    submit_parser.add_argument("--output", help=".blend, .json, .npz or .fbx")
+    submit_parser.add_argument("--steps", nargs="+", choices=STEPS, default=["generate", "parent"])
+    submit_parser.add_argument("--scene", help='scene settings as JSON, e.g. {"fg_landmark_backend": "DEPTH"}')
+    submit_parser.add_argument("--timeout", type=float, default=TIMEOUT)
+    submit_parser.add_argument("--wait", action="store_true", help="block until the result is in")
+
+    sub.add_parser("status", parents=[common], help="queue sizes and worker heartbeats")
+
+    args = parser.parse_args()
+    args.queue = os.path.abspath(args.queue)
+    if args.command == "serve":
+        serve(args)
+        return 0
+    make_queue(args.queue)
+    return submit(args) if args.command == "submit" else status(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
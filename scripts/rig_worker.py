@@ -0,0 +1,265 @@
+"""
+Warm rig worker: runs inside a headless Blender with the add-on enabled and takes rig jobs from a
+filesystem queue until stopped, so each job only pays for the rigging itself.
+Started and supervised by scripts/rig_daemon.py:
+
+    blender -b --factory-startup --python scripts/rig_worker.py -- --queue /tmp/rigq --addon auto_rigify_human --worker 0
+
+Queue layout (all moves are atomic renames inside the queue directory):
+    pending/<job>.json     submitted jobs, claimed by renaming into running/
+    running/<job>.json     job being rigged
+    done/<job>.json        job + "result" (status, ms per step, output, checks)
+    workers/<worker>.json  heartbeat: pid, time, current job, jobs done
+
+Job file:
+    {"mesh": "/scans/a.ply", "output": "/rigs/a.blend", "steps": ["generate", "parent", "ik", "twist", "validate"],
+     "timeout": 120, "scene": {"fg_mesh_source": "BASE", "fg_landmark_backend": "DEPTH"}}
+Outputs: .blend (whole scene), .json / .npz (rig spec), .fbx.
+.ply/.obj scans are loaded as arrays and the rig is generated from them; their mesh is only built by
+the parent and validate steps or a .blend/.fbx output, so rig spec jobs never create it.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+import traceback
+
+import addon_utils
+import bpy
+
+IK_BONES = ("hand.L", "hand.R", "foot.L", "foot.R")
+TWIST_BONES = {"up_twist_armleg": ("upper_arm.L", "upper_arm.R", "thigh.L", "thigh.R"), "down_twist_armleg": ("forearm.L", "forearm.R", "shin.L", "shin.R")}
+TWIST_TARGETS = {"forearm": "hand", "shin": "foot"}  # lower twists copy the rotation of this child (scene.bone_enum)
+# Module level caches keyed by object names or data pointers, which the next job's objects may reuse
+CACHES = {"operators.scan_io": ("_scans",), "operators.rig_create": ("_fit_cache",), "operators.weights": ("_symmetry_maps",), "operators.live_refit": ("_baselines",), "panels.Fg_Panel": ("_head_hashes", "_bone_items")}
+POLL = 0.05  # seconds between queue scans when idle
+HEARTBEAT = 1.0
+
+
+class StepFailed(RuntimeError):
+    pass
+
+
+# ------------------- scene --------------#
+def clear_caches(addon):
+    for module, names in CACHES.items():
+        module = sys.modules.get(f"{addon}.{module}")
+        for name in names:
+            cache = getattr(module, name, None)
+            if cache is not None:
+                cache.clear()
+
+
+def reset_scene(addon):
+    """Empties the scene, the add-on's scene settings and caches between jobs without reloading Blender or the add-on."""
+    if bpy.context.object and bpy.context.object.mode != "OBJECT":
+        bpy.ops.object.mode_set(mode="OBJECT")
+    for obj in list(bpy.data.objects):
+        bpy.data.objects.remove(obj, do_unlink=True)
+    for collection in list(bpy.data.collections):
+        bpy.data.collections.remove(collection)
+    bpy.data.orphans_purge(do_local_ids=True, do_linked_ids=True, do_recursive=True)
+    # Every add-on scene property back to its default and its reports emptied, so a job never sees
+    # the settings ("scene" in the job file) or results of the job the worker ran before
+    scene = bpy.context.scene
+    for key in importlib.import_module(f"{addon}.panels.Fg_Panel").props:
+        value = getattr(scene, key)
+        if isinstance(value, bpy.types.bpy_prop_collection):
+            value.clear()
+        else:
+            scene.property_unset(key)
+    clear_caches(addon)
+
+
+def load_mesh(filepath):
+    """Imports the human and returns it; .ply/.obj only go through the add-on's numpy scan loader (None)."""
+    ext = os.path.splitext(filepath)[1].lower()
+    if ext in (".ply", ".obj"):
+        call("import_scan", filepath=filepath, build_mesh=False)
+        return None
+    if ext == ".fbx":
+        bpy.ops.import_scene.fbx(filepath=filepath)
+    elif ext in (".glb", ".gltf"):
+        bpy.ops.import_scene.gltf(filepath=filepath)
+    else:
+        raise ValueError(f"Unsupported mesh format: {ext}")
+    meshes = [obj for obj in bpy.context.scene.objects if obj.type == "MESH"]
+    if not meshes:
+        raise ValueError("No mesh in the imported file")
+    human = max(meshes, key=lambda obj: len(obj.data.vertices))
+    bpy.context.scene.my_object = human
+    bpy.context.view_layer.objects.active = human
+    return human
+
+
+def call(idname, **settings):
+    """Runs bpy.ops.fg.<idname>, anything but FINISHED fails the job."""
+    result = getattr(bpy.ops.fg, idname)(**settings)
+    if "FINISHED" not in result:
+        raise StepFailed(f"fg.{idname} returned {', '.join(sorted(result))}")
+
+
+def call_on_bone(armatur, name, idname):
+    """Runs a bone operator of the add-on with `name` as the active bone, a missing bone fails the job."""
+    if not armatur:
+        raise StepFailed("No armature, run the generate step first")
+    bpy.context.view_layer.objects.active = armatur
+    bpy.ops.object.mode_set(mode="POSE")
+    bone = armatur.data.bones.get(name)
+    if not bone:
+        raise StepFailed(f"Bone {name} is not in the rig")
+    armatur.data.bones.active = bone
+    base, _, side = name.partition(".")
+    if base in TWIST_TARGETS:
+        target = f"{TWIST_TARGETS[base]}.{side}"
+        if target not in armatur.data.bones:
+            raise StepFailed(f"Bone {target} is not in the rig")
+        bpy.context.scene.bone_enum = target
+    call(idname)
+    if bpy.context.object.mode != "OBJECT":
+        bpy.ops.object.mode_set(mode="OBJECT")
+
+
+def run_step(step, job, result):
+    scene = bpy.context.scene
+    if step == "generate":
+        call("generate_rig")
+    elif step == "parent":
+        call("autoparent")
+    elif step == "ik":
+        for name in job.get("ik", IK_BONES):
+            call_on_bone(scene.my_armature, name, "generate_ik")
+    elif step == "twist":
+        for idname, names in TWIST_BONES.items():
+            for name in names:
+                call_on_bone(scene.my_armature, name, idname)
+    elif step == "validate":
+        call("validate_rig")
+        result["checks"] = [{"check": e.check, "bone": e.name, "detail": e.detail} for e in scene.fg_validation if not e.ok]
+    else:
+        raise ValueError(f"Unknown step: {step}")
+
+
+def save_output(filepath, addon):
+    os.makedirs(os.path.dirname(os.path.abspath(filepath)), exist_ok=True)
+    ext = os.path.splitext(filepath)[1].lower()
+    if bpy.context.object and bpy.context.object.mode != "OBJECT":
+        bpy.ops.object.mode_set(mode="OBJECT")
+    if ext in (".blend", ".fbx"):
+        importlib.import_module(f"{addon}.operators.scan_io").scan_human(bpy.context)  # the file carries the mesh
+    if ext == ".blend":
+        bpy.ops.wm.save_as_mainfile(filepath=filepath, copy=True, check_existing=False)
+    elif ext in (".json", ".npz"):
+        call("export_rig_spec", filepath=filepath)
+    elif ext == ".fbx":
+        bpy.ops.export_scene.fbx(filepath=filepath, add_leaf_bones=False)
+    else:
+        raise ValueError(f"Unsupported output format: {ext}")
+
+
+def run_job(job, addon):
+    result = {"status": "ok", "ms": {}}
+    reset_scene(addon)
+    for key, value in job.get("scene", {}).items():
+        setattr(bpy.context.scene, key, value)
+    start = time.perf_counter()
+    load_mesh(job["mesh"])
+    result["ms"]["load"] = (time.perf_counter() - start) * 1000
+    for step in job.get("steps", ["generate"]):
+        start = time.perf_counter()
+        run_step(step, job, result)
+        result["ms"][step] = (time.perf_counter() - start) * 1000
+    if job.get("output"):
+        start = time.perf_counter()
+        save_output(job["output"], addon)
+        result["ms"]["save"] = (time.perf_counter() - start) * 1000
+        result["output"] = job["output"]
+    return result
+
+
+# ------------------- queue --------------#
+def write_json(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as file:
+        json.dump(data, file, indent=1)
+    os.replace(tmp, path)
+
+
+def claim(queue):
+    """
+    First pending job (names start with the submit time) moved into running/, or None.
+    The rename makes the claim exclusive between workers.
+    """
+    pending = os.path.join(queue, "pending")
+    for name in sorted(name for name in os.listdir(pending) if name.endswith(".json")):
+        target = os.path.join(queue, "running", name)
+        try:
+            os.rename(os.path.join(pending, name), target)
+        except OSError:
+            continue  # another worker was faster
+        return target
+    return None
+
+
+def serve(queue, worker, addon, max_jobs=0):
+    for sub in ("pending", "running", "done", "workers"):
+        os.makedirs(os.path.join(queue, sub), exist_ok=True)
+    beat_path = os.path.join(queue, "workers", f"{worker}.json")
+    jobs = 0
+    beat = {"pid": os.getpid(), "worker": worker, "jobs": 0, "job": None, "started": time.time()}
+    last_beat = 0.0
+    while True:
+        now = time.time()
+        if now - last_beat > HEARTBEAT:
+            write_json(beat_path, dict(beat, time=now))
+            last_beat = now
+        if os.path.exists(os.path.join(queue, "stop")):
+            break
+        path = claim(queue)
+        if not path:
+            time.sleep(POLL)
+            continue
+
+        name = os.path.basename(path)
+        with open(path) as file:
+            job = json.load(file)
+        beat.update(job=name, job_started=time.time(), timeout=job.get("timeout"))
+        write_json(beat_path, dict(beat, time=time.time()))
+        start = time.perf_counter()
+        try:
+            result = run_job(job, addon)
+        except Exception as error:
+            traceback.print_exc()
+            result = {"status": "failed", "error": f"{type(error).__name__}: {error}"}
+        result["worker"] = worker
+        result["total_ms"] = (time.perf_counter() - start) * 1000
+        write_json(os.path.join(queue, "done", name), dict(job, result=result))
+        os.remove(path)
+        jobs += 1
+        beat.update(job=None, job_started=None, timeout=None, jobs=jobs)
+        last_beat = 0.0
+        print(f"rig worker {worker}: {name} {result['status']} in {result['total_ms']:.0f} ms", flush=True)
+        if max_jobs and jobs >= max_jobs:
+            break  # recycled by the daemon, keeps memory growth of long sessions bounded
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1 :] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description="Warm rig worker (run inside Blender)")
+    parser.add_argument("--queue", required=True)
+    parser.add_argument("--addon", default="auto_rigify_human")
+    parser.add_argument("--worker", default="0")
+    parser.add_argument("--max-jobs", type=int, default=0, help="exit after this many jobs (0: never)")
+    args = parser.parse_args(argv)
+
+    # Warm everything once: eager registration imports every operator module and numpy up front
+    os.environ["FG_RIG_EAGER"] = "1"
+    addon_utils.enable(args.addon, default_set=False, handle_error=None)
+    serve(os.path.abspath(args.queue), args.worker, args.addon, args.max_jobs)
+
+
+if __name__ == "__main__":
+    main()
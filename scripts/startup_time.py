@@ -0,0 +1,58 @@
+"""
+Measures how long a headless Blender launch takes with the add-on enabled,
+once with lazy operator registration (default) and once with FG_RIG_EAGER=1.
+
+Usage (plain Python, Blender on PATH or passed with --blender):
+    python scripts/startup_time.py --addon auto_rigify_human --runs 5
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import time
+
+PROBE = """
+import addon_utils, sys, time
+start = time.perf_counter()
+addon_utils.enable({addon!r}, default_set=False, handle_error=None)
+enable_ms = (time.perf_counter() - start) * 1000
+print("FG_ENABLE_MS", enable_ms, "numpy" in sys.modules)
+"""
+
+
+def launch(blender, addon, eager):
+    env = dict(os.environ)
+    env.pop("FG_RIG_EAGER", None)
+    if eager:
+        env["FG_RIG_EAGER"] = "1"
+    start = time.perf_counter()
+    out = subprocess.run(
+        [blender, "-b", "--factory-startup", "--python-expr", PROBE.format(addon=addon)],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    wall_ms = (time.perf_counter() - start) * 1000
+    line = next(line for line in out.splitlines() if line.startswith("FG_ENABLE_MS"))
+    _, enable_ms, numpy_loaded = line.split()
+    return wall_ms, float(enable_ms), numpy_loaded == "True"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--blender", default="blender")
+    parser.add_argument("--addon", default="auto_rigify_human", help="add-on module name as installed")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    for label, eager in (("eager", True), ("lazy", False)):
+        runs = [launch(args.blender, args.addon, eager) for _ in range(args.runs)]
+        wall = statistics.median(r[0] for r in runs)
+        enable = statistics.median(r[1] for r in runs)
+        print(f"{label:5}  launch {wall:8.1f} ms   add-on enable {enable:7.2f} ms   numpy imported: {runs[-1][2]}")
+
+
+if __name__ == "__main__":
+    main()